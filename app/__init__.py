@@ -0,0 +1,4 @@
+import time
+
+# Reference point for the startup timing report (app.core.startup)
+IMPORT_STARTED = time.time()
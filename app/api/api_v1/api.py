@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import health, schedules, docker, auth, system
+from app.api.api_v1.endpoints import health, schedules, docker, auth, system, jobs, events, alerts, scale_to_zero
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -7,3 +7,7 @@ api_router.include_router(health.router, tags=["health"])
 api_router.include_router(schedules.router, prefix="/schedules", tags=["schedules"])
 api_router.include_router(docker.router, prefix="/docker", tags=["docker"])
 api_router.include_router(system.router, prefix="/system", tags=["system"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
+api_router.include_router(scale_to_zero.router, prefix="/scale-to-zero", tags=["scale-to-zero"])
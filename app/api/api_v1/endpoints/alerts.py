@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+import json
+
+from app.api import deps
+from app.core.executors import offload, DB
+from app.models.alert import AlertRule as AlertRuleModel
+from app.schemas.alert import ActiveAlert, AlertRule, AlertRuleCreate
+from app.services.alert_service import alert_service
+
+router = APIRouter()
+
+JSON_FIELDS = ("action_container_ids", "action_options", "sinks")
+
+
+def _columns(rule_in: AlertRuleCreate) -> dict:
+    data = rule_in.model_dump()
+    for field in JSON_FIELDS:
+        if data.get(field) is not None:
+            data[field] = json.dumps(data[field])
+    return data
+
+@router.get("/rules", response_model=List[AlertRule])
+@offload(DB)
+def read_alert_rules(db: Session = Depends(deps.get_db), current_user: str = Depends(deps.get_current_user)):
+    return db.query(AlertRuleModel).order_by(AlertRuleModel.id).all()
+
+@router.post("/rules", response_model=AlertRule)
+@offload(DB)
+def create_alert_rule(
+    rule_in: AlertRuleCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Add a threshold rule, e.g. {"scope": "container", "metric": "memory_percent",
+    "operator": ">", "threshold": 90, "for_seconds": 120}. Rules are evaluated
+    on every stats sample (STATS_SAMPLE_INTERVAL).
+    """
+    rule = AlertRuleModel(**_columns(rule_in))
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    alert_service.rules_changed()
+    return rule
+
+@router.put("/rules/{rule_id}", response_model=AlertRule)
+@offload(DB)
+def update_alert_rule(
+    rule_id: int,
+    rule_in: AlertRuleCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    rule = db.query(AlertRuleModel).filter(AlertRuleModel.id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    for field, value in _columns(rule_in).items():
+        setattr(rule, field, value)
+    db.commit()
+    db.refresh(rule)
+    alert_service.rules_changed()
+    return rule
+
+@router.delete("/rules/{rule_id}")
+@offload(DB)
+def delete_alert_rule(rule_id: int, db: Session = Depends(deps.get_db), current_user: str = Depends(deps.get_current_user)):
+    rule = db.query(AlertRuleModel).filter(AlertRuleModel.id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    db.delete(rule)
+    db.commit()
+    alert_service.rules_changed()
+    return {"ok": True}
+
+@router.get("/active", response_model=List[ActiveAlert])
+@offload(DB)
+def read_active_alerts(current_user: str = Depends(deps.get_current_user)):
+    """Alerts currently pending (waiting out for_seconds) or firing."""
+    return alert_service.active()
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.schemas.auth import LoginRequest, Token, ChangePassword, ChangeUsername
 from app.core.auth import authenticate_user, create_access_token, verify_password, get_password_hash
 from app.core.config import settings
+from app.core.executors import offload, AUTH
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
 from app.schemas.msg import Msg
@@ -12,6 +13,7 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
+@offload(AUTH)
 def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Login endpoint to get access token.
@@ -43,6 +45,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/change-password", response_model=Msg)
+@offload(AUTH)
 def change_password(
     password_data: ChangePassword,
     current_user: str = Depends(get_current_user),
@@ -72,6 +75,7 @@ def change_password(
 
 
 @router.post("/change-username", response_model=Msg)
+@offload(AUTH)
 def change_username(
     username_data: ChangeUsername,
     current_user: str = Depends(get_current_user),
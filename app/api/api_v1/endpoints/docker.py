@@ -1,6 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query, Body, Depends
-from typing import List, Optional, Dict
-from app.services.docker_service import docker_service
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Dict
+import asyncio
+from app.core.sse import sse_event, SSE_HEADERS
+from app.core.admission import admitted_request
+from app.core.config import settings
+from app.core.executors import offload, DOCKER
+from app.services.docker_service import docker_service, DockerUnavailableError
+from app.services.image_pull_service import image_pull_service, FINISHED as FINISHED_PULL
+from app.services.disk_usage_service import disk_usage_service
+from app.services.image_gc_service import image_gc_service
+from app.services.memory_stats_service import memory_stats_service
+from app.services.container_group_service import container_group_service
+from app.services.rollout_service import rollout_service
+from app.services.startup_service import startup_service, DependencyCycleError
+from app.services.stats_history_service import stats_history_service
+from app.services.job_service import job_service
+from app.services import docker_jobs
+from app.api.api_v1.endpoints.jobs import job_accepted
+from app.schemas.job import JobAccepted
 from app.api.deps import get_current_user
 from app.schemas.docker import (
     ContainerSummary, 
@@ -8,19 +26,43 @@ from app.schemas.docker import (
     ContainerResourceUpdate, 
     ContainerAction,
     ImageSummary,
-    PruneResult
+    ImagePullRequest,
+    ImagePullJob,
+    PrunePreview,
+    ImagePrunePolicy,
+    ImagePrunePlan,
+    PruneResult,
+    RollingRestartPolicy,
+    RollingRestartRequest,
+    RollingRestartResult,
+    ResourceRecommendation,
+    ApplyRecommendationsRequest,
+    AppliedRecommendation,
+    MemoryStatsSummary,
+    ContainerGroup,
+    ContainerGroupStats,
+    GroupActionResult,
+    StartContainersRequest,
+    StartupResult,
 )
 
 router = APIRouter()
 
 # --- Containers ---
 
-@router.post("/containers", response_model=ContainerAction, status_code=201)
-def create_container(container: ContainerCreate, current_user: str = Depends(get_current_user)):
+@router.post("/containers", response_model=ContainerAction, status_code=201, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def create_container(container: ContainerCreate, background: bool = False, current_user: str = Depends(get_current_user)):
     """
     Create a new container from an image.
+    If the image isn't present locally, waits on a (shared) background pull first.
+    With background=true, returns 202 and a job ID instead of waiting.
     """
+    if background:
+        spec = container.model_dump(exclude={"detach"})
+        return job_accepted(job_service.submit(docker_jobs.CREATE_CONTAINER, detach=True, **spec))
     try:
+        image_pull_service.ensure_image(container.image)
         new_container = docker_service.create_container(
             image=container.image,
             name=container.name,
@@ -40,20 +82,49 @@ def create_container(container: ContainerCreate, current_user: str = Depends(get
                 "container_id": new_container.short_id
             }
         raise HTTPException(status_code=400, detail="Failed to create container")
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/containers", response_model=List[ContainerSummary])
+@offload(DOCKER)
 def list_containers(all: bool = True, current_user: str = Depends(get_current_user)):
     """
     List all containers (running and stopped by default).
     """
     try:
         return docker_service.list_containers(all=all)
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/containers/recommendations", response_model=List[ResourceRecommendation])
+@offload(DOCKER)
+def list_recommendations(window_hours: Optional[int] = Query(None, ge=1, le=24 * 92), flagged: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    Resource recommendations for every container with stats history in the window.
+    With flagged=true, only containers flagged as over-provisioned or at risk.
+    """
+    return stats_history_service.recommend_all(window_hours, flagged=flagged)
+
+@router.post("/containers/recommendations/apply", response_model=List[AppliedRecommendation], responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def apply_recommendations(request: ApplyRecommendationsRequest, background: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    Set the recommended CPU quota and/or memory limit on several containers, through
+    the same update as PATCH /containers/{id}/resources. Containers without enough
+    history are skipped. dry_run=true only reports the limits that would be set.
+    """
+    if background:
+        return job_accepted(job_service.submit(docker_jobs.APPLY_RECOMMENDATIONS, **request.model_dump()))
+    return stats_history_service.apply(**request.model_dump())
+
 @router.get("/containers/{container_id}", response_model=Dict)
+@offload(DOCKER)
 def get_container(container_id: str, current_user: str = Depends(get_current_user)):
     """
     Get detailed information about a specific container.
@@ -64,26 +135,109 @@ def get_container(container_id: str, current_user: str = Depends(get_current_use
     return container.attrs
 
 @router.post("/containers/{container_id}/start", response_model=ContainerAction)
+@admitted_request("start")
+@offload(DOCKER)
 def start_container(container_id: str, current_user: str = Depends(get_current_user)):
     if docker_service.start_container(container_id):
         return {"success": True, "message": "Container started"}
     raise HTTPException(status_code=400, detail="Failed to start container or container not found")
 
 @router.post("/containers/{container_id}/stop", response_model=ContainerAction)
+@offload(DOCKER)
 def stop_container(container_id: str, current_user: str = Depends(get_current_user)):
     if docker_service.stop_container(container_id):
         return {"success": True, "message": "Container stopped"}
     raise HTTPException(status_code=400, detail="Failed to stop container or container not found")
 
-@router.post("/containers/{container_id}/restart", response_model=ContainerAction)
-def restart_container(container_id: str, current_user: str = Depends(get_current_user)):
+def rollout_in_background(background: Optional[bool], container_count: int, policy: RollingRestartPolicy) -> bool:
+    """
+    Whether a health-aware rollout runs as a job. Unless the caller chose, it does once
+    its worst case exceeds ROLLOUT_SYNC_MAX_SECONDS; an explicit background=false over
+    the limit is rejected rather than holding a Docker thread that long.
+    """
+    if background is not None and background:
+        return True
+    worst_case = rollout_service.worst_case_seconds(container_count, policy)
+    if worst_case <= settings.ROLLOUT_SYNC_MAX_SECONDS:
+        return False
+    if background is False:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rollout may take up to {worst_case}s (limit {settings.ROLLOUT_SYNC_MAX_SECONDS}s for synchronous calls); use background=true",
+        )
+    return True
+
+def restart_in_background(background: Optional[bool] = None, wait_healthy: bool = False, **kwargs) -> bool:
+    """Whether a restart request runs as a job; decided before admission, as the job is admitted instead."""
+    if wait_healthy:
+        return rollout_in_background(background, 1, RollingRestartPolicy())
+    return bool(background)
+
+@router.post("/containers/{container_id}/restart", response_model=ContainerAction, responses={202: {"model": JobAccepted}})
+@admitted_request("restart", in_background=restart_in_background)
+@offload(DOCKER)
+def restart_container(container_id: str, background: Optional[bool] = None, wait_healthy: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    With wait_healthy=true, only returns once the container passes its health check
+    (Docker HEALTHCHECK if it has one, otherwise running), using the default
+    rolling restart policy's timeout. Such a restart runs as a job (202) unless it
+    fits within ROLLOUT_SYNC_MAX_SECONDS (see rollout_in_background).
+    """
+    policy = RollingRestartPolicy()
+    if restart_in_background(background, wait_healthy):
+        if wait_healthy:
+            return job_accepted(job_service.submit(docker_jobs.ROLLING_RESTART, container_ids=[container_id], **policy.model_dump()))
+        return job_accepted(job_service.submit(docker_jobs.RESTART_CONTAINER, container_id=container_id))
+    if wait_healthy:
+        step = rollout_service.rolling_restart([container_id], policy)["containers"][0]
+        if step["status"] == "healthy":
+            return {"success": True, "message": "Container restarted and healthy", "container_id": container_id}
+        raise HTTPException(status_code=400, detail=step["error"])
     if docker_service.restart_container(container_id):
         return {"success": True, "message": "Container restarted"}
     raise HTTPException(status_code=400, detail="Failed to restart container or container not found")
 
+@router.post("/containers/rolling-restart", response_model=RollingRestartResult, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def rolling_restart(request: RollingRestartRequest, background: Optional[bool] = None, current_user: str = Depends(get_current_user)):
+    """
+    Restart containers in batches of policy.batch_size, waiting for each batch to be
+    healthy before the next; a failed batch aborts the rest (see RollingRestartPolicy).
+    The result lists every container as healthy, failed or skipped.
+    With background=true, or by default when the worst case exceeds ROLLOUT_SYNC_MAX_SECONDS,
+    returns 202 and a job ID; progress is reported per batch.
+    """
+    if rollout_in_background(background, len(request.container_ids), request.policy):
+        return job_accepted(job_service.submit(
+            docker_jobs.ROLLING_RESTART, container_ids=request.container_ids, **request.policy.model_dump()
+        ))
+    return rollout_service.rolling_restart(request.container_ids, request.policy)
+
+@router.post("/containers/start", response_model=StartupResult, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def start_containers(request: StartContainersRequest, background: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    Start several containers in dependency order (compose depends_on labels plus
+    policy.edges): each level starts in parallel once its dependencies are ready.
+    Containers whose dependencies fail are skipped. A dependency cycle is a 400.
+    With background=true, returns 202 and a job ID; progress is reported per level.
+    """
+    if background:
+        return job_accepted(job_service.submit(
+            docker_jobs.START_CONTAINERS, container_ids=request.container_ids, **request.policy.model_dump()
+        ))
+    try:
+        return startup_service.start(request.container_ids, request.policy)
+    except DependencyCycleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 @router.delete("/containers/{container_id}", response_model=ContainerAction)
+@offload(DOCKER)
 def delete_container(container_id: str, force: bool = False, current_user: str = Depends(get_current_user)):
     if docker_service.delete_container(container_id, force=force):
+        disk_usage_service.invalidate()
         return {"success": True, "message": "Container deleted"}
     
     # Check if container exists and is running
@@ -96,6 +250,7 @@ def delete_container(container_id: str, force: bool = False, current_user: str =
     raise HTTPException(status_code=400, detail="Failed to delete container or container not found")
 
 @router.patch("/containers/{container_id}/resources", response_model=ContainerAction)
+@offload(DOCKER)
 def update_resources(container_id: str, resources: ContainerResourceUpdate, current_user: str = Depends(get_current_user)):
     """
     Update container resources (CPU/Memory).
@@ -109,14 +264,39 @@ def update_resources(container_id: str, resources: ContainerResourceUpdate, curr
         return {"success": True, "message": "Resources updated"}
     raise HTTPException(status_code=400, detail="Failed to update resources or container not found")
 
+@router.get("/containers/{container_id}/recommendations", response_model=ResourceRecommendation)
+@offload(DOCKER)
+def get_recommendations(container_id: str, window_hours: Optional[int] = Query(None, ge=1, le=24 * 92), current_user: str = Depends(get_current_user)):
+    """
+    Right-sized CPU/memory limits from the container's stats history: p99 CPU and
+    peak memory over the window (default RECOMMENDATION_WINDOW_HOURS) plus headroom,
+    with flags for over-provisioned and OOM/throttling-risk containers.
+    """
+    recommendation = stats_history_service.recommend(container_id, window_hours)
+    if recommendation is None:
+        raise HTTPException(status_code=404, detail="Container not found")
+    return recommendation
+
 @router.get("/containers/stats/all")
+@offload(DOCKER)
 def get_all_stats(current_user: str = Depends(get_current_user)):
     """
     Get real-time stats for all running containers.
     """
     return docker_service.get_all_container_stats()
 
+@router.get("/containers/stats/memory", response_model=MemoryStatsSummary)
+@offload(DOCKER)
+def get_memory_stats(top: Optional[int] = Query(None, ge=1), current_user: str = Depends(get_current_user)):
+    """
+    Memory-only stats for running containers, highest usage first: usage split into
+    anon, file (page cache) and kernel memory. Much cheaper than /containers/stats/all
+    (no CPU, network or block I/O); with top=N only the N largest are returned.
+    """
+    return memory_stats_service.top(top)
+
 @router.get("/containers/{container_id}/stats")
+@offload(DOCKER)
 def get_stats(container_id: str, stream: bool = False, current_user: str = Depends(get_current_user)):
     """
     Get container stats. 
@@ -128,27 +308,200 @@ def get_stats(container_id: str, stream: bool = False, current_user: str = Depen
         return stats
     raise HTTPException(status_code=404, detail="Container not found")
 
+# --- Groups ---
+
+GROUP_BY_DESCRIPTION = "\"compose\" (com.docker.compose.project), \"compose_service\", or any label key"
+
+@router.get("/groups", response_model=List[ContainerGroup])
+@offload(DOCKER)
+def list_groups(by: str = Query("compose", description=GROUP_BY_DESCRIPTION), current_user: str = Depends(get_current_user)):
+    """
+    Containers grouped by compose project or label value, with running counts.
+    """
+    try:
+        return container_group_service.groups(by)
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/groups/stats", response_model=List[ContainerGroupStats])
+@offload(DOCKER)
+def get_group_stats(by: str = Query("compose", description=GROUP_BY_DESCRIPTION), current_user: str = Depends(get_current_user)):
+    """
+    CPU, memory, network and block I/O totals per group, summed from the stats
+    sampler's latest tick of its running containers (see STATS_SAMPLE_INTERVAL).
+    """
+    try:
+        return container_group_service.rollups(by)
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/groups/{value}/{action}", response_model=GroupActionResult, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def group_action(
+    value: str,
+    action: Literal["start", "stop", "restart"],
+    by: str = Query("compose", description=GROUP_BY_DESCRIPTION),
+    background: bool = False,
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Start, stop or restart every container of a group (e.g. a whole compose stack)
+    in parallel; start goes level by level in depends_on order. With
+    background=true, returns 202 and a job ID.
+    """
+    if background:
+        return job_accepted(job_service.submit(docker_jobs.GROUP_ACTION, by=by, value=value, action=action))
+    try:
+        result = container_group_service.run_action(by, value, action)
+    except DependencyCycleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="No containers in this group")
+    return result
+
 # --- Images ---
 
 @router.get("/images", response_model=List[ImageSummary])
+@offload(DOCKER)
 def list_images(current_user: str = Depends(get_current_user)):
     try:
         return docker_service.list_images()
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/images/{image_id}", response_model=ContainerAction)
-def delete_image(image_id: str, force: bool = False, current_user: str = Depends(get_current_user)):
+@router.delete("/images/{image_id}", response_model=ContainerAction, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def delete_image(image_id: str, force: bool = False, background: bool = False, current_user: str = Depends(get_current_user)):
+    if background:
+        return job_accepted(job_service.submit(docker_jobs.DELETE_IMAGE, image_id=image_id, force=force))
     if docker_service.delete_image(image_id, force=force):
+        disk_usage_service.invalidate()
         return {"success": True, "message": "Image deleted"}
     raise HTTPException(status_code=400, detail="Failed to delete image (it might be in use)")
 
-@router.post("/images/prune", response_model=PruneResult)
-def prune_images(current_user: str = Depends(get_current_user)):
+@router.get("/images/prune/preview", response_model=PrunePreview)
+@offload(DOCKER)
+def preview_prune_images(all: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    Show which images a prune would remove and how many bytes it would free.
+    Defaults to dangling images (what POST /images/prune removes); all=true previews removing every unused image.
+    """
+    try:
+        return disk_usage_service.prune_preview(all_unused=all)
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/images/prune", response_model=PruneResult, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def prune_images(background: bool = False, current_user: str = Depends(get_current_user)):
     """
     Remove unused images.
+    With background=true, returns 202 and a job ID; only one prune runs at a time.
     """
+    if background:
+        return job_accepted(job_service.submit(docker_jobs.PRUNE_IMAGES))
     try:
-        return docker_service.prune_images()
+        result = docker_service.prune_images()
+        disk_usage_service.invalidate()
+        return result
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/images/pull", response_model=ImagePullJob, status_code=202)
+@offload(DOCKER)
+def pull_image(pull: ImagePullRequest, current_user: str = Depends(get_current_user)):
+    """
+    Start pulling an image in the background.
+    Concurrent requests for the same reference (on any worker) return the same in-flight job.
+    """
+    return image_pull_service.pull(pull.image)
+
+@router.get("/images/pull/{job_id}", response_model=ImagePullJob)
+@offload(DOCKER)
+def get_pull_job(job_id: str, current_user: str = Depends(get_current_user)):
+    pull = image_pull_service.get(job_id)
+    if not pull:
+        raise HTTPException(status_code=404, detail="Pull job not found")
+    return pull
+
+@router.get("/images/pull/{job_id}/events")
+async def stream_pull_events(job_id: str, current_user: str = Depends(get_current_user)):
+    """
+    Stream per-layer pull progress as Server-Sent Events.
+    Replays the latest IMAGE_PULL_EVENT_HISTORY events, then follows until the pull finishes;
+    a client that falls further behind gets a `job` event with the whole state instead.
+    A worker other than the one pulling sends `job` events as the shared state changes.
+    """
+    job = image_pull_service.local(job_id)
+    if job is None and not await asyncio.to_thread(image_pull_service.get, job_id):
+        raise HTTPException(status_code=404, detail="Pull job not found")
+
+    def snapshot_event(pull: Dict) -> str:
+        return sse_event(ImagePullJob(**pull).model_dump(mode="json"), event="job")
+
+    async def local_stream():
+        index = 0
+        idle = 0.0
+        while True:
+            events = job.events_since(index)
+            if events is None:
+                yield snapshot_event(job.to_dict())
+                index = job.first_event_index
+                continue
+            for event in events:
+                yield sse_event(event, event=event["type"], event_id=index)
+                index += 1
+                if event["type"] == "done":
+                    return
+            if events:
+                idle = 0.0
+            elif idle >= 15:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(0.25)
+            idle += 0.25
+
+    async def remote_stream():
+        last = None
+        idle = 0.0
+        while True:
+            pull = await asyncio.to_thread(image_pull_service.get, job_id)
+            if pull is None:
+                return
+            if pull != last:
+                yield snapshot_event(pull)
+                last = pull
+                idle = 0.0
+            elif idle >= 15:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            if pull["status"] in FINISHED_PULL:
+                yield sse_event({"type": "done", "status": pull["status"], "error": pull["error"]}, event="done")
+                return
+            await asyncio.sleep(1.0)
+            idle += 1.0
+
+    stream = local_stream() if job is not None else remote_stream()
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/images/gc", response_model=ImagePrunePlan, responses={202: {"model": JobAccepted}})
+@offload(DOCKER)
+def collect_images(policy: ImagePrunePolicy, background: bool = False, current_user: str = Depends(get_current_user)):
+    """
+    Policy-driven image garbage collection (keep N newest tags per repository,
+    remove images older than X days, dangling images). Images used by any container
+    or referenced by a schedule are never removed.
+    With dry_run=true only the plan and the reclaimable bytes are returned.
+    """
+    if background:
+        return job_accepted(job_service.submit(docker_jobs.COLLECT_IMAGES, **policy.model_dump()))
+    try:
+        return image_gc_service.run(policy)
+    except DockerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+from datetime import datetime
+from typing import List, Optional
+
+from app.api.deps import get_current_user
+from app.core.executors import offload, DB
+from app.schemas.docker import DockerEvent, DockerEventFlags
+from app.services.docker_event_service import docker_event_service
+
+router = APIRouter()
+
+@router.get("/", response_model=List[DockerEvent])
+@offload(DB)
+def read_events(
+    container: Optional[str] = None,
+    type: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    before_id: Optional[int] = None,
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Stored Docker events, newest first. `container` is an ID prefix or name;
+    `since`/`until` are UTC and default to the last 24 hours. Page with
+    `before_id` set to the last id returned.
+    """
+    return docker_event_service.query(
+        container=container, event_type=type, action=action,
+        since=since, until=until, limit=limit, before_id=before_id,
+    )
+
+@router.get("/flags", response_model=DockerEventFlags)
+@offload(DB)
+def read_event_flags(current_user: str = Depends(get_current_user)):
+    """
+    Containers with recent OOM kills, crash or restart loops, or failing health
+    checks, counted over the last DOCKER_EVENT_WINDOW seconds.
+    """
+    return docker_event_service.flags()
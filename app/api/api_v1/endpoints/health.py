@@ -1,11 +1,17 @@
 from fastapi import APIRouter
-from app.schemas.msg import Msg
+from app.schemas.msg import HealthStatus
+from app.services.docker_service import docker_service
 
 router = APIRouter()
 
-@router.get("/health", response_model=Msg)
+@router.get("/health", response_model=HealthStatus)
 def health_check():
     """
     Health check endpoint.
+    Reports "OK" when the Docker daemon answers a ping, "DEGRADED" otherwise.
     """
-    return {"msg": "OK"}
+    docker_health = docker_service.health()
+    return {
+        "msg": "OK" if docker_health["connected"] else "DEGRADED",
+        "docker": docker_health,
+    }
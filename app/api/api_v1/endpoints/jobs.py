@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, Dict, List, Optional
+import asyncio
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.sse import sse_event, SSE_HEADERS
+from app.models.job import JobStatus
+from app.schemas.job import Job, JobAccepted
+from app.services.job_service import job_service
+
+router = APIRouter()
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+def job_accepted(job: Dict[str, Any]) -> JSONResponse:
+    """202 response pointing the client at the job's status URL."""
+    status_url = f"{settings.API_V1_STR}/jobs/{job['id']}"
+    body = JobAccepted(job_id=job["id"], kind=job["kind"], status=job["status"], status_url=status_url)
+    return JSONResponse(status_code=202, content=body.model_dump(mode="json"), headers={"Location": status_url})
+
+
+@router.get("/", response_model=List[Job])
+def list_jobs(
+    kind: Optional[str] = None,
+    status: Optional[JobStatus] = None,
+    limit: int = 50,
+    current_user: str = Depends(get_current_user),
+):
+    """
+    List recent background jobs, newest first.
+    """
+    return job_service.list(kind=kind, status=status, limit=min(limit, 500))
+
+
+@router.get("/{job_id}", response_model=Job)
+def get_job(job_id: str, current_user: str = Depends(get_current_user)):
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, current_user: str = Depends(get_current_user)):
+    """
+    Stream job status and progress as Server-Sent Events until the job finishes.
+    """
+    job = await asyncio.to_thread(job_service.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        index = 0
+        while True:
+            events = job_service.events_since(job_id, index)
+            if events is None:
+                # Not tracked in memory (finished long ago, or evicted mid-stream): fall back to the persisted row
+                current = await asyncio.to_thread(job_service.get, job_id)
+                yield sse_event(Job(**current).model_dump(mode="json"), event="job")
+                if current["status"] in FINISHED:
+                    return
+                await asyncio.sleep(1.0)
+                continue
+            for event in events:
+                yield sse_event(event, event=event["type"], event_id=index)
+                index += 1
+                if event["type"] == "done":
+                    return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
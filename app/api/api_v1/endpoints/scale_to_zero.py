@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.api import deps
+from app.core.executors import offload, DB
+from app.models.scale_to_zero import ScaleToZeroTarget as ScaleToZeroTargetModel
+from app.schemas.scale_to_zero import ScaleToZeroStatus, ScaleToZeroTarget, ScaleToZeroTargetCreate
+from app.services.scale_to_zero_service import scale_to_zero_service
+
+router = APIRouter()
+
+
+def _check_port_free(db: Session, listen_port: int, target_id: int = None):
+    query = db.query(ScaleToZeroTargetModel).filter(ScaleToZeroTargetModel.listen_port == listen_port)
+    if target_id is not None:
+        query = query.filter(ScaleToZeroTargetModel.id != target_id)
+    if query.first():
+        raise HTTPException(status_code=409, detail=f"Port {listen_port} is already used by another target")
+
+@router.get("/", response_model=List[ScaleToZeroStatus])
+@offload(DB)
+def read_scale_to_zero_status(current_user: str = Depends(deps.get_current_user)):
+    """Sleep/wake state, idle measurements and cold-start latency per active target."""
+    return scale_to_zero_service.status()
+
+@router.get("/targets", response_model=List[ScaleToZeroTarget])
+@offload(DB)
+def read_scale_to_zero_targets(db: Session = Depends(deps.get_db), current_user: str = Depends(deps.get_current_user)):
+    return db.query(ScaleToZeroTargetModel).order_by(ScaleToZeroTargetModel.id).all()
+
+@router.post("/targets", response_model=ScaleToZeroTarget)
+@offload(DB)
+def create_scale_to_zero_target(
+    target_in: ScaleToZeroTargetCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Opt a container into scale-to-zero, e.g. {"container_id": "web",
+    "listen_port": 8080, "target_port": 80, "idle_seconds": 900}. Clients then
+    connect to listen_port on this host instead of the container; it is stopped
+    after idle_seconds without traffic and started by the next connection.
+    """
+    _check_port_free(db, target_in.listen_port)
+    target = ScaleToZeroTargetModel(**target_in.model_dump())
+    db.add(target)
+    db.commit()
+    db.refresh(target)
+    scale_to_zero_service.targets_changed()
+    return target
+
+@router.put("/targets/{target_id}", response_model=ScaleToZeroTarget)
+@offload(DB)
+def update_scale_to_zero_target(
+    target_id: int,
+    target_in: ScaleToZeroTargetCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    target = db.query(ScaleToZeroTargetModel).filter(ScaleToZeroTargetModel.id == target_id).first()
+    if not target:
+        raise HTTPException(status_code=404, detail="Scale-to-zero target not found")
+    _check_port_free(db, target_in.listen_port, target_id)
+    for field, value in target_in.model_dump().items():
+        setattr(target, field, value)
+    db.commit()
+    db.refresh(target)
+    scale_to_zero_service.targets_changed()
+    return target
+
+@router.delete("/targets/{target_id}")
+@offload(DB)
+def delete_scale_to_zero_target(target_id: int, db: Session = Depends(deps.get_db), current_user: str = Depends(deps.get_current_user)):
+    """Stop proxying; the container is left in whatever state it is in."""
+    target = db.query(ScaleToZeroTargetModel).filter(ScaleToZeroTargetModel.id == target_id).first()
+    if not target:
+        raise HTTPException(status_code=404, detail="Scale-to-zero target not found")
+    db.delete(target)
+    db.commit()
+    scale_to_zero_service.targets_changed()
+    return {"ok": True}
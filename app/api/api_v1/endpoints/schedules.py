@@ -1,61 +1,227 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 import json
 
 from app.api import deps
+from app.core.executors import executors, offload, DB
+from app.db.session import SessionLocal
 from app.models.schedule import ContainerSchedule
-from app.schemas.schedule import Schedule, ScheduleCreate
+from app.schemas.schedule import (
+    Schedule, ScheduleApplyItem, ScheduleBatch, ScheduleBatchResult, ScheduleCreate, ScheduleRun, ScheduleRunStats,
+    ScheduleUpdate, UpcomingSchedules,
+)
+from app.services.cluster_service import cluster_service
+from app.services.schedule_batch_service import schedule_batch_service, schedule_columns, ScheduleBatchError
+from app.services.schedule_run_service import schedule_run_service
+from app.services.schedule_timeline import schedule_timeline
 from app.services.scheduler_service import scheduler_service
 
 router = APIRouter()
 
+EXPORT_PAGE_SIZE = 500
+DEFAULT_PAGE_SIZE = 100
+SCHEDULE_SET = TypeAdapter(List[ScheduleApplyItem])
+
+
+def _page(db: Session, after_id: Optional[int], limit: Optional[int]) -> List[ContainerSchedule]:
+    query = db.query(ContainerSchedule).order_by(ContainerSchedule.id)
+    if after_id is not None:
+        query = query.filter(ContainerSchedule.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _export_page(after_id: Optional[int]) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return [
+            {"id": s.id, **Schedule.model_validate(s).model_dump(mode="json", exclude={"id"})}
+            for s in _page(db, after_id, EXPORT_PAGE_SIZE)
+        ]
+    finally:
+        db.close()
+
+
+async def schedule_set(request: Request) -> List[ScheduleApplyItem]:
+    """The request body as a list of schedules: JSON, or YAML when sent with a YAML content type."""
+    body = await request.body()
+    if "yaml" in request.headers.get("content-type", ""):
+        import yaml
+        try:
+            data = yaml.safe_load(body)
+        except yaml.YAMLError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid YAML: {e}")
+    else:
+        try:
+            data = json.loads(body or b"null")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    try:
+        return SCHEDULE_SET.validate_python(data)
+    except ValidationError as e:
+        # Every invalid item is reported, located like regular body validation errors
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
 @router.get("/", response_model=List[Schedule])
-def read_schedules(db: Session = Depends(deps.get_db), skip: int = 0, limit: int = 100, current_user: str = Depends(deps.get_current_user)):
-    schedules = db.query(ContainerSchedule).offset(skip).limit(limit).all()
-    return schedules
+@offload(DB)
+def read_schedules(
+    db: Session = Depends(deps.get_db),
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Schedules in id order: all of them, or a page when `after_id` or `limit` is
+    given (page on with `after_id` set to the last id returned).
+    """
+    if after_id is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    return _page(db, after_id, limit)
+
+@router.get("/export")
+async def export_schedules(
+    format: str = Query("json", pattern="^(json|yaml)$"),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Every schedule, streamed page by page as JSON or YAML. The output can be
+    edited and sent back to POST /schedules/apply as is.
+    """
+    if format == "yaml":
+        import yaml
+
+    async def pages():
+        after_id = None
+        while True:
+            page = await executors[DB].run(_export_page, after_id)
+            if not page:
+                return
+            yield page
+            after_id = page[-1]["id"]
+
+    async def stream():
+        empty = True
+        if format == "yaml":
+            async for page in pages():
+                empty = False
+                yield yaml.safe_dump(page, sort_keys=False, allow_unicode=True)
+            if empty:
+                yield "[]\n"
+            return
+        yield "["
+        async for page in pages():
+            yield ("\n" if empty else ",\n") + ",\n".join(json.dumps(schedule) for schedule in page)
+            empty = False
+        yield "\n]\n"
+
+    media_type = "application/yaml" if format == "yaml" else "application/json"
+    headers = {"Content-Disposition": f'attachment; filename="schedules.{format}"'}
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+@router.post("/apply", response_model=ScheduleBatchResult)
+@offload(DB)
+def apply_schedules(
+    items: List[ScheduleApplyItem] = Depends(schedule_set),
+    match: str = Query("id", pattern="^(id|name)$"),
+    prune: bool = True,
+    dry_run: bool = False,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Make the stored schedules exactly the given set (JSON, or YAML with
+    Content-Type: application/yaml; the /export format). Schedules are matched
+    by id, or by schedule_name with match=name; unmatched items are created
+    and schedules missing from the set are deleted unless prune=false. All
+    items are validated first and the changes are written in one transaction,
+    so an invalid set changes nothing. dry_run=true only reports the diff.
+    """
+    try:
+        return schedule_batch_service.apply(db, items, match=match, prune=prune, dry_run=dry_run)
+    except ScheduleBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/batch", response_model=ScheduleBatchResult)
+@offload(DB)
+def batch_schedules(
+    batch: ScheduleBatch,
+    dry_run: bool = False,
+    db: Session = Depends(deps.get_db),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """Create, update and delete many schedules in one transaction; all or nothing."""
+    try:
+        return schedule_batch_service.batch(db, batch, dry_run=dry_run)
+    except ScheduleBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/upcoming", response_model=UpcomingSchedules)
+@offload(DB)
+def upcoming_runs(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = 1000,
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Every fire time of every active schedule between `from` (default now) and `to`
+    (default a week later), including both halves of SLEEP schedules, plus
+    same-container conflicts. Naive times are in the server's timezone. `truncated`
+    is set when runs were left out: past `limit`, or of the schedules in
+    truncated_schedule_ids, which fire too often to list them all.
+    """
+    try:
+        return schedule_timeline.upcoming(start, end, limit=min(limit, 10000))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/", response_model=Schedule)
+@offload(DB)
 def create_schedule(
     schedule_in: ScheduleCreate,
     db: Session = Depends(deps.get_db),
     current_user: str = Depends(deps.get_current_user)
 ):
-    data = schedule_in.dict()
-    # Serialize container_ids list to JSON string
-    if 'container_ids' in data and isinstance(data['container_ids'], list):
-        data['container_ids'] = json.dumps(data['container_ids'])
-        
-    db_schedule = ContainerSchedule(**data)
+    db_schedule = ContainerSchedule(**schedule_columns(schedule_in))
     db.add(db_schedule)
     db.commit()
     db.refresh(db_schedule)
     
     # Add to scheduler
     scheduler_service.add_job_from_model(db_schedule)
+    cluster_service.schedules_changed()
     
     return db_schedule
 
 @router.put("/{schedule_id}", response_model=Schedule)
+@offload(DB)
 def update_schedule(
     schedule_id: int,
-    schedule_in: ScheduleCreate,
+    schedule_in: ScheduleUpdate,
     db: Session = Depends(deps.get_db),
     current_user: str = Depends(deps.get_current_user)
 ):
     """
-    Update a schedule (e.g., toggle active state).
+    Update a schedule (e.g., toggle active state). Only the fields sent change.
     """
     schedule = db.query(ContainerSchedule).filter(ContainerSchedule.id == schedule_id).first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
-    
-    # Update schedule fields
-    data = schedule_in.dict()
-    if 'container_ids' in data and isinstance(data['container_ids'], list):
-        data['container_ids'] = json.dumps(data['container_ids'])
 
-    for field, value in data.items():
+    current = Schedule.model_validate(schedule).model_dump(exclude={"id"})
+    try:
+        merged = ScheduleCreate.model_validate({**current, **schedule_in.model_dump(exclude_unset=True)})
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+    # Update schedule fields
+    for field, value in schedule_columns(merged).items():
         setattr(schedule, field, value)
     
     db.commit()
@@ -69,10 +235,12 @@ def update_schedule(
     else:
         # Remove job if deactivated
         scheduler_service.remove_job(schedule.id)
+    cluster_service.schedules_changed()
     
     return schedule
 
 @router.delete("/{schedule_id}")
+@offload(DB)
 def delete_schedule(schedule_id: int, db: Session = Depends(deps.get_db), current_user: str = Depends(deps.get_current_user)):
     schedule = db.query(ContainerSchedule).filter(ContainerSchedule.id == schedule_id).first()
     if not schedule:
@@ -83,4 +251,30 @@ def delete_schedule(schedule_id: int, db: Session = Depends(deps.get_db), curren
     
     db.delete(schedule)
     db.commit()
+    cluster_service.schedules_changed()
     return {"ok": True}
+
+@router.get("/{schedule_id}/runs", response_model=List[ScheduleRun])
+@offload(DB)
+def read_schedule_runs(
+    schedule_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before_id: Optional[int] = None,
+    current_user: str = Depends(deps.get_current_user),
+):
+    """
+    Execution history of a schedule, newest first: fire time, actual start and end,
+    and the outcome and latency of every container. Page with `before_id` set to
+    the last id returned. Runs of deleted schedules remain until retention drops them.
+    """
+    return schedule_run_service.list(schedule_id, limit=limit, before_id=before_id)
+
+@router.get("/{schedule_id}/runs/stats", response_model=ScheduleRunStats)
+@offload(DB)
+def read_schedule_run_stats(
+    schedule_id: int,
+    window: int = Query(500, ge=1, le=5000),
+    current_user: str = Depends(deps.get_current_user),
+):
+    """Scheduler lag, run duration and per-container latency percentiles over the last `window` runs."""
+    return schedule_run_service.stats(schedule_id, window=window)
@@ -1,9 +1,18 @@
 
 from fastapi import APIRouter, Depends
 from app.api.deps import get_current_user
+from app.core.admission import admission
+from app.core.executors import DB, DOCKER, executor_metrics, offload
+from app.core.startup import startup_timer
 from app.models.user import User
+from app.schemas.docker import DockerDiskUsage
+from app.services.cluster_service import cluster_service
+from app.services.disk_usage_service import disk_usage_service
+from app.services.docker_service import docker_service
+from app.services.host_metrics_service import host_metrics_service
 import psutil
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -51,6 +60,52 @@ class MemoryInfo(BaseModel):
     swap_percent: float
 
 
+class DiskIORate(BaseModel):
+    name: str
+    read_bytes_per_sec: float
+    write_bytes_per_sec: float
+    read_iops: float
+    write_iops: float
+    busy_percent: float | None
+
+
+class LoadAverage(BaseModel):
+    load1: float
+    load5: float
+    load15: float
+
+
+class PressureValues(BaseModel):
+    avg10: float  # % of time stalled over the last 10s / 60s / 300s
+    avg60: float
+    avg300: float
+    total: int  # Cumulative stall time in microseconds
+
+
+class PressureStall(BaseModel):
+    some: PressureValues  # At least one task stalled
+    full: PressureValues | None = None  # All non-idle tasks stalled (not reported for host CPU on older kernels)
+
+
+class PressureInfo(BaseModel):
+    cpu: PressureStall | None = None
+    memory: PressureStall | None = None
+    io: PressureStall | None = None
+
+
+class ContainerPressure(PressureInfo):
+    id: str
+    name: str
+
+
+class HostPressureStats(BaseModel):
+    sampled_at: datetime | None  # UTC; None until the background sampler's first run
+    load_average: LoadAverage | None
+    disk_io: List[DiskIORate]  # Rates since the previous sample; empty until the second one
+    pressure: PressureInfo | None  # None when the kernel has no PSI (/proc/pressure)
+    container_pressure: List[ContainerPressure]  # cgroup v2 only
+
+
 class SystemStats(BaseModel):
     cpu: CpuInfo
     memory: MemoryInfo
@@ -58,6 +113,21 @@ class SystemStats(BaseModel):
     network: List[NetworkInterface]
     uptime: float
     boot_time: float
+    io: HostPressureStats
+
+
+def _cpu_info() -> CpuInfo:
+    # Usage comes from the background sampler, so the event loop never sleeps on a measurement window
+    cpu_percent, per_cpu_percent = host_metrics_service.cpu_usage()
+    cpu_freq = psutil.cpu_freq()
+    return CpuInfo(
+        percent=cpu_percent,
+        count=psutil.cpu_count(logical=False) or 1,
+        count_logical=psutil.cpu_count(logical=True) or 1,
+        freq_current=cpu_freq.current if cpu_freq else None,
+        freq_max=cpu_freq.max if cpu_freq else None,
+        per_cpu_percent=per_cpu_percent,
+    )
 
 
 @router.get("/stats", response_model=SystemStats)
@@ -71,16 +141,7 @@ async def get_system_stats(
     import time
     
     # CPU Information
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    cpu_freq = psutil.cpu_freq()
-    cpu_info = CpuInfo(
-        percent=cpu_percent,
-        count=psutil.cpu_count(logical=False) or 1,
-        count_logical=psutil.cpu_count(logical=True) or 1,
-        freq_current=cpu_freq.current if cpu_freq else None,
-        freq_max=cpu_freq.max if cpu_freq else None,
-        per_cpu_percent=psutil.cpu_percent(interval=0.1, percpu=True),
-    )
+    cpu_info = _cpu_info()
     
     # Memory Information
     mem = psutil.virtual_memory()
@@ -141,24 +202,27 @@ async def get_system_stats(
         network=network,
         uptime=uptime,
         boot_time=boot_time,
+        io=HostPressureStats(**host_metrics_service.snapshot()),
     )
 
 
+@router.get("/stats/io", response_model=HostPressureStats)
+async def get_io_stats(
+    current_user: User = Depends(get_current_user),
+) -> HostPressureStats:
+    """
+    Disk I/O rates, load averages and pressure stall information (host and per
+    container), from the background sampler's latest snapshot.
+    """
+    return HostPressureStats(**host_metrics_service.snapshot())
+
+
 @router.get("/stats/cpu")
 async def get_cpu_stats(
     current_user: User = Depends(get_current_user),
 ) -> CpuInfo:
     """Get CPU usage statistics."""
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    cpu_freq = psutil.cpu_freq()
-    return CpuInfo(
-        percent=cpu_percent,
-        count=psutil.cpu_count(logical=False) or 1,
-        count_logical=psutil.cpu_count(logical=True) or 1,
-        freq_current=cpu_freq.current if cpu_freq else None,
-        freq_max=cpu_freq.max if cpu_freq else None,
-        per_cpu_percent=psutil.cpu_percent(interval=0.1, percpu=True),
-    )
+    return _cpu_info()
 
 
 @router.get("/stats/memory")
@@ -223,3 +287,157 @@ async def get_network_stats(
             dropout=stats.dropout,
         ))
     return network
+
+
+@router.get("/docker-df", response_model=DockerDiskUsage)
+@offload(DOCKER)
+def get_docker_disk_usage(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Docker disk usage (images, container writable layers, volumes, build cache)
+    with reclaimable bytes per category. Served from a cached `docker system df`
+    that is refreshed in the background once it is older than DOCKER_DF_TTL.
+    """
+    return disk_usage_service.get()
+
+
+class ExecutorPool(BaseModel):
+    name: str
+    threads: int
+    max_queue: int
+    active: int
+    queued: int
+    completed: Optional[int] = None
+    failed: Optional[int] = None
+    rejected: Optional[int] = None
+    wait_ms_p50: Optional[float] = None
+    wait_ms_p95: Optional[float] = None
+    wait_ms_max: Optional[float] = None
+    run_ms_p50: Optional[float] = None
+    run_ms_p95: Optional[float] = None
+
+
+@router.get("/executors", response_model=List[ExecutorPool])
+async def get_executor_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Endpoint thread pools: size, active and queued calls, calls shed with 503,
+    and wait/run time percentiles over the most recent calls. The "default"
+    entry is AnyIO's shared pool, which only reports its current occupancy.
+    """
+    return executor_metrics()
+
+
+class AdmissionTicket(BaseModel):
+    id: int
+    action: str  # start / restart
+    container_id: str
+    thread: str  # Caller, e.g. a request pool thread or "asyncio_0" for the scheduler
+    queued_at: float
+    waited_ms: float
+    waiting_for: Optional[str] = None  # queue, concurrency, or the load threshold reached
+    state: Optional[str] = None  # Active only: starting, or settling (booting after the call returned)
+
+
+class AdmissionStats(BaseModel):
+    enabled: bool
+    max_concurrent: int
+    max_queue: int
+    settle_seconds: float
+    thresholds: Dict[str, float]
+    load: Dict[str, Optional[float]]  # None: not available (no PSI, or first CPU sample)
+    admitted: int
+    paced: int  # Had to wait for a free slot or for load to drop
+    rejected: int  # Refused with 503 because the queue was full
+    wait_ms: Dict[str, float]
+    active: List[AdmissionTicket]
+    queued: List[AdmissionTicket]
+
+
+@router.get("/admission", response_model=AdmissionStats)
+async def get_admission_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Container starts and restarts in flight and queued behind the admission
+    controller, the host load it paces them by, and admission wait percentiles.
+    Per worker process.
+    """
+    return admission.metrics()
+
+
+class CoalescingStats(BaseModel):
+    method: str
+    calls: int
+    executed: int  # Calls that actually reached the daemon
+    coalesced: int  # Joined an identical call already in flight
+    cache_hits: int  # Served from the micro-TTL cache
+    saved_percent: float
+
+
+@router.get("/coalescing", response_model=List[CoalescingStats])
+async def get_coalescing_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Per Docker method: how many calls were shared with an in-flight identical call
+    or served from the short-lived result cache instead of hitting the daemon.
+    Counters are per worker process, since startup.
+    """
+    return [
+        {
+            "method": method,
+            **counters,
+            "saved_percent": round((counters["calls"] - counters["executed"]) / counters["calls"] * 100, 1) if counters["calls"] else 0.0,
+        }
+        for method, counters in sorted(docker_service.singleflight.metrics().items())
+    ]
+
+
+class WorkerInfo(BaseModel):
+    worker_id: str
+    leader: bool  # Holds the scheduler lease and fires scheduled actions
+    current: bool  # The worker that served this request
+    expires_at: datetime
+
+
+@router.get("/workers", response_model=List[WorkerInfo])
+@offload(DB)
+def get_workers(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Live API worker processes (those whose heartbeat lease hasn't expired)
+    and which of them currently runs the scheduler.
+    """
+    return cluster_service.live_workers()
+
+
+class StartupPhase(BaseModel):
+    name: str
+    background: bool  # Ran after the app began serving
+    started_offset_ms: float  # Since the app package started importing
+    duration_ms: float
+    error: Optional[str] = None
+
+
+class StartupReport(BaseModel):
+    process_started_at: datetime
+    before_import_ms: float  # Interpreter and server startup (approximate)
+    ready_ms: Optional[float]  # App import start until the app accepted requests
+    warmup_done_ms: Optional[float]
+    phases: List[StartupPhase]
+
+
+@router.get("/startup", response_model=StartupReport)
+async def get_startup_report(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Where this worker's startup time went: module imports, database setup,
+    job recovery and scheduler loading before serving, then the background
+    Docker connection and cache warmup.
+    """
+    return startup_timer.report()
@@ -0,0 +1,288 @@
+"""
+Admission control for container starts and restarts.
+
+Starting many containers at once (a SLEEP wake-up, a stack start) makes a boot
+storm: every new process initialises at the same time and the neighbours on the
+host suffer. Calls wrapped with `@admitted(...)` queue here first (FIFO) and are
+let through only while fewer than ADMISSION_MAX_CONCURRENT starts are in flight.
+A start counts as in flight from its call until ADMISSION_SETTLE_SECONDS after
+it returns, since that is when the container is booting.
+
+While another start is still in flight, further ones also wait for host CPU,
+memory and CPU/IO pressure (PSI) to drop below their thresholds. With nothing in
+flight the head of the queue is always admitted, so starts slow down to one at
+a time under load but never stall. Once ADMISSION_MAX_QUEUE calls are waiting,
+new ones are rejected with 503.
+"""
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+import asyncio
+import functools
+import itertools
+import logging
+import threading
+import time
+
+import psutil
+
+from app.core.config import settings
+from app.core.percentiles import percentiles
+
+logger = logging.getLogger(__name__)
+
+PROC_PRESSURE_DIR = Path("/proc/pressure")
+# Recent admission waits kept for percentiles
+WAIT_WINDOW = 1000
+# How often a waiter on the event loop re-checks its turn (threads are woken by notify instead)
+ASYNC_POLL_INTERVAL = 0.05
+
+# Container an enclosing admit_async() already holds a slot for
+_held: ContextVar[Optional[str]] = ContextVar("admission_held", default=None)
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when the admission queue is full; mapped to HTTP 503."""
+
+    def __init__(self, queued: int, retry_after: int = 5):
+        super().__init__(f"Too many container starts queued ({queued}); try again later")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+def _pressure_avg10(resource: str) -> Optional[float]:
+    """The "some avg10" PSI value of a resource, or None without PSI."""
+    try:
+        line = (PROC_PRESSURE_DIR / resource).read_text().splitlines()[0]
+    except (OSError, IndexError):
+        return None
+    for field in line.split()[1:]:
+        key, _, value = field.partition("=")
+        if key == "avg10":
+            return float(value)
+    return None
+
+
+class AdmissionController:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._counters = {"admitted": 0, "paced": 0, "rejected": 0}
+        self._waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        self._load: Dict[str, Optional[float]] = {}
+        self._load_at = 0.0
+        self._cpu_times = None
+
+    @contextmanager
+    def admit(self, action: str, container_id: str) -> Iterator[None]:
+        if not settings.ADMISSION_ENABLED or _held.get() == container_id:
+            yield
+            return
+        ticket = self._enqueue(action, container_id)
+        with self._cond:
+            try:
+                while not self._try_admit(ticket):
+                    self._cond.wait(settings.ADMISSION_POLL_INTERVAL)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+        try:
+            yield
+        finally:
+            self._settle(ticket)
+
+    @asynccontextmanager
+    async def admit_async(self, action: str, container_id: str) -> AsyncIterator[None]:
+        """
+        admit() for the event loop: waits without holding a thread. Admitted
+        calls of the same container made inside (e.g. on an executor thread)
+        don't queue a second time.
+        """
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        ticket = self._enqueue(action, container_id)
+        try:
+            while True:
+                with self._cond:
+                    if self._try_admit(ticket):
+                        break
+                await asyncio.sleep(ASYNC_POLL_INTERVAL)
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+        token = _held.set(container_id)
+        try:
+            yield
+        finally:
+            _held.reset(token)
+            self._settle(ticket)
+
+    def _enqueue(self, action: str, container_id: str) -> Dict[str, Any]:
+        ticket = {
+            "id": next(self._ids),
+            "action": action,
+            "container_id": container_id[:12],
+            "thread": threading.current_thread().name,
+            "queued_at": time.time(),
+            "waiting_for": None,
+        }
+        with self._cond:
+            if len(self._queue) >= settings.ADMISSION_MAX_QUEUE:
+                self._counters["rejected"] += 1
+                raise AdmissionRejectedError(len(self._queue))
+            self._queue.append(ticket)
+        return ticket
+
+    def _dequeue(self, ticket: Dict[str, Any]):
+        """Drop a ticket that gave up waiting (lock held)."""
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            self._cond.notify_all()
+
+    def _try_admit(self, ticket: Dict[str, Any]) -> bool:
+        """Admit `ticket` if it may go now (lock held); otherwise note why it waits."""
+        reason = self._blocked(ticket)
+        if reason is not None:
+            if ticket["waiting_for"] is None and reason != "queue":
+                self._counters["paced"] += 1
+            ticket["waiting_for"] = reason
+            return False
+        self._queue.remove(ticket)
+        self._cond.notify_all()
+        waited = time.time() - ticket["queued_at"]
+        self._waits.append(waited)
+        self._counters["admitted"] += 1
+        ticket.update(admitted_at=time.time(), waited_ms=round(waited * 1000, 1), waiting_for=None, settle_until=None)
+        self._active[ticket["id"]] = ticket
+        if waited >= 1:
+            logger.info(f"Admitted {ticket['action']} of {ticket['container_id']} after {waited:.1f}s")
+        return True
+
+    def _settle(self, ticket: Dict[str, Any]):
+        with self._cond:
+            # Still counts while the container boots
+            ticket["settle_until"] = time.time() + settings.ADMISSION_SETTLE_SECONDS
+            self._cond.notify_all()
+
+    def _blocked(self, ticket: Dict[str, Any]) -> Optional[str]:
+        """Why `ticket` can't go yet (lock held), or None."""
+        if self._queue[0] is not ticket:
+            return "queue"
+        now = time.time()
+        for ticket_id in [i for i, t in self._active.items() if t["settle_until"] is not None and t["settle_until"] <= now]:
+            del self._active[ticket_id]
+        if len(self._active) >= settings.ADMISSION_MAX_CONCURRENT:
+            return "concurrency"
+        if self._active:
+            return self._overload()
+        return None
+
+    def _overload(self) -> Optional[str]:
+        load = self.load()
+        checks = (
+            ("cpu_percent", settings.ADMISSION_CPU_PERCENT),
+            ("memory_percent", settings.ADMISSION_MEMORY_PERCENT),
+            ("cpu_pressure", settings.ADMISSION_CPU_PRESSURE),
+            ("io_pressure", settings.ADMISSION_IO_PRESSURE),
+        )
+        for name, limit in checks:
+            value = load.get(name)
+            if value is not None and value >= limit:
+                return f"{name} {value:.1f} >= {limit:g}"
+        return None
+
+    def load(self) -> Dict[str, Optional[float]]:
+        """Host load, measured at most once per ADMISSION_POLL_INTERVAL."""
+        now = time.monotonic()
+        if now - self._load_at >= settings.ADMISSION_POLL_INTERVAL or not self._load:
+            self._load = {
+                "cpu_percent": self._cpu_percent(),
+                "memory_percent": psutil.virtual_memory().percent,
+                "cpu_pressure": _pressure_avg10("cpu"),
+                "io_pressure": _pressure_avg10("io"),
+            }
+            self._load_at = now
+        return self._load
+
+    def _cpu_percent(self) -> Optional[float]:
+        # From our own cpu_times deltas: psutil.cpu_percent(interval=None) shares one baseline with every other caller
+        current = psutil.cpu_times()
+        previous, self._cpu_times = self._cpu_times, current
+        if previous is None:
+            return None
+        total = sum(current) - sum(previous)
+        if total <= 0:
+            return None
+        idle = (current.idle + getattr(current, "iowait", 0.0)) - (previous.idle + getattr(previous, "iowait", 0.0))
+        return round(max(0.0, 1 - idle / total) * 100, 1)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.time()
+            waits = list(self._waits)
+            queued = [dict(t, waited_ms=round((now - t["queued_at"]) * 1000, 1)) for t in self._queue]
+            active = [
+                dict(t, state="starting" if t["settle_until"] is None else "settling")
+                for t in self._active.values()
+                if t["settle_until"] is None or t["settle_until"] > now
+            ]
+            counters = dict(self._counters)
+
+        return {
+            "enabled": settings.ADMISSION_ENABLED,
+            "max_concurrent": settings.ADMISSION_MAX_CONCURRENT,
+            "max_queue": settings.ADMISSION_MAX_QUEUE,
+            "settle_seconds": settings.ADMISSION_SETTLE_SECONDS,
+            "thresholds": {
+                "cpu_percent": settings.ADMISSION_CPU_PERCENT,
+                "memory_percent": settings.ADMISSION_MEMORY_PERCENT,
+                "cpu_pressure": settings.ADMISSION_CPU_PRESSURE,
+                "io_pressure": settings.ADMISSION_IO_PRESSURE,
+            },
+            "load": self.load(),
+            **counters,
+            "wait_ms": percentiles(waits, scale=1000, ndigits=1) or dict.fromkeys(("p50", "p95", "p99", "max"), 0.0),
+            "active": active,
+            "queued": queued,
+        }
+
+
+admission = AdmissionController()
+
+
+def admitted(action: str):
+    """Run a DockerService method taking a container ID through the admission controller."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, container_id: str, *args, **kwargs):
+            with admission.admit(action, container_id):
+                return func(self, container_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def admitted_request(action: str, in_background: Optional[Callable[..., bool]] = None):
+    """
+    For endpoints acting on the `container_id` path parameter, placed above
+    @offload: the request waits for admission on the event loop, so queued
+    starts don't occupy executor threads that other Docker calls need.
+    Background requests are passed straight through (their job is admitted);
+    `in_background(**kwargs)` decides which requests those are, by default the
+    ones with a true `background` parameter.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            background = in_background(**kwargs) if in_background else kwargs.get("background")
+            if background:
+                return await func(*args, **kwargs)
+            async with admission.admit_async(action, kwargs["container_id"]):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings
 
@@ -17,6 +17,111 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Docker daemon connection
+    DOCKER_TIMEOUT: int = 30  # Default timeout (seconds) for Docker API calls
+    DOCKER_PING_TIMEOUT: int = 3  # Timeout for health probes
+    DOCKER_STOP_TIMEOUT: int = 10  # Grace period before SIGKILL on stop/restart
+    DOCKER_RECONNECT_MIN_BACKOFF: float = 1.0
+    DOCKER_RECONNECT_MAX_BACKOFF: float = 60.0
+    DOCKER_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Consecutive failures before the circuit opens
+    DOCKER_CIRCUIT_RESET_TIMEOUT: float = 30.0  # Seconds before a half-open trial call
+
+    # Image pulls
+    IMAGE_PULL_TIMEOUT: int = 900  # Max seconds container creation waits on a pull
+    IMAGE_PULL_HISTORY: int = 50  # Finished pull jobs kept in memory
+    IMAGE_PULL_TTL: int = 3600  # Seconds a finished pull stays queryable
+    IMAGE_PULL_EVENT_HISTORY: int = 500  # Latest progress events kept per pull for SSE replay
+
+    # `docker system df` is expensive; serve a cached copy refreshed in the background
+    DOCKER_DF_TTL: int = 60
+
+    # Concurrent identical read calls to the daemon (list containers/images, stats) share one
+    # request, and the result is reused for a few hundred ms; any mutating call invalidates it
+    DOCKER_COALESCING_ENABLED: bool = True
+    DOCKER_COALESCE_TTL_MS: Dict[str, int] = {}  # Per-method overrides, e.g. {"list_containers": 1000}; 0 = share in-flight calls only
+
+    # Background jobs
+    JOB_WORKERS: int = 4
+    JOB_RETENTION_DAYS: int = 7
+    ROLLOUT_SYNC_MAX_SECONDS: int = 60  # Longer worst-case rollouts run as jobs instead of holding a request thread
+
+    # Tracing / profiling (opt-in)
+    TRACING_ENABLED: bool = False  # Record spans for requests, Docker calls, DB queries and scheduler jobs
+    TRACING_SERVICE_NAME: str = "frame-dock"
+    TRACING_OTLP_FILE: Optional[str] = None  # Append OTLP/JSON batches to this file
+    TRACING_OTLP_ENDPOINT: Optional[str] = None  # OTLP/HTTP collector, e.g. http://localhost:4318/v1/traces
+    PROFILING_ENABLED: bool = False  # Allow ?profile=1 on any API request (authenticated users only)
+    PROFILING_INTERVAL_MS: float = 1.0
+
+    # Endpoint thread pools; a call is rejected with 503 once MAX_QUEUE calls are waiting (0 = never)
+    THREADPOOL_DEFAULT_SIZE: int = 40  # AnyIO's shared pool: dependencies and undecorated sync endpoints
+    EXECUTOR_DOCKER_THREADS: int = 16  # Plus JOB_WORKERS sizes the Docker SDK connection pool
+    EXECUTOR_DOCKER_MAX_QUEUE: int = 64
+    EXECUTOR_AUTH_THREADS: int = 4  # bcrypt is CPU bound; more threads than cores doesn't help
+    EXECUTOR_AUTH_MAX_QUEUE: int = 32
+    EXECUTOR_DB_THREADS: int = 8
+    EXECUTOR_DB_MAX_QUEUE: int = 128
+
+    # Schedule preview (GET /schedules/upcoming)
+    SCHEDULE_PREVIEW_DEFAULT_HOURS: int = 24 * 7  # Default window, and how far ahead fire times are precomputed
+    SCHEDULE_PREVIEW_MAX_DAYS: int = 92
+    SCHEDULE_PREVIEW_MAX_FIRES: int = 10000  # Per job per extension, so a per-minute schedule can't blow up the index
+
+    # Multiple uvicorn workers: one holds the scheduler lease; a crashed leader is replaced after the TTL
+    WORKER_LEASE_TTL: int = 15
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Schedule run history (GET /schedules/{id}/runs); rows are written in batches
+    SCHEDULE_RUN_FLUSH_INTERVAL: float = 2.0
+    SCHEDULE_RUN_BATCH_SIZE: int = 200
+    SCHEDULE_RUN_RETENTION_DAYS: int = 30
+
+    # Host cgroup filesystem; memory stats are read from it directly when the container cgroups are visible
+    # (mount the host's /sys/fs/cgroup when running in Docker), otherwise from the stats API
+    CGROUP_ROOT: str = "/sys/fs/cgroup"
+
+    # Admission control for container starts/restarts (see app/core/admission.py)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 4  # Starts in flight, including the settle time
+    ADMISSION_SETTLE_SECONDS: float = 5.0  # A start keeps its slot this long after returning, while the container boots
+    ADMISSION_MAX_QUEUE: int = 200  # Further starts get 503
+    ADMISSION_POLL_INTERVAL: float = 0.5
+    # Further starts wait while any of these is reached (and another start is in flight)
+    ADMISSION_CPU_PERCENT: float = 90.0
+    ADMISSION_MEMORY_PERCENT: float = 95.0
+    ADMISSION_CPU_PRESSURE: float = 50.0  # PSI "some avg10", %
+    ADMISSION_IO_PRESSURE: float = 30.0  # PSI "some avg10", %
+
+    # Scale-to-zero: idle opted-in containers are stopped and woken by their proxy port (scheduler leader only)
+    SCALE_TO_ZERO_ENABLED: bool = False
+    SCALE_TO_ZERO_BIND_HOST: str = "127.0.0.1"  # Where the proxy ports listen; widen deliberately
+    SCALE_TO_ZERO_CHECK_INTERVAL: int = 30  # Seconds between idle checks
+    SCALE_TO_ZERO_CPU_PERCENT: float = 2.0  # Below this (100 = one core) ...
+    SCALE_TO_ZERO_NETWORK_BYTES: float = 1024.0  # ... and below this many bytes/s in+out counts as idle
+
+    # Host disk I/O rates, load and pressure stall info for /system/stats are sampled this often (seconds)
+    HOST_METRICS_INTERVAL: float = 5.0
+
+    # Container stats history (sampled by the scheduler leader) and resource recommendations
+    STATS_SAMPLE_INTERVAL: int = 60  # Seconds; 0 disables sampling
+    STATS_SAMPLE_CONCURRENCY: int = 8  # Each stats call takes ~1s on the daemon
+    STATS_RETENTION_DAYS: int = 14
+    RECOMMENDATION_WINDOW_HOURS: int = 24 * 7
+    RECOMMENDATION_MIN_SAMPLES: int = 60
+    RECOMMENDATION_CPU_HEADROOM: float = 1.3  # Multiplier on p99 CPU
+    RECOMMENDATION_MEMORY_HEADROOM: float = 1.25  # Multiplier on peak memory
+
+    # Alert notifications for rules without their own sinks (rules are evaluated on every stats sample)
+    ALERT_WEBHOOK_URL: Optional[str] = None
+    ALERT_FILE_PATH: Optional[str] = None  # JSON lines
+
+    # Docker event timeline (consumed by the scheduler leader) and OOM / crash-loop detection
+    DOCKER_EVENTS_ENABLED: bool = True
+    DOCKER_EVENT_BATCH_SIZE: int = 500
+    DOCKER_EVENT_RETENTION_DAYS: int = 7
+    DOCKER_EVENT_WINDOW: int = 3600  # Seconds the per-container counters look back
+    DOCKER_EVENT_LOOP_THRESHOLD: int = 5  # Crashes/restarts/unhealthy transitions in the window to flag a loop
+
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
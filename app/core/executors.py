@@ -0,0 +1,156 @@
+"""
+Bounded thread pools for blocking endpoint work.
+
+By default every sync endpoint shares AnyIO's single threadpool, so a burst of
+slow Docker calls can hold all of its tokens and starve cheap endpoints like
+/health. Endpoints decorated with `@offload("<pool>")` run on a named pool with
+its own thread limit instead, and are rejected with 503 once that pool's queue
+of waiting calls reaches its configured maximum.
+"""
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import functools
+import logging
+import threading
+import time
+
+import anyio
+import anyio.to_thread
+
+from app.core.config import settings
+from app.core.percentiles import percentile
+from app.core.tracing import profiled_thread
+
+logger = logging.getLogger(__name__)
+
+DOCKER = "docker"  # Docker Engine API calls
+AUTH = "auth"  # bcrypt hashing / verification (CPU heavy)
+DB = "db"  # SQLite-only endpoints
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a pool's wait queue is full; mapped to HTTP 503."""
+
+    def __init__(self, pool: str, queued: int, retry_after: int = 1):
+        super().__init__(f"Server busy: the {pool} pool has {queued} calls waiting")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    A named pool of at most `threads` worker threads with a bounded wait queue.
+    Keeps counters plus a window of recent wait/run times for the metrics endpoint.
+    """
+
+    def __init__(self, name: str, threads: int, max_queue: int, window: int = 512):
+        self.name = name
+        self.threads = threads
+        self.max_queue = max_queue  # 0 disables load shedding
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._runs: Deque[float] = deque(maxlen=window)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        # Created lazily so it binds to the running event loop
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.threads)
+        return self._limiter
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        stats = self.limiter.statistics()
+        if self.max_queue and stats.borrowed_tokens >= self.threads and stats.tasks_waiting >= self.max_queue:
+            with self._lock:
+                self.rejected += 1
+            logger.warning(f"Shedding load on {self.name} pool: {stats.tasks_waiting} calls waiting")
+            raise ExecutorSaturatedError(self.name, stats.tasks_waiting)
+
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            try:
+                with profiled_thread():
+                    return func(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    wait = started - submitted
+                    self._waits.append(wait)
+                    self._runs.append(finished - started)
+                    self.max_wait = max(self.max_wait, wait)
+                    self.completed += 1
+
+        return await anyio.to_thread.run_sync(call, limiter=self.limiter)
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = self.limiter.statistics() if self._limiter is not None else None
+        with self._lock:
+            waits, runs = sorted(self._waits), sorted(self._runs)
+            completed, failed, rejected, max_wait = self.completed, self.failed, self.rejected, self.max_wait
+        ms = lambda v: round(v * 1000, 3)  # noqa: E731
+        return {
+            "name": self.name,
+            "threads": self.threads,
+            "max_queue": self.max_queue,
+            "active": stats.borrowed_tokens if stats else 0,
+            "queued": stats.tasks_waiting if stats else 0,
+            "completed": completed,
+            "failed": failed,
+            "rejected": rejected,
+            "wait_ms_p50": ms(percentile(waits, 0.50) or 0.0),
+            "wait_ms_p95": ms(percentile(waits, 0.95) or 0.0),
+            "wait_ms_max": ms(max_wait),
+            "run_ms_p50": ms(percentile(runs, 0.50) or 0.0),
+            "run_ms_p95": ms(percentile(runs, 0.95) or 0.0),
+        }
+
+
+executors: Dict[str, BoundedExecutor] = {
+    DOCKER: BoundedExecutor(DOCKER, settings.EXECUTOR_DOCKER_THREADS, settings.EXECUTOR_DOCKER_MAX_QUEUE),
+    AUTH: BoundedExecutor(AUTH, settings.EXECUTOR_AUTH_THREADS, settings.EXECUTOR_AUTH_MAX_QUEUE),
+    DB: BoundedExecutor(DB, settings.EXECUTOR_DB_THREADS, settings.EXECUTOR_DB_MAX_QUEUE),
+}
+
+
+def offload(pool: str):
+    """
+    Run a sync endpoint on the named pool instead of AnyIO's shared threadpool.
+    FastAPI resolves the endpoint's parameters from the wrapped function's signature.
+    """
+    executor = executors[pool]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await executor.run(func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_default_threadpool():
+    """Apply THREADPOOL_DEFAULT_SIZE to AnyIO's shared pool (dependencies and undecorated sync endpoints)."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_DEFAULT_SIZE
+
+
+def executor_metrics() -> List[Dict[str, Any]]:
+    pools = [executor.metrics() for executor in executors.values()]
+    default = anyio.to_thread.current_default_thread_limiter().statistics()
+    pools.append({
+        "name": "default",
+        "threads": int(default.total_tokens),
+        "max_queue": 0,
+        "active": default.borrowed_tokens,
+        "queued": default.tasks_waiting,
+    })
+    return pools
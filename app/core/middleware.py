@@ -1,7 +1,11 @@
 import time
 import logging
 from fastapi import Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.auth import verify_token
+from app.core.config import settings
+from app.core.tracing import KIND_SERVER, SamplingProfiler, collect_request_spans, span, span_tree
 
 logger = logging.getLogger("app.middleware")
 
@@ -23,3 +27,52 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         )
         
         return response
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """
+    Records a server span per request when tracing is enabled.
+    With PROFILING_ENABLED, an authenticated request carrying ?profile=1 gets a
+    profile of itself instead of its normal body: the span tree (Docker calls,
+    DB queries) and a sampling profile of the request's own tasks and threads.
+    Streaming (SSE) responses are passed through unprofiled, and with profiling
+    disabled the parameter is ignored.
+    """
+    async def dispatch(self, request: Request, call_next):
+        if settings.PROFILING_ENABLED and request.query_params.get("profile") == "1":
+            return await self._profile(request, call_next)
+        if not settings.TRACING_ENABLED:
+            return await call_next(request)
+
+        with span(f"{request.method} {request.url.path}", kind=KIND_SERVER, **{"http.method": request.method}) as server_span:
+            response = await call_next(request)
+            server_span.attributes["http.status_code"] = response.status_code
+        return response
+
+    async def _profile(self, request: Request, call_next):
+        auth = request.headers.get("Authorization", "")
+        if not auth.startswith("Bearer ") or verify_token(auth[len("Bearer "):]) is None:
+            return JSONResponse(status_code=403, content={"detail": "Profiling requires an authenticated user"})
+
+        with collect_request_spans() as spans:
+            with SamplingProfiler(interval=settings.PROFILING_INTERVAL_MS / 1000) as profiler:
+                with span(f"{request.method} {request.url.path}", kind=KIND_SERVER) as server_span:
+                    response = await call_next(request)
+                    if response.headers.get("content-type", "").startswith("text/event-stream"):
+                        # An event stream never ends; draining it would hang the request
+                        return response
+                    # Drain the body inside the profile so streamed work is included
+                    body_size = 0
+                    async for chunk in response.body_iterator:
+                        body_size += len(chunk)
+                    server_span.attributes["http.status_code"] = response.status_code
+
+        logger.info(f"PROFILE: {request.method} {request.url.path} - {profiler.elapsed * 1000:.1f}ms")
+        return JSONResponse({
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "response_bytes": body_size,
+            "spans": span_tree(spans),
+            "profile": profiler.report(),
+        })
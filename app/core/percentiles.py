@@ -0,0 +1,29 @@
+"""
+Nearest-rank percentiles for the latency and usage summaries reported by the
+metrics endpoints (executor pools, admission, schedule runs, stats history,
+scale-to-zero cold starts).
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+
+def percentile(ordered: Sequence[float], q: float) -> Optional[float]:
+    """Value at quantile `q` (0-1) of an already sorted sequence; None if it is empty."""
+    if not ordered:
+        return None
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def percentiles(values: Iterable[float], scale: float = 1.0, ndigits: Optional[int] = None) -> Optional[Dict[str, float]]:
+    """
+    p50/p95/p99/max of `values`, each multiplied by `scale` (e.g. 1000 for seconds
+    to ms) and rounded to `ndigits` if given. None if there are no values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+
+    def pick(q: float) -> float:
+        value = percentile(ordered, q) * scale
+        return round(value, ndigits) if ndigits is not None else value
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": pick(1.0)}
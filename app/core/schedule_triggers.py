@@ -0,0 +1,138 @@
+"""
+Parsing of schedule time expressions into APScheduler triggers.
+
+Used by both the schedule schemas (validation) and the scheduler service
+(building jobs), so anything the API accepts is exactly what gets scheduled.
+
+Expression formats per schedule type:
+    daily    "14:30"
+    weekly   "mon 14:30"
+    monthly  "1 14:30"               (day of month)
+    custom   "2023-10-27 14:30:00"   (one-time)
+    cron     "*/15 2-4 * * mon-fri"  (5-field crontab)
+
+Cron expressions are read the way crontab reads them, which differs from
+APScheduler's CronTrigger in two ways:
+  - weekdays count from Sunday (0 and 7 = sun, 6 = sat) while APScheduler 3.x
+    counts from Monday, so the day-of-week field is rewritten to day names first;
+  - when both day of month and day of week are restricted (neither starts with
+    "*"), a day matching either one fires, so "0 0 1 * mon" runs on the 1st and
+    on every Monday. A single CronTrigger requires both, so that case becomes an
+    OrTrigger of a day-of-month and a day-of-week trigger.
+"""
+from datetime import datetime, tzinfo
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.combining import OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from tzlocal import get_localzone
+
+from app.models.schedule import ScheduleType
+
+
+def parse_timezone(name: Optional[str]) -> tzinfo:
+    """IANA timezone name (e.g. "Europe/Berlin"); None means the server's local timezone."""
+    if not name:
+        return get_localzone()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'")
+
+
+# Crontab numbering: index = weekday number (7 is Sunday again)
+CRON_WEEKDAYS = ("sun", "mon", "tue", "wed", "thu", "fri", "sat")
+
+
+def _cron_weekday(value: str) -> int:
+    value = value.lower()
+    if value in CRON_WEEKDAYS:
+        return CRON_WEEKDAYS.index(value)
+    number = int(value)
+    if not 0 <= number <= 7:
+        raise ValueError
+    return number
+
+
+def crontab_day_of_week(field: str) -> str:
+    """
+    Rewrite a crontab day-of-week field ("1-5", "0,6", "*/2", "fri-7") as a list of
+    day names, which APScheduler reads the same way crontab does. As in crontab,
+    ranges don't wrap around the week: "sat-sun" is rejected, write "6-7" or "0,6".
+    """
+    if field == "*":
+        return field
+    days = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError
+        if spec == "*":
+            first, last = 0, 6
+        elif "-" in spec:
+            first, last = (_cron_weekday(v) for v in spec.split("-", 1))
+            if last < first:
+                raise ValueError
+        else:
+            first = _cron_weekday(spec)
+            # "n/step" runs from n to the end of the week
+            last = 7 if "/" in part else first
+        days.update(day % 7 for day in range(first, last + 1, step))
+    return ",".join(CRON_WEEKDAYS[day] for day in sorted(days))
+
+
+def _hour_minute(time_str: str):
+    hour, minute = time_str.split(':')
+    if not (0 <= int(hour) <= 23 and 0 <= int(minute) <= 59):
+        raise ValueError
+    return int(hour), int(minute)
+
+
+def build_trigger(schedule_type: ScheduleType, expression: str, timezone: Optional[str] = None) -> BaseTrigger:
+    """
+    Trigger for a schedule time expression, interpreted in `timezone`.
+    Raises ValueError with a user-facing message if the expression is invalid.
+    """
+    tz = parse_timezone(timezone)
+    try:
+        if schedule_type == ScheduleType.DAILY:
+            hour, minute = _hour_minute(expression)
+            return CronTrigger(hour=hour, minute=minute, timezone=tz)
+
+        if schedule_type == ScheduleType.WEEKLY:
+            day, time_str = expression.split(' ')
+            hour, minute = _hour_minute(time_str)
+            return CronTrigger(day_of_week=day, hour=hour, minute=minute, timezone=tz)
+
+        if schedule_type == ScheduleType.MONTHLY:
+            day, time_str = expression.split(' ')
+            if not 1 <= int(day) <= 31:
+                raise ValueError
+            hour, minute = _hour_minute(time_str)
+            return CronTrigger(day=int(day), hour=hour, minute=minute, timezone=tz)
+
+        if schedule_type == ScheduleType.CUSTOM:
+            run_date = datetime.strptime(expression, "%Y-%m-%d %H:%M:%S")
+            return DateTrigger(run_date=run_date, timezone=tz)
+
+        if schedule_type == ScheduleType.CRON:
+            fields = expression.split()
+            if len(fields) != 5:
+                raise ValueError
+            minute, hour, day, month, weekdays = fields
+            day_of_week = crontab_day_of_week(weekdays)
+            if day.startswith("*") or weekdays.startswith("*"):
+                return CronTrigger(
+                    minute=minute, hour=hour, day=day, month=month, day_of_week=day_of_week, timezone=tz,
+                )
+            return OrTrigger([
+                CronTrigger(minute=minute, hour=hour, day=day, month=month, timezone=tz),
+                CronTrigger(minute=minute, hour=hour, month=month, day_of_week=day_of_week, timezone=tz),
+            ])
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid time_expression '{expression}' for schedule type '{schedule_type.value}'")
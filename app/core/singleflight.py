@@ -0,0 +1,92 @@
+"""
+Single-flight call coalescing: concurrent identical calls share one execution,
+and its result can be reused for a short TTL afterwards.
+
+Results are shared between callers, so they must be treated as read-only.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+# Expired entries are swept once the cache grows past this many keys
+SWEEP_THRESHOLD = 256
+
+
+class _Call:
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Keyed call coalescing with an optional micro-TTL.
+
+    `do(group, key, fn, ttl)` runs `fn` unless an identical call (same key) is
+    already in flight, in which case it waits for and returns that call's result
+    (or raises its exception). A successful result is reused for `ttl` seconds.
+    `invalidate()` drops cached results and stops new calls from joining ones
+    that started before it, so a caller never sees data older than its own
+    preceding mutation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "executed": 0, "coalesced": 0, "cache_hits": 0})
+
+    def do(self, group: str, key: Hashable, fn: Callable[[], Any], ttl: float = 0.0) -> Any:
+        counters = self._counters[group]
+        with self._lock:
+            counters["calls"] += 1
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                counters["cache_hits"] += 1
+                return cached[1]
+            call = self._in_flight.get(key)
+            if call is not None:
+                counters["coalesced"] += 1
+                leader = False
+            else:
+                call = self._in_flight[key] = _Call(self._generation)
+                counters["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+                if call.error is None and ttl > 0 and call.generation == self._generation:
+                    now = time.monotonic()
+                    if len(self._cache) >= SWEEP_THRESHOLD:
+                        self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                    self._cache[key] = (now + ttl, call.result)
+            call.done.set()
+        return call.result
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+            # Calls already running finish for their current waiters; new callers start afresh
+            self._in_flight.clear()
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {group: dict(counters) for group, counters in self._counters.items()}
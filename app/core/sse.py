@@ -0,0 +1,22 @@
+import json
+from typing import Any, Optional
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """
+    Format a single Server-Sent Events message.
+    `data` is JSON-encoded; the blank line terminates the event.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx response buffering
+}
@@ -0,0 +1,78 @@
+"""
+Startup timing: how long the app took to import, each lifespan phase before
+it began serving, and the background warmup that follows. Offsets are measured
+from when the `app` package started importing; interpreter and server startup
+before that is reported separately (from the OS process start time, which is
+only accurate to a few hundred milliseconds on some hosts).
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+import time
+
+import psutil
+
+from app import IMPORT_STARTED
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    def __init__(self):
+        self.process_started = psutil.Process().create_time()
+        self.origin = IMPORT_STARTED
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+        self.warmup_done_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str, background: bool = False) -> Iterator[None]:
+        started = time.time()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry = {
+                "name": name,
+                "background": background,
+                "started_offset_ms": round((started - self.origin) * 1000, 1),
+                "duration_ms": round((time.time() - started) * 1000, 1),
+            }
+            if error:
+                entry["error"] = error
+            self.phases.append(entry)
+
+    def mark(self, name: str, since: float):
+        """Record a phase that already happened (e.g. module imports)."""
+        self.phases.append({
+            "name": name,
+            "background": False,
+            "started_offset_ms": round((since - self.origin) * 1000, 1),
+            "duration_ms": round((time.time() - since) * 1000, 1),
+        })
+
+    def ready(self):
+        self.ready_at = time.time()
+        logger.info(f"Startup complete in {(self.ready_at - self.origin) * 1000:.0f} ms after app import")
+
+    def warmup_done(self):
+        self.warmup_done_at = time.time()
+
+    def report(self) -> Dict[str, Any]:
+        def offset(t: Optional[float]) -> Optional[float]:
+            return round((t - self.origin) * 1000, 1) if t is not None else None
+
+        return {
+            "process_started_at": datetime.utcfromtimestamp(self.process_started),
+            "before_import_ms": round(max(self.origin - self.process_started, 0.0) * 1000, 1),
+            "ready_ms": offset(self.ready_at),
+            "warmup_done_ms": offset(self.warmup_done_at),
+            "phases": self.phases,
+        }
+
+
+startup_timer = StartupTimer()
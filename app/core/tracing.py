@@ -0,0 +1,396 @@
+"""
+Opt-in instrumentation: lightweight spans for Docker API calls, DB queries,
+scheduler jobs and HTTP requests, exported as OTLP/JSON to a file and/or an
+OTLP/HTTP collector, plus a per-request sampling profiler used by `?profile=1`.
+
+Spans are only recorded when TRACING_ENABLED is set or a profiled request is
+collecting them; otherwise `span()` is a cheap no-op.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind values
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+APP_DIR = str(Path(__file__).resolve().parent.parent)
+THIS_FILE = str(Path(__file__).resolve())
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    kind: int
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Spans of a profiled request are collected here in addition to being exported
+_request_spans: ContextVar[Optional[List[Span]]] = ContextVar("request_spans", default=None)
+
+
+class OTLPExporter:
+    """Batches finished spans on a queue and flushes them from a background thread."""
+
+    def __init__(self, flush_interval: float = 5.0, max_batch: int = 512):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def enqueue(self, span: Span):
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Drop rather than block the request path
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        batch: List[Span] = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attribute("service.name", settings.TRACING_SERVICE_NAME),
+                    _otlp_attribute("process.pid", os.getpid()),
+                ]},
+                "scopeSpans": [{"scope": {"name": "frame-dock"}, "spans": [s.to_otlp() for s in batch]}],
+            }]
+        }
+        if settings.TRACING_OTLP_FILE:
+            try:
+                with open(settings.TRACING_OTLP_FILE, "a") as f:
+                    f.write(json.dumps(payload) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to write traces to {settings.TRACING_OTLP_FILE}: {e}")
+        if settings.TRACING_OTLP_ENDPOINT:
+            try:
+                import httpx
+                httpx.post(settings.TRACING_OTLP_ENDPOINT, json=payload, timeout=5.0)
+            except Exception as e:
+                logger.error(f"Failed to export traces to {settings.TRACING_OTLP_ENDPOINT}: {e}")
+
+
+exporter = OTLPExporter()
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes) -> Iterator[Optional[Span]]:
+    """Record a span around the block (no-op unless tracing or a request profile is active)."""
+    collector = _request_spans.get()
+    if not settings.TRACING_ENABLED and collector is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else _new_id(16),
+        span_id=_new_id(8),
+        parent_id=parent.span_id if parent else None,
+        kind=kind,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if collector is not None:
+            collector.append(current)
+        if settings.TRACING_ENABLED:
+            exporter.enqueue(current)
+
+
+def traced(name: Optional[str] = None, kind: int = KIND_INTERNAL):
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    """Record a span per SQL statement executed through `engine`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not settings.TRACING_ENABLED and _request_spans.get() is None:
+            return
+        cm = span("db.query", kind=KIND_CLIENT, **{"db.system": "sqlite", "db.statement": statement[:500]})
+        cm.__enter__()
+        conn.info.setdefault("_trace_spans", []).append(cm)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_trace_spans")
+        if stack:
+            stack.pop().__exit__(None, None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        stack = conn.info.get("_trace_spans") if conn is not None else None
+        if stack:
+            error = exception_context.original_exception
+            stack.pop().__exit__(type(error), error, None)
+
+
+# --- Per-request profiling ---
+
+_active_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+def _profiled_task_factory(loop, coro, **kwargs):
+    """Task factory that lets an active profiler follow the tasks its request spawns (e.g. by middleware)."""
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    context = kwargs.get("context")
+    profiler = context.get(_active_profiler) if context is not None else _active_profiler.get()
+    if profiler is not None:
+        profiler._tasks.add(task)
+    return task
+
+
+@contextmanager
+def profiled_thread() -> Iterator[None]:
+    """Include the current worker thread in the active request profile (if any) for the duration of the block."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    with profiler._lock:
+        profiler._threads[thread_id] += 1
+    try:
+        yield
+    finally:
+        with profiler._lock:
+            profiler._threads[thread_id] -= 1
+            if not profiler._threads[thread_id]:
+                del profiler._threads[thread_id]
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the work done for one request at a fixed interval:
+    the event loop thread while it runs one of the request's tasks, and pool
+    threads while they run the request's offloaded code (see `profiled_thread`).
+    Other requests served concurrently stay out of the profile.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._threads: Counter = Counter()
+        self._tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self._loop.get_task_factory() is None:
+            self._loop.set_task_factory(_profiled_task_factory)
+        self._tasks.add(asyncio.current_task())
+        self._token = _active_profiler.set(self)
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        _active_profiler.reset(self._token)
+        self.elapsed = time.perf_counter() - self._started
+
+    def _owns(self, thread_id: int) -> bool:
+        if thread_id == self._loop_thread:
+            return asyncio.current_task(self._loop) in self._tasks
+        with self._lock:
+            return thread_id in self._threads
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if not self._owns(thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                # Skips samples that are only framework code (e.g. a task between app calls)
+                if any(filename.startswith(APP_DIR) and filename != THIS_FILE for filename, _, _ in stack):
+                    self.stacks[tuple(reversed(stack))] += 1
+
+    def report(self, limit: int = 30) -> Dict[str, Any]:
+        ms_per_sample = self.interval * 1000
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for frame in set(stack):
+                total_counts[frame] += count
+
+        def label(frame):
+            filename, line, name = frame
+            return f"{name} ({os.path.relpath(filename) if filename.startswith(APP_DIR) else filename}:{line})"
+
+        functions = [
+            {
+                "function": label(frame),
+                "self_ms": round(self_counts[frame] * ms_per_sample, 2),
+                "total_ms": round(count * ms_per_sample, 2),
+            }
+            for frame, count in total_counts.most_common()
+        ]
+        functions.sort(key=lambda f: (f["self_ms"], f["total_ms"]), reverse=True)
+        return {
+            "interval_ms": ms_per_sample,
+            "samples": self.samples,
+            "wall_ms": round(self.elapsed * 1000, 2),
+            "functions": functions[:limit],
+            # Collapsed stacks ("a;b;c count"), loadable by flamegraph tools
+            "collapsed": [
+                ";".join(f[2] for f in stack) + f" {count}"
+                for stack, count in self.stacks.most_common(limit)
+            ],
+        }
+
+
+@contextmanager
+def collect_request_spans() -> Iterator[List[Span]]:
+    spans: List[Span] = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def span_tree(spans: List[Span]) -> List[Dict[str, Any]]:
+    """Nest collected spans under their parents, with durations and self time."""
+    children: Dict[Optional[str], List[Span]] = defaultdict(list)
+    ids = {s.span_id for s in spans}
+    for s in spans:
+        children[s.parent_id if s.parent_id in ids else None].append(s)
+
+    def build(s: Span) -> Dict[str, Any]:
+        kids = sorted(children.get(s.span_id, []), key=lambda c: c.start_ns)
+        child_ms = sum(k.duration_ms for k in kids)
+        node = {
+            "name": s.name,
+            "duration_ms": round(s.duration_ms, 3),
+            "self_ms": round(max(s.duration_ms - child_ms, 0.0), 3),
+            "attributes": s.attributes,
+        }
+        if s.error:
+            node["error"] = s.error
+        if kids:
+            node["children"] = [build(k) for k in kids]
+        return node
+
+    return [build(s) for s in sorted(children[None], key=lambda c: c.start_ns)]
@@ -3,3 +3,10 @@
 from app.db.base_class import Base  # noqa
 from app.models.schedule import ContainerSchedule  # noqa
 from app.models.user import User  # noqa
+from app.models.job import Job  # noqa
+from app.models.cluster import Lease, SharedCache  # noqa
+from app.models.schedule_run import ScheduleRun  # noqa
+from app.models.stats import ContainerStatsSample  # noqa
+from app.models.docker_event import DockerEvent  # noqa
+from app.models.alert import AlertRule  # noqa
+from app.models.scale_to_zero import ScaleToZeroTarget  # noqa
@@ -0,0 +1,29 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.base_class import Base
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(engine: Engine):
+    """
+    `create_all` only creates missing tables, so columns added to an existing
+    model never reach databases created by an older release. Add any missing
+    nullable columns with ALTER TABLE (SQLite can't add NOT NULL columns
+    without a default, so new columns are always declared nullable).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+                logger.info(f"Added column {table.name}.{column.name}")
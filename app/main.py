@@ -1,4 +1,3 @@
-import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,44 +7,109 @@ from app.core.config import settings
 from app.api.api_v1.api import api_router
 
 from contextlib import asynccontextmanager
+import asyncio
 from app.db.base import Base
 from app.db.session import engine
+from app.db.migrations import add_missing_columns
 import logging.config
 from app.core.logging_config import LOGGING
+from app.core.middleware import TracingMiddleware
+from app.core.tracing import exporter
+from app.core.admission import AdmissionRejectedError
+from app.core.executors import ExecutorSaturatedError, configure_default_threadpool
+from app.core.startup import startup_timer
 
 logging.config.dictConfig(LOGGING)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Create tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Create default admin user if not exists
-    from app.db.session import SessionLocal
-    from app.models.user import User
-    from app.core.auth import get_password_hash
-    
-    db = SessionLocal()
+def warmup():
+    """Runs in the background once the app is serving: connect to Docker and prime caches."""
+    from app.services.docker_service import docker_service
+    from app.services.disk_usage_service import disk_usage_service
+
     try:
-        admin_user = db.query(User).filter(User.username == "admin").first()
-        if not admin_user:
-            admin_user = User(
-                username="admin",
-                hashed_password=get_password_hash("admin123"),
-                is_default=True
-            )
-            db.add(admin_user)
-            db.commit()
-            logger = logging.getLogger("app")
-            logger.info("Default admin user created - Please change credentials on first login")
+        with startup_timer.phase("docker_connect", background=True):
+            connected = docker_service.warmup()
+        if connected:
+            with startup_timer.phase("docker_df_cache", background=True):
+                disk_usage_service.prime()
+    except Exception as e:
+        logging.getLogger("app").warning(f"Startup warmup failed: {e}")
     finally:
-        db.close()
+        startup_timer.warmup_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing the app's modules (and their dependencies) up to here
+    startup_timer.mark("imports", since=startup_timer.origin)
+    configure_default_threadpool()
+
+    from app.services.cluster_service import cluster_service
+
+    # With several workers, only one at a time creates tables and seeds the admin user
+    with startup_timer.phase("database"), cluster_service.startup_lock():
+        # Create tables
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+
+        # Create default admin user if not exists
+        from app.db.session import SessionLocal
+        from app.models.user import User
+        from app.core.auth import get_password_hash
+
+        db = SessionLocal()
+        try:
+            admin_user = db.query(User).filter(User.username == "admin").first()
+            if not admin_user:
+                admin_user = User(
+                    username="admin",
+                    hashed_password=get_password_hash("admin123"),
+                    is_default=True
+                )
+                db.add(admin_user)
+                db.commit()
+                logger = logging.getLogger("app")
+                logger.info("Default admin user created - Please change credentials on first login")
+        finally:
+            db.close()
     
-    # Load schedules
+    # Drop expired jobs (interrupted ones are failed by the scheduler leader)
+    from app.services.job_service import job_service
+    with startup_timer.phase("job_recovery"):
+        job_service.recover()
+
+    # Load schedules; the scheduler only fires jobs in the worker holding the scheduler lease
     from app.services.scheduler_service import scheduler_service
-    scheduler_service.start()
-    scheduler_service.load_jobs_from_db()
+    from app.services.schedule_run_service import schedule_run_service
+    from app.services.stats_history_service import stats_history_service
+    from app.services.docker_event_service import docker_event_service
+    from app.services.alert_service import alert_service
+    from app.services.host_metrics_service import host_metrics_service
+    from app.services.scale_to_zero_service import scale_to_zero_service
+    with startup_timer.phase("scheduler"):
+        scheduler_service.start()
+        scheduler_service.load_jobs_from_db()
+        await cluster_service.start()
+        alert_service.start()
+        host_metrics_service.start()
+        stats_history_service.start()
+        docker_event_service.start()
+        scale_to_zero_service.start()
+
+    # Docker and caches warm up in the background; requests that need them before then connect on demand
+    warmup_task = asyncio.create_task(asyncio.to_thread(warmup))
+    startup_timer.ready()
     yield
+    warmup_task.cancel()
+    await cluster_service.stop()
+    stats_history_service.stop()
+    alert_service.stop()
+    host_metrics_service.stop()
+    docker_event_service.stop()
+    scale_to_zero_service.stop()
+    schedule_run_service.stop()
+    job_service.shutdown()
+    exporter.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -57,6 +121,20 @@ app = FastAPI(
 
 import time
 from fastapi import Request
+from fastapi.responses import JSONResponse
+from app.services.docker_service import DockerUnavailableError
+
+@app.exception_handler(DockerUnavailableError)
+async def docker_unavailable_handler(request: Request, exc: DockerUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejectedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -74,6 +152,8 @@ async def log_requests(request: Request, call_next):
     logger.info(log_msg)
     return response
 
+app.add_middleware(TracingMiddleware)
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -96,6 +176,7 @@ def root():
     return {"message": "Welcome to Frame Dock API", "docs": f"{settings.API_V1_STR}/docs"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "app.main:app", 
         host="0.0.0.0", 
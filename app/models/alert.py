@@ -0,0 +1,44 @@
+from enum import Enum
+from sqlalchemy import Integer, String, Text, Float, Boolean, Enum as SAEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+from app.models.schedule import ActionType
+
+
+class AlertScope(str, Enum):
+    CONTAINER = "container"  # Evaluated per running container (get_container_stats)
+    HOST = "host"  # Evaluated against host CPU/memory/disks (/system/stats)
+
+
+class AlertRule(Base):
+    """
+    A threshold rule, e.g. memory_percent > 90 for 120s. Evaluated by alert_service
+    on every stats sampler tick.
+    """
+    __tablename__ = "alert_rule"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String)
+    scope: Mapped[AlertScope] = mapped_column(SAEnum(AlertScope))
+    metric: Mapped[str] = mapped_column(String)  # e.g. memory_percent, cpu_percent, disk_percent
+
+    # Container ID or name for container rules, mountpoint for disk_percent; None = all of them
+    target: Mapped[str] = mapped_column(String, nullable=True)
+
+    # Fires once `metric operator threshold` has held for for_seconds; resolves only once the
+    # value is back past clear_threshold (hysteresis; None = the threshold itself)
+    operator: Mapped[str] = mapped_column(String)  # ">", ">=", "<", "<="
+    threshold: Mapped[float] = mapped_column(Float)
+    clear_threshold: Mapped[float] = mapped_column(Float, nullable=True)
+    for_seconds: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Optional container action when the alert fires (the offending container for container
+    # rules, action_container_ids for host rules); options as for schedules
+    action: Mapped[ActionType] = mapped_column(SAEnum(ActionType), nullable=True)
+    action_container_ids: Mapped[str] = mapped_column(Text, nullable=True)  # JSON list
+    action_options: Mapped[str] = mapped_column(Text, nullable=True)  # JSON
+
+    # JSON list of sink specs, e.g. [{"type": "webhook", "url": "..."}]; None = the default sinks
+    sinks: Mapped[str] = mapped_column(Text, nullable=True)
+
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
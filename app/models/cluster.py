@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import String, Text, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class Lease(Base):
+    """
+    A named, time-limited claim shared by all worker processes.
+    "scheduler" elects the worker that runs APScheduler; "worker:<id>" rows are
+    each worker's heartbeat.
+    """
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
+class SharedCache(Base):
+    """Values shared between worker processes (cached daemon responses, change revisions)."""
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=True)  # JSON
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import Integer, BigInteger, String, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class DockerEvent(Base):
+    """
+    An event from the daemon's event stream (container die/oom/health_status, image
+    pull, network connect, ...), written in batches by docker_event_service.
+    Every query filters on one of the indexed columns plus a time range.
+    """
+    __table_args__ = (
+        # The stream is resumed from the last stored event, so replays are dropped by this
+        UniqueConstraint("time_nano", "type", "action", "actor_id", name="uq_dockerevent_identity"),
+        Index("ix_dockerevent_actor_time", "actor_id", "time"),
+        Index("ix_dockerevent_name_time", "container_name", "time"),
+        Index("ix_dockerevent_type_time", "type", "time"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    time: Mapped[datetime] = mapped_column(DateTime, index=True)  # UTC
+    time_nano: Mapped[int] = mapped_column(BigInteger)
+    type: Mapped[str] = mapped_column(String)  # container, image, network, volume, ...
+    action: Mapped[str] = mapped_column(String)  # e.g. "die", "oom", "health_status: unhealthy"
+    actor_id: Mapped[str] = mapped_column(String)  # Full container ID, image reference, ...
+    container_name: Mapped[str] = mapped_column(String, nullable=True)
+    exit_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    attributes: Mapped[str] = mapped_column(Text, nullable=True)  # JSON (includes container labels)
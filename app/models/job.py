@@ -0,0 +1,34 @@
+from enum import Enum
+from datetime import datetime
+from sqlalchemy import String, Text, Float, DateTime, Enum as SAEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String, index=True)
+    status: Mapped[JobStatus] = mapped_column(SAEnum(JobStatus), index=True, default=JobStatus.QUEUED)
+
+    # JSON-encoded handler arguments and return value
+    params: Mapped[str] = mapped_column(Text, nullable=True)
+    result: Mapped[str] = mapped_column(Text, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+
+    # Last reported progress (0.0 - 1.0) and message
+    progress: Mapped[float] = mapped_column(Float, nullable=True)
+    message: Mapped[str] = mapped_column(String, nullable=True)
+
+    # Worker process that owns the job; its jobs are failed once its heartbeat lease lapses
+    worker: Mapped[str] = mapped_column(String, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
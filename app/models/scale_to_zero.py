@@ -0,0 +1,19 @@
+from sqlalchemy import Integer, String, Boolean
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class ScaleToZeroTarget(Base):
+    """
+    A container put to sleep when idle and woken by the first connection to its
+    proxy port (see scale_to_zero_service).
+    """
+    __tablename__ = "scale_to_zero_target"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    container_id: Mapped[str] = mapped_column(String)  # ID or name
+    listen_port: Mapped[int] = mapped_column(Integer, unique=True)  # Proxy port clients connect to
+    target_port: Mapped[int] = mapped_column(Integer)  # Port on the container's own IP address
+    idle_seconds: Mapped[int] = mapped_column(Integer, default=900)  # Quiet this long -> stopped
+    wake_timeout: Mapped[int] = mapped_column(Integer, default=60)  # Seconds the port may take to open after a start
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Boolean, Enum as SAEnum
+from sqlalchemy import Column, Integer, String, Boolean, Text, Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base_class import Base
 
@@ -8,12 +8,15 @@ class ScheduleType(str, Enum):
     WEEKLY = "weekly"
     MONTHLY = "monthly"
     CUSTOM = "custom" # One-time
+    CRON = "cron"  # 5-field crontab expression
 
 class ActionType(str, Enum):
     START = "start"
     STOP = "stop"
     RESTART = "restart"
-    SLEEP = "sleep"  # Stop at time_expression, start at wake_time_expression
+    ROLLING_RESTART = "rolling_restart"  # Restart in batches, waiting for health; RollingRestartPolicy in `options`
+    SLEEP = "sleep"  # Stop at time_expression, start at wake_time_expression (in dependency order; StartupPolicy in `options`)
+    PRUNE_IMAGES = "prune_images"  # Image garbage collection; policy in `options`, no containers
 
 class ContainerSchedule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -28,10 +31,23 @@ class ContainerSchedule(Base):
     # For weekly: "mon 14:30"
     # For monthly: "1 14:30" (Day of month)
     # For custom: "2023-10-27 14:30:00"
+    # For cron: "0 3 * * mon-fri"
     time_expression: Mapped[str] = mapped_column(String)
     
     # For SLEEP action: time to wake up (start container)
     # Uses same format as time_expression based on schedule_type
     wake_time_expression: Mapped[str] = mapped_column(String, nullable=True)
     
+    # Action-specific settings as JSON (e.g. the image prune policy for PRUNE_IMAGES)
+    options: Mapped[str] = mapped_column(Text, nullable=True)
+
+    # IANA timezone the expressions are interpreted in (None = server local time)
+    timezone: Mapped[str] = mapped_column(String, nullable=True)
+
+    # Spread each run over its containers to avoid a thundering herd: each container
+    # gets a random delay of up to jitter_seconds, and containers are spaced evenly
+    # across stagger_seconds in list order
+    jitter_seconds: Mapped[int] = mapped_column(Integer, nullable=True)
+    stagger_seconds: Mapped[int] = mapped_column(Integer, nullable=True)
+
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -0,0 +1,39 @@
+from enum import Enum
+from datetime import datetime
+from sqlalchemy import Integer, String, Text, Float, DateTime, Index, Enum as SAEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+from app.models.schedule import ActionType
+
+
+class ScheduleRunStatus(str, Enum):
+    SUCCEEDED = "succeeded"  # Every container action succeeded
+    PARTIAL = "partial"  # Some containers failed
+    FAILED = "failed"  # Every container failed
+    SUBMITTED = "submitted"  # Handed to the job queue (image prune)
+    MISSED = "missed"  # The scheduler didn't fire it in time (e.g. no leader was running)
+
+
+class ScheduleRun(Base):
+    """One firing of a schedule's job, written in batches by schedule_run_service."""
+    __tablename__ = "schedule_run"
+    __table_args__ = (Index("ix_schedule_run_schedule_scheduled", "schedule_id", "scheduled_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    schedule_id: Mapped[int] = mapped_column(Integer, index=True)
+    job_id: Mapped[str] = mapped_column(String)  # "<id>", or "<id>_sleep"/"<id>_wake" for SLEEP
+    action: Mapped[ActionType] = mapped_column(SAEnum(ActionType), nullable=True)
+    status: Mapped[ScheduleRunStatus] = mapped_column(SAEnum(ScheduleRunStatus))
+
+    # UTC; lag is how late the run started relative to its fire time
+    scheduled_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    lag_ms: Mapped[float] = mapped_column(Float, nullable=True)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=True)
+
+    containers_total: Mapped[int] = mapped_column(Integer, default=0)
+    containers_failed: Mapped[int] = mapped_column(Integer, default=0)
+    # JSON list of {container_id, ok, latency_ms, delay_ms, error}
+    results: Mapped[str] = mapped_column(Text, nullable=True)
+    detail: Mapped[str] = mapped_column(String, nullable=True)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Integer, String, Float, BigInteger, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class ContainerStatsSample(Base):
+    """Periodic CPU/memory sample of a running container, written by stats_history_service."""
+    __table_args__ = (Index("ix_containerstatssample_container_sampled", "container_id", "sampled_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    container_id: Mapped[str] = mapped_column(String)  # Short ID, as returned by the stats endpoints
+    container_name: Mapped[str] = mapped_column(String, nullable=True)
+    sampled_at: Mapped[datetime] = mapped_column(DateTime, index=True)  # UTC
+
+    cpu_percent: Mapped[float] = mapped_column(Float)  # 100 = one full core
+    memory_usage: Mapped[int] = mapped_column(BigInteger)
+    memory_working_set: Mapped[int] = mapped_column(BigInteger, nullable=True)  # Usage minus inactive page cache
+    memory_limit: Mapped[int] = mapped_column(BigInteger, nullable=True)  # As reported by the daemon (host memory if unlimited)
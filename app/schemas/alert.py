@@ -0,0 +1,93 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+import json
+from app.models.alert import AlertScope
+from app.models.schedule import ActionType
+from app.schemas.docker import RollingRestartPolicy
+
+# Metrics a rule can watch, per scope (names as in get_container_stats and /system/stats)
+CONTAINER_METRICS = ("cpu_percent", "memory_percent", "memory_usage", "pids")
+HOST_METRICS = ("cpu_percent", "memory_percent", "swap_percent", "disk_percent")
+OPERATORS = (">", ">=", "<", "<=")
+# Actions a rule can take; the others need a schedule (SLEEP) or have no container (PRUNE_IMAGES)
+ALERT_ACTIONS = (ActionType.START, ActionType.STOP, ActionType.RESTART, ActionType.ROLLING_RESTART)
+
+
+class AlertSinkSpec(BaseModel):
+    type: str  # "webhook", "file", or a type registered with register_sink_type
+    url: Optional[str] = None  # webhook
+    headers: Optional[Dict[str, str]] = None  # webhook
+    path: Optional[str] = None  # file (JSON lines)
+
+    @model_validator(mode='after')
+    def check_sink(self):
+        if self.type == "webhook" and not self.url:
+            raise ValueError("url is required for webhook sinks")
+        if self.type == "file" and not self.path:
+            raise ValueError("path is required for file sinks")
+        return self
+
+
+class AlertRuleBase(BaseModel):
+    name: str
+    scope: AlertScope
+    metric: str
+    target: Optional[str] = None  # Container ID/name, or mountpoint for disk_percent; None = all
+    operator: Literal[">", ">=", "<", "<="] = ">"
+    threshold: float
+    clear_threshold: Optional[float] = None  # Hysteresis: resolves once back past this
+    for_seconds: int = Field(0, ge=0, le=86400)
+    action: Optional[ActionType] = None
+    action_container_ids: Optional[List[str]] = None  # Host rules only
+    action_options: Optional[Dict[str, Any]] = None
+    sinks: Optional[List[AlertSinkSpec]] = None  # None = ALERT_WEBHOOK_URL / ALERT_FILE_PATH
+    is_active: bool = True
+
+    @field_validator('action_container_ids', 'action_options', 'sinks', mode='before')
+    @classmethod
+    def parse_json(cls, v):
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+
+class AlertRuleCreate(AlertRuleBase):
+    @model_validator(mode='after')
+    def validate_rule(self):
+        metrics = CONTAINER_METRICS if self.scope == AlertScope.CONTAINER else HOST_METRICS
+        if self.metric not in metrics:
+            raise ValueError(f"metric must be one of {', '.join(metrics)} for {self.scope.value} rules")
+        if self.clear_threshold is not None:
+            # The clear threshold must sit on the non-firing side of the threshold
+            if self.operator.startswith(">") and self.clear_threshold > self.threshold:
+                raise ValueError("clear_threshold must not be above threshold for > rules")
+            if self.operator.startswith("<") and self.clear_threshold < self.threshold:
+                raise ValueError("clear_threshold must not be below threshold for < rules")
+        if self.action is not None:
+            if self.action not in ALERT_ACTIONS:
+                raise ValueError(f"action must be one of {', '.join(a.value for a in ALERT_ACTIONS)}")
+            if self.scope == AlertScope.HOST and not self.action_container_ids:
+                raise ValueError("action_container_ids is required for host rules with an action")
+            if self.action == ActionType.ROLLING_RESTART:
+                self.action_options = RollingRestartPolicy(**(self.action_options or {})).model_dump()
+        return self
+
+
+class AlertRule(AlertRuleBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class ActiveAlert(BaseModel):
+    rule_id: int
+    rule_name: str
+    state: Literal["pending", "firing"]
+    subject: str  # Container ID, mountpoint, or "host"
+    subject_name: Optional[str] = None
+    value: float
+    threshold: float
+    since: datetime  # UTC; when the condition started holding
+    fired_at: Optional[datetime] = None
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Dict, Any
+from datetime import datetime
 
 # --- Containers ---
 
@@ -29,12 +30,148 @@ class ContainerSummary(BaseModel):
     ports: Optional[Dict[str, Any]] = None
     cpu_quota: Optional[int] = None
     memory_limit: Optional[int] = None
+    labels: Dict[str, str] = {}
 
 class ContainerAction(BaseModel):
     success: bool
     message: Optional[str] = None
     container_id: Optional[str] = None
 
+class RollingRestartPolicy(BaseModel):
+    """
+    Restart containers `batch_size` at a time; the next batch starts only once every
+    container in the current one passes its health check. health_check "auto" uses
+    the container's Docker HEALTHCHECK if it has one, a TCP probe if probe_port is
+    set, and otherwise just waits for it to be running.
+    """
+    batch_size: int = Field(default=1, ge=1)
+    health_check: Literal["auto", "healthcheck", "tcp", "http", "running"] = "auto"
+    probe_port: Optional[int] = Field(default=None, ge=1, le=65535)  # Container port for tcp/http probes
+    probe_path: str = "/"  # http: any status below 400 counts as healthy
+    probe_host: Optional[str] = None  # Default: the container's IP address on its first network
+    health_timeout: int = Field(default=120, ge=1, le=3600)  # Seconds each batch may take to become healthy
+    probe_interval: float = Field(default=2.0, gt=0, le=60)
+    stop_timeout: Optional[int] = Field(default=None, ge=0)  # Default: DOCKER_STOP_TIMEOUT
+    abort_on_failure: bool = True  # Leave the remaining containers alone once one fails
+
+    @model_validator(mode='after')
+    def check_probe(self):
+        if self.health_check in ("tcp", "http") and self.probe_port is None:
+            raise ValueError(f"probe_port is required for health_check '{self.health_check}'")
+        return self
+
+class RollingRestartRequest(BaseModel):
+    container_ids: List[str] = Field(min_length=1)  # Restarted in this order
+    policy: RollingRestartPolicy = RollingRestartPolicy()
+
+class RollingRestartStep(BaseModel):
+    container_id: str
+    batch: int
+    status: str  # "healthy", "failed", or "skipped" (not restarted because the rollout aborted)
+    check: Optional[str] = None  # Health check used: healthcheck, tcp, http or running
+    restart_ms: Optional[float] = None
+    ready_ms: Optional[float] = None  # From the restart returning to the check passing
+    error: Optional[str] = None
+
+class RollingRestartResult(BaseModel):
+    success: bool
+    aborted: bool
+    batches: int
+    duration_ms: float
+    containers: List[RollingRestartStep]
+
+class StartupPolicy(BaseModel):
+    """
+    Start containers in dependency order: each topological level starts in parallel,
+    and a level only starts once the containers it depends on are ready. Dependencies
+    come from compose's depends_on labels (with their service_started / service_healthy
+    / service_completed_successfully conditions) plus `edges`.
+    """
+    edges: Optional[Dict[str, List[str]]] = None  # Container ID or name -> the containers it depends on
+    use_compose: bool = True  # Read com.docker.compose.depends_on labels
+    wait_healthy: bool = True  # `edges` dependencies must be healthy (just running if they have no HEALTHCHECK)
+    health_timeout: int = Field(default=120, ge=1, le=3600)  # Seconds a level's dependencies may take to be ready
+    probe_interval: float = Field(default=1.0, gt=0, le=60)
+
+class StartContainersRequest(BaseModel):
+    container_ids: List[str] = Field(min_length=1)
+    policy: StartupPolicy = StartupPolicy()
+
+class StartupStep(BaseModel):
+    container_id: str
+    name: Optional[str] = None
+    level: Optional[int] = None
+    status: str  # "started", "healthy", "completed", "failed", or "skipped" (a dependency failed)
+    start_ms: Optional[float] = None
+    ready_ms: Optional[float] = None  # Waiting for dependents' condition after starting
+    error: Optional[str] = None
+
+class StartupResult(BaseModel):
+    success: bool
+    levels: List[List[str]]  # Container IDs per level, in start order
+    duration_ms: float
+    containers: List[StartupStep]
+
+class ContainerMemoryStats(BaseModel):
+    id: str
+    name: str
+    memory_usage: int
+    memory_limit: int  # Host memory if the container has no limit
+    memory_percent: float
+    anon: int  # Process memory (heap, stacks)
+    file: int  # Page cache; mostly reclaimable
+    kernel: int  # Kernel memory charged to the container (slab, stacks, sockets)
+    working_set: int  # Usage minus inactive page cache
+    source: str  # "cgroup" (read from the cgroup filesystem) or "api" (Docker stats API)
+
+class MemoryStatsSummary(BaseModel):
+    count: int  # Running containers measured
+    total_usage: int
+    host_memory: int
+    containers: List[ContainerMemoryStats]
+
+class UsagePercentiles(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+class ResourceLimits(BaseModel):
+    cpu_quota: Optional[int] = None  # Microseconds per cpu_period; None = unlimited
+    cpu_period: Optional[int] = None
+    nano_cpus: Optional[int] = None  # Set for containers limited with --cpus; applied instead of cpu_quota
+    mem_limit: Optional[str] = None
+    mem_limit_bytes: Optional[int] = None  # None = unlimited
+
+class ResourceRecommendation(BaseModel):
+    container_id: str
+    name: str
+    window_hours: int
+    samples: int
+    cpu_percent: Optional[UsagePercentiles] = None  # 100 = one full core
+    memory_usage: Optional[UsagePercentiles] = None  # Bytes, including page cache
+    memory_working_set: Optional[UsagePercentiles] = None  # Bytes without reclaimable page cache; what limits are sized on
+    current: ResourceLimits
+    recommended: Optional[ResourceLimits] = None  # None until there are enough samples
+    # oom_risk, oom_killed, memory_over_provisioned, memory_unbounded, cpu_throttling_risk,
+    # cpu_over_provisioned, cpu_unbounded, insufficient_data
+    flags: List[str]
+
+class ApplyRecommendationsRequest(BaseModel):
+    container_ids: List[str] = Field(min_length=1)
+    window_hours: Optional[int] = Field(default=None, ge=1, le=24 * 92)
+    cpu: bool = True
+    memory: bool = True
+    dry_run: bool = False
+
+class AppliedRecommendation(BaseModel):
+    container_id: str
+    applied: bool
+    cpu_quota: Optional[int] = None
+    nano_cpus: Optional[int] = None
+    mem_limit: Optional[str] = None
+    error: Optional[str] = None
+
 # --- Images ---
 
 class ImageSummary(BaseModel):
@@ -46,3 +183,177 @@ class ImageSummary(BaseModel):
 class PruneResult(BaseModel):
     ImagesDeleted: Optional[List[Dict[str, str]]] = None
     SpaceReclaimed: Optional[int] = None
+
+class ImagePullRequest(BaseModel):
+    image: str  # e.g. "nginx", "nginx:1.25", "ghcr.io/org/app@sha256:..."
+
+class ImagePullLayer(BaseModel):
+    id: str
+    status: Optional[str] = None
+    current: Optional[int] = None
+    total: Optional[int] = None
+
+class ImagePullJob(BaseModel):
+    id: str
+    reference: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    layers: List[ImagePullLayer] = []
+    bytes_downloaded: int = 0
+    bytes_total: int = 0
+
+class ImagePrunePolicy(BaseModel):
+    """
+    Image garbage-collection policy. A tagged image is removed only if it meets
+    every retention rule that is set (beyond the `keep_recent_tags` newest tags
+    of its repository and older than `unused_days`); a dangling image is removed
+    if include_dangling is on or it is older than `unused_days`. Images used by
+    a container or referenced by a schedule are never removed.
+    """
+    keep_recent_tags: Optional[int] = Field(default=None, ge=0)  # Keep the N newest tags per repository
+    unused_days: Optional[int] = Field(default=None, ge=0)  # Remove images older than X days with no containers
+    include_dangling: bool = True  # Remove untagged images
+    dry_run: bool = False
+
+class ImagePruneCandidate(BaseModel):
+    id: str
+    tags: List[str]
+    size: int
+    unique_size: int
+    created: Optional[int] = None
+    reasons: List[str]
+
+class ProtectedImage(BaseModel):
+    id: str
+    tags: List[str]
+    reasons: List[str]
+
+class ImagePrunePlan(BaseModel):
+    dry_run: bool
+    policy: ImagePrunePolicy
+    candidates: List[ImagePruneCandidate]
+    protected: List[ProtectedImage]
+    reclaimable_bytes: int  # Bytes only the removed images hold (guaranteed to be freed)
+    reclaimable_bytes_max: int  # Upper bound including layers shared only among removed images
+    removed: List[str] = []
+    failed: Dict[str, str] = {}
+    reclaimed_bytes: Optional[int] = None  # Measured from `docker system df` after a real run
+
+class PrunePreviewImage(BaseModel):
+    id: str
+    tags: List[str]
+    unique_size: int
+
+class PrunePreview(BaseModel):
+    images: List[PrunePreviewImage]
+    image_count: int
+    reclaimable_bytes: int
+    fetched_at: Optional[datetime] = None
+    age_seconds: float
+    stale: bool
+
+# --- Disk usage (docker system df) ---
+
+class DiskUsageCategory(BaseModel):
+    count: int
+    active: int
+    size: int
+    reclaimable: int
+
+class ImageDiskUsageSummary(DiskUsageCategory):
+    shared_size: int
+    unique_size: int
+
+class ImageDiskUsage(BaseModel):
+    id: str
+    tags: List[str]
+    size: int
+    shared_size: int
+    unique_size: int
+    containers: int
+    created: Optional[int] = None
+
+class DockerDiskUsage(BaseModel):
+    images: ImageDiskUsageSummary
+    containers: DiskUsageCategory
+    volumes: DiskUsageCategory
+    build_cache: DiskUsageCategory
+    total_size: int
+    total_reclaimable: int
+    image_details: List[ImageDiskUsage]
+    fetched_at: Optional[datetime] = None
+    age_seconds: float
+    stale: bool
+
+# --- Event timeline ---
+
+class DockerEvent(BaseModel):
+    id: int
+    time: datetime  # UTC
+    type: str  # container, image, network, volume, ...
+    action: str  # e.g. die, oom, "health_status: unhealthy"
+    actor_id: str
+    container_name: Optional[str] = None
+    exit_code: Optional[int] = None
+    attributes: Dict[str, Any] = {}
+
+class ContainerEventFlags(BaseModel):
+    container_id: str
+    name: Optional[str] = None
+    oom_kills: int
+    crashes: int  # Non-zero exits nobody asked for
+    restarts: int
+    unhealthy_transitions: int
+    health: Optional[str] = None
+    flags: List[str]  # oom_killed, crash_loop, restart_loop, unhealthy, health_flapping
+
+class DockerEventFlags(BaseModel):
+    window_seconds: int
+    updated_at: Optional[datetime] = None
+    containers: List[ContainerEventFlags]
+
+# --- Groups (compose project / label) ---
+
+class ContainerGroupMember(BaseModel):
+    id: str
+    name: str
+    state: Optional[str] = None
+
+class ContainerGroup(BaseModel):
+    label: str  # Label key, e.g. com.docker.compose.project
+    value: Optional[str] = None  # None: containers without the label
+    total: int
+    running: int
+    containers: List[ContainerGroupMember]
+
+class ContainerGroupStats(BaseModel):
+    label: str
+    value: Optional[str] = None
+    total: int
+    running: int
+    sampled: int  # Containers the totals include (running ones with stats)
+    sampled_at: datetime  # UTC time of the stats the totals come from
+    cpu_percent: float
+    memory_usage: int
+    network_input: int
+    network_output: int
+    block_read: int
+    block_write: int
+    pids: int
+
+class GroupActionContainer(BaseModel):
+    container_id: str
+    name: str
+    success: bool
+    message: Optional[str] = None
+
+class GroupActionResult(BaseModel):
+    label: str
+    value: str
+    action: Literal["start", "stop", "restart"]
+    succeeded: int
+    failed: int
+    duration_ms: float
+    containers: List[GroupActionContainer]
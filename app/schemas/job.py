@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+from app.models.job import JobStatus
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    params: Optional[Any] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    kind: str
+    status: JobStatus
+    status_url: str
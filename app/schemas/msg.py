@@ -1,4 +1,15 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class Msg(BaseModel):
     msg: str
+
+class DockerHealth(BaseModel):
+    connected: bool
+    circuit_state: str
+    consecutive_failures: int
+    last_error: Optional[str] = None
+    latency_ms: Optional[float] = None
+
+class HealthStatus(Msg):
+    docker: DockerHealth
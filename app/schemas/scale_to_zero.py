@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class ScaleToZeroTargetBase(BaseModel):
+    container_id: str  # ID or name
+    listen_port: int = Field(ge=1, le=65535)
+    target_port: int = Field(ge=1, le=65535)  # On the container's own IP address
+    idle_seconds: int = Field(900, ge=30, le=7 * 86400)
+    wake_timeout: int = Field(60, ge=1, le=600)
+    is_active: bool = True
+
+
+class ScaleToZeroTargetCreate(ScaleToZeroTargetBase):
+    pass
+
+
+class ScaleToZeroTarget(ScaleToZeroTargetBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class ColdStartStats(BaseModel):
+    count: int
+    failures: int
+    last_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+
+
+class ScaleToZeroStatus(BaseModel):
+    id: int
+    container_id: str
+    listen_port: int
+    state: str  # running, stopping, sleeping, waking, unknown (not checked yet), or error (proxy port couldn't be bound)
+    listening: bool
+    active_connections: int
+    total_connections: int
+    cpu_percent: Optional[float] = None  # Rates over the last idle check; 100 = one core
+    network_bytes_per_sec: Optional[float] = None
+    idle_seconds: int
+    quiet_for: Optional[float] = None  # Seconds the container has been idle so far
+    last_activity: Optional[datetime] = None  # UTC; last byte through the proxy
+    slept_at: Optional[datetime] = None
+    cold_starts: ColdStartStats
+    error: Optional[str] = None
@@ -1,8 +1,12 @@
 from pydantic import BaseModel, model_validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
+from datetime import datetime
 import json
-from pydantic import BaseModel, model_validator, field_validator
+from pydantic import BaseModel, Field, model_validator, field_validator
+from app.core.schedule_triggers import build_trigger, parse_timezone
 from app.models.schedule import ScheduleType, ActionType
+from app.models.schedule_run import ScheduleRunStatus
+from app.schemas.docker import ImagePrunePolicy, RollingRestartPolicy, StartupPolicy
 
 class ScheduleBase(BaseModel):
     container_ids: List[str]
@@ -11,6 +15,10 @@ class ScheduleBase(BaseModel):
     action: ActionType
     time_expression: str 
     wake_time_expression: Optional[str] = None  # Required for SLEEP action
+    options: Optional[Dict[str, Any]] = None  # Action settings, e.g. ImagePrunePolicy for PRUNE_IMAGES
+    timezone: Optional[str] = None  # IANA name, e.g. "Europe/Berlin"; default is the server's timezone
+    jitter_seconds: Optional[int] = Field(None, ge=0, le=86400)  # Random per-container delay of up to this
+    stagger_seconds: Optional[int] = Field(None, ge=0, le=86400)  # Spread containers evenly over this window
     is_active: bool = True
 
     @field_validator('container_ids', mode='before')
@@ -23,39 +31,34 @@ class ScheduleBase(BaseModel):
                 return [v]
         return v
 
+    @field_validator('options', mode='before')
+    @classmethod
+    def parse_options(cls, v):
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+    @field_validator('timezone')
+    @classmethod
+    def check_timezone(cls, v):
+        if v:
+            parse_timezone(v)
+        return v or None
+
 # Validation helper function
-def validate_time_format(time_expr: str, schedule_type: ScheduleType):
-    """Helper to validate time expression format"""
-    try:
-        if schedule_type == ScheduleType.DAILY:
-            # "14:30"
-            h, m = time_expr.split(':')
-            if not (0 <= int(h) <= 23 and 0 <= int(m) <= 59):
-                raise ValueError
-        elif schedule_type == ScheduleType.WEEKLY:
-            # "mon 14:30"
-            parts = time_expr.split(' ')
-            if len(parts) != 2:
-                raise ValueError
-            day, time_str = parts
-            h, m = time_str.split(':')
-            if not (0 <= int(h) <= 23 and 0 <= int(m) <= 59):
-                raise ValueError
-        elif schedule_type == ScheduleType.MONTHLY:
-            # "1 14:30"
-            parts = time_expr.split(' ')
-            if len(parts) != 2:
-                raise ValueError
-            day, time_str = parts
-            h, m = time_str.split(':')
-            if not (0 <= int(day) <= 31 and 0 <= int(h) <= 23 and 0 <= int(m) <= 59):
-                raise ValueError
-        elif schedule_type == ScheduleType.CUSTOM:
-            # "2023-10-27 14:30:00"
-            from datetime import datetime
-            datetime.strptime(time_expr, "%Y-%m-%d %H:%M:%S")
-    except Exception:
-        raise ValueError(f"Invalid time_expression '{time_expr}' for schedule type '{schedule_type}'")
+def validate_action_options(schedule: ScheduleBase):
+    """Validate and normalise action-specific options"""
+    if schedule.action == ActionType.PRUNE_IMAGES:
+        schedule.options = ImagePrunePolicy(**(schedule.options or {})).model_dump()
+    elif schedule.action == ActionType.ROLLING_RESTART:
+        schedule.options = RollingRestartPolicy(**(schedule.options or {})).model_dump()
+    elif schedule.action == ActionType.SLEEP:
+        # The wake job starts the containers in dependency order with this policy
+        schedule.options = StartupPolicy(**(schedule.options or {})).model_dump()
+
+def validate_time_format(time_expr: str, schedule_type: ScheduleType, timezone: Optional[str] = None):
+    """Helper to validate time expression format (parsed exactly as the scheduler will)"""
+    build_trigger(schedule_type, time_expr, timezone)
 
 class ScheduleCreate(ScheduleBase):
     @model_validator(mode='after')
@@ -65,40 +68,143 @@ class ScheduleCreate(ScheduleBase):
             if not self.wake_time_expression:
                 raise ValueError("wake_time_expression is required for SLEEP action")
         
-        # Validate time_expression
-        validate_time_format(self.time_expression, self.schedule_type)
-        
-        # Validate wake_time_expression if present
-        if self.wake_time_expression:
-            validate_time_format(self.wake_time_expression, self.schedule_type)
-            # Ensure sleep and wake times are different
-            if self.wake_time_expression == self.time_expression:
-                raise ValueError("wake_time_expression must be different from time_expression")
-        
-        return self
+        validate_action_options(self)
 
-class ScheduleUpdate(ScheduleBase):
-    @model_validator(mode='after')
-    def validate_schedule(self):
-        # Validate that SLEEP action has wake_time_expression
-        if self.action == ActionType.SLEEP:
-            if not self.wake_time_expression:
-                raise ValueError("wake_time_expression is required for SLEEP action")
-        
         # Validate time_expression
-        validate_time_format(self.time_expression, self.schedule_type)
+        validate_time_format(self.time_expression, self.schedule_type, self.timezone)
         
         # Validate wake_time_expression if present
         if self.wake_time_expression:
-            validate_time_format(self.wake_time_expression, self.schedule_type)
+            validate_time_format(self.wake_time_expression, self.schedule_type, self.timezone)
             # Ensure sleep and wake times are different
             if self.wake_time_expression == self.time_expression:
                 raise ValueError("wake_time_expression must be different from time_expression")
         
         return self
 
+class ScheduleUpdate(BaseModel):
+    """
+    Fields to change; the ones left out keep their current values. The merged
+    schedule is validated as a ScheduleCreate.
+    """
+    container_ids: Optional[List[str]] = None
+    schedule_name: Optional[str] = None
+    schedule_type: Optional[ScheduleType] = None
+    action: Optional[ActionType] = None
+    time_expression: Optional[str] = None
+    wake_time_expression: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    timezone: Optional[str] = None
+    jitter_seconds: Optional[int] = Field(None, ge=0, le=86400)
+    stagger_seconds: Optional[int] = Field(None, ge=0, le=86400)
+    is_active: Optional[bool] = None
+
 class Schedule(ScheduleBase):
     id: int
 
     class Config:
         from_attributes = True
+
+
+class ScheduleApplyItem(ScheduleCreate):
+    id: Optional[int] = None  # Existing schedule to update (match=id); omitted = create
+
+
+class ScheduleBatchUpdate(ScheduleCreate):
+    id: int
+
+
+class ScheduleBatch(BaseModel):
+    create: List[ScheduleCreate] = []
+    update: List[ScheduleBatchUpdate] = []
+    delete: List[int] = []
+
+
+class ScheduleChange(BaseModel):
+    id: Optional[int] = None  # None for creates in a dry run
+    schedule_name: str
+    fields: List[str] = []  # Fields an update changes
+
+
+class ScheduleBatchResult(BaseModel):
+    dry_run: bool
+    created: List[ScheduleChange]
+    updated: List[ScheduleChange]
+    deleted: List[ScheduleChange]
+    unchanged: int  # Matched schedules left as they were
+
+class UpcomingRun(BaseModel):
+    fire_time: datetime
+    schedule_id: int
+    schedule_name: str
+    job_id: str  # Scheduler job; SLEEP schedules have "<id>_sleep" and "<id>_wake"
+    action: ActionType  # Action this job performs (STOP/START for the two halves of SLEEP)
+    container_ids: List[str]
+    spread_seconds: int = 0  # Containers run up to this long after fire_time (jitter + stagger)
+
+
+class ScheduleConflict(BaseModel):
+    container_id: str
+    kind: str  # "conflict": opposing actions (start/stop); "duplicate": same action from two schedules
+    first: UpcomingRun
+    second: UpcomingRun
+
+
+class UpcomingSchedules(BaseModel):
+    start: datetime
+    end: datetime
+    total: int
+    truncated: bool  # More than `limit` runs in the window (conflicts still cover all of them), or truncated_schedule_ids isn't empty
+    truncated_schedule_ids: List[int] = []  # Schedules firing over SCHEDULE_PREVIEW_MAX_FIRES times before `end`; their later runs are left out
+    runs: List[UpcomingRun]
+    conflicts: List[ScheduleConflict]
+
+
+class ScheduleRunResult(BaseModel):
+    container_id: str
+    ok: bool
+    delay_ms: float  # Jitter/stagger delay before the action was issued
+    latency_ms: float  # Duration of the Docker call
+    error: Optional[str] = None
+
+
+class ScheduleRun(BaseModel):
+    id: int
+    schedule_id: int
+    job_id: str
+    action: Optional[ActionType] = None
+    status: ScheduleRunStatus
+    scheduled_at: datetime  # UTC fire time
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    lag_ms: Optional[float] = None  # started_at - scheduled_at
+    duration_ms: Optional[float] = None
+    containers_total: int
+    containers_failed: int
+    results: List[ScheduleRunResult]
+    detail: Optional[str] = None
+
+
+class LatencyPercentiles(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class ContainerRunStats(BaseModel):
+    container_id: str
+    runs: int
+    failures: int
+    latency_ms: Optional[LatencyPercentiles] = None
+    last_error: Optional[str] = None
+
+
+class ScheduleRunStats(BaseModel):
+    schedule_id: int
+    runs: int  # Runs covered (the most recent `window`)
+    since: Optional[datetime] = None
+    status_counts: Dict[str, int]
+    lag_ms: Optional[LatencyPercentiles] = None
+    duration_ms: Optional[LatencyPercentiles] = None
+    containers: List[ContainerRunStats]  # Slowest p95 first
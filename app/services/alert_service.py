@@ -0,0 +1,270 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import operator
+import threading
+import time
+
+import psutil
+
+from app.db.session import SessionLocal
+from app.models.alert import AlertRule, AlertScope
+from app.models.schedule import ActionType
+from app.services.alert_sinks import build_sink, default_sinks
+from app.services.cluster_service import cluster_service
+from app.services.host_metrics_service import host_metrics_service
+from app.services.scheduler_service import scheduler_service
+from app.services.stats_history_service import stats_history_service
+
+logger = logging.getLogger(__name__)
+
+ALERT_RULES_REVISION = "alert-rules:revision"
+ACTIVE_SHARED_KEY = "alerts:active"
+# Notifications and rule actions run here, off the sampler thread
+ALERT_WORKERS = 4
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+def _utc(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
+
+
+class AlertService:
+    """
+    Threshold alerts over the stats the sampler already collects.
+
+    Rules are evaluated on every stats_history_service tick against that tick's
+    container stats (and host CPU/memory/disk, read once per tick if any host
+    rule exists); nothing is queried back from the database. Each (rule,
+    subject) pair is a small state machine:
+
+    - ok -> pending when the condition starts holding
+    - pending -> firing once it has held for for_seconds (ok again if it stops first)
+    - firing -> ok (resolved) only once the value is back past clear_threshold
+
+    Firing and resolving send a notification to the rule's sinks; firing also
+    runs the rule's container action through the scheduler's execute_action.
+    Evaluation happens on the scheduler leader only, since that is where the
+    sampler runs; the active alerts are shared with the other workers.
+    """
+
+    def __init__(self):
+        self._rules: List[Dict[str, Any]] = []
+        self._revision: Optional[int] = None
+        self._states: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        stats_history_service.add_listener(self.evaluate)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def rules_changed(self):
+        """Called after rule CRUD; the leader reloads its rules on the next tick."""
+        cluster_service.bump_revision(ALERT_RULES_REVISION)
+
+    # --- evaluation ---
+
+    def evaluate(self, sampled_at: datetime, containers: List[Dict[str, Any]]):
+        self._load_rules()
+        now = time.time()
+        host = self._host_metrics() if any(r["scope"] == AlertScope.HOST for r in self._rules) else None
+        with self._lock:
+            for rule in self._rules:
+                seen = set()
+                for subject, name, value in self._values(rule, containers, host):
+                    seen.add(subject)
+                    self._step(rule, subject, name, value, now)
+                # Containers that stopped (or disks that were unmounted) resolve their alerts
+                for key in [k for k in self._states if k[0] == rule["id"] and k[1] not in seen]:
+                    state = self._states.pop(key)
+                    if state["fired_at"] is not None:
+                        self._notify(rule, state, "resolved", now, detail="No longer reported")
+            active = self._active()
+        cluster_service.put_shared(ACTIVE_SHARED_KEY, active)
+
+    def _load_rules(self):
+        revision = cluster_service.get_revision(ALERT_RULES_REVISION)
+        if revision == self._revision:
+            return
+        db = SessionLocal()
+        try:
+            rules = [self._to_dict(rule) for rule in db.query(AlertRule).filter(AlertRule.is_active == True).all()]  # noqa: E712
+        finally:
+            db.close()
+        with self._lock:
+            # A changed rule starts over from ok
+            current = {rule["id"]: rule for rule in rules}
+            previous = {rule["id"]: rule for rule in self._rules}
+            for key in list(self._states):
+                if current.get(key[0]) != previous.get(key[0]) or key[0] not in current:
+                    del self._states[key]
+            self._rules = rules
+            self._revision = revision
+        logger.info(f"Loaded {len(rules)} alert rule(s)")
+
+    @staticmethod
+    def _host_metrics() -> Dict[str, Any]:
+        disks = {}
+        for partition in psutil.disk_partitions(all=False):
+            try:
+                disks[partition.mountpoint] = psutil.disk_usage(partition.mountpoint).percent
+            except (PermissionError, OSError):
+                continue
+        return {
+            # The host sampler's own cpu_times baseline; psutil.cpu_percent(interval=None) shares one with
+            # every other caller. None (no rule fires) until its second sample, or with sampling disabled
+            "cpu_percent": host_metrics_service.snapshot()["cpu_percent"],
+            "memory_percent": psutil.virtual_memory().percent,
+            "swap_percent": psutil.swap_memory().percent,
+            "disks": disks,
+        }
+
+    @staticmethod
+    def _values(rule: Dict[str, Any], containers: List[Dict[str, Any]], host: Optional[Dict[str, Any]]) -> Iterator[Tuple[str, Optional[str], float]]:
+        """(subject, display name, value) for every subject the rule applies to."""
+        metric, target = rule["metric"], rule["target"]
+        if rule["scope"] == AlertScope.CONTAINER:
+            for stats in containers:
+                if target and target != stats["name"] and not (stats["id"].startswith(target) or target.startswith(stats["id"])):
+                    continue
+                if stats.get(metric) is not None:
+                    yield stats["id"], stats["name"], float(stats[metric])
+        elif metric == "disk_percent":
+            for mountpoint, percent in host["disks"].items():
+                if not target or target == mountpoint:
+                    yield mountpoint, mountpoint, percent
+        elif host[metric] is not None:
+            yield "host", None, host[metric]
+
+    def _step(self, rule: Dict[str, Any], subject: str, name: Optional[str], value: float, now: float):
+        compare = OPERATORS[rule["operator"]]
+        key = (rule["id"], subject)
+        state = self._states.get(key)
+        breaching = compare(value, rule["threshold"])
+        if state is None:
+            if not breaching:
+                return
+            state = self._states[key] = {"subject": subject, "name": name, "since": now, "fired_at": None}
+        state["value"] = value
+
+        if state["fired_at"] is None:
+            if not breaching:
+                del self._states[key]
+            elif now - state["since"] >= rule["for_seconds"]:
+                state["fired_at"] = now
+                self._notify(rule, state, "firing", now)
+                if rule["action"] is not None:
+                    self._submit(self._run_action, rule, subject)
+            return
+
+        clear = rule["clear_threshold"] if rule["clear_threshold"] is not None else rule["threshold"]
+        if not compare(value, clear):
+            del self._states[key]
+            self._notify(rule, state, "resolved", now)
+
+    # --- notifications and actions ---
+
+    def _submit(self, fn, *args):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=ALERT_WORKERS, thread_name_prefix="alerts")
+        self._pool.submit(fn, *args)
+
+    def _notify(self, rule: Dict[str, Any], state: Dict[str, Any], status: str, now: float, detail: Optional[str] = None):
+        notification = {
+            "status": status,
+            "rule_id": rule["id"],
+            "rule_name": rule["name"],
+            "scope": rule["scope"].value,
+            "metric": rule["metric"],
+            "condition": f"{rule['metric']} {rule['operator']} {rule['threshold']}",
+            "subject": state["subject"],
+            "subject_name": state["name"],
+            "value": state.get("value"),
+            "since": _utc(state["since"]),
+            "fired_at": _utc(state["fired_at"]),
+            "at": _utc(now),
+            "action": rule["action"].value if rule["action"] and status == "firing" else None,
+            "detail": detail,
+        }
+        logger.warning(f"Alert {status}: {rule['name']} ({notification['condition']}) on {state['name'] or state['subject']}, value {state.get('value')}")
+        self._submit(self._deliver, rule, notification)
+
+    @staticmethod
+    def _deliver(rule: Dict[str, Any], notification: Dict[str, Any]):
+        try:
+            sinks = [build_sink(spec) for spec in rule["sinks"]] if rule["sinks"] is not None else default_sinks()
+        except (ValueError, KeyError) as e:
+            logger.error(f"Alert rule {rule['id']} has an invalid sink: {e}")
+            return
+        for sink in sinks:
+            try:
+                sink.send(notification)
+            except Exception as e:
+                logger.error(f"Alert notification via {type(sink).__name__} failed: {e}")
+
+    @staticmethod
+    def _run_action(rule: Dict[str, Any], subject: str):
+        container_ids = rule["action_container_ids"] or [subject]
+        logger.info(f"Alert {rule['name']}: running {rule['action'].value} on {', '.join(container_ids)}")
+        try:
+            asyncio.run(scheduler_service.execute_action(container_ids, rule["action"], rule["action_options"]))
+        except Exception as e:
+            logger.error(f"Alert {rule['name']}: {rule['action'].value} failed: {e}")
+
+    # --- queries ---
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Pending and firing alerts (from the leader when this worker isn't it)."""
+        if cluster_service.is_leader:
+            with self._lock:
+                return self._active()
+        shared = cluster_service.get_shared(ACTIVE_SHARED_KEY)
+        return (shared[0] or []) if shared else []
+
+    def _active(self) -> List[Dict[str, Any]]:
+        rules = {rule["id"]: rule for rule in self._rules}
+        return [
+            {
+                "rule_id": rule_id,
+                "rule_name": rules[rule_id]["name"],
+                "state": "pending" if state["fired_at"] is None else "firing",
+                "subject": state["subject"],
+                "subject_name": state["name"],
+                "value": state["value"],
+                "threshold": rules[rule_id]["threshold"],
+                "since": _utc(state["since"]),
+                "fired_at": _utc(state["fired_at"]),
+            }
+            for (rule_id, _), state in self._states.items()
+            if rule_id in rules
+        ]
+
+    @staticmethod
+    def _to_dict(rule: AlertRule) -> Dict[str, Any]:
+        return {
+            "id": rule.id,
+            "name": rule.name,
+            "scope": rule.scope,
+            "metric": rule.metric,
+            "target": rule.target,
+            "operator": rule.operator,
+            "threshold": rule.threshold,
+            "clear_threshold": rule.clear_threshold,
+            "for_seconds": rule.for_seconds or 0,
+            "action": ActionType(rule.action) if rule.action else None,
+            "action_container_ids": json.loads(rule.action_container_ids) if rule.action_container_ids else None,
+            "action_options": json.loads(rule.action_options) if rule.action_options else None,
+            "sinks": json.loads(rule.sinks) if rule.sinks else None,
+        }
+
+
+alert_service = AlertService()
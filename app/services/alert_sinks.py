@@ -0,0 +1,77 @@
+"""
+Where alert notifications go. A sink is anything with `send(notification)`;
+`build_sink` turns a rule's sink spec ({"type": ..., ...}) into one, and
+`register_sink_type` adds new types.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSink:
+    def send(self, notification: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class WebhookSink(AlertSink):
+    """POSTs each notification as JSON."""
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def send(self, notification: Dict[str, Any]) -> None:
+        import httpx
+        response = httpx.post(self.url, content=json.dumps(notification, default=str), timeout=self.timeout,
+                              headers={"Content-Type": "application/json", **self.headers})
+        response.raise_for_status()
+
+
+class FileSink(AlertSink):
+    """Appends each notification to a file as one JSON line."""
+
+    _locks: Dict[str, threading.Lock] = {}
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = self._locks.setdefault(str(self.path), threading.Lock())
+
+    def send(self, notification: Dict[str, Any]) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(json.dumps(notification, default=str) + "\n")
+
+
+SINK_TYPES: Dict[str, Callable[..., AlertSink]] = {
+    "webhook": lambda spec: WebhookSink(spec["url"], spec.get("headers")),
+    "file": lambda spec: FileSink(spec["path"]),
+}
+
+
+def register_sink_type(name: str, factory: Callable[[Dict[str, Any]], AlertSink]):
+    SINK_TYPES[name] = factory
+
+
+def build_sink(spec: Dict[str, Any]) -> AlertSink:
+    factory = SINK_TYPES.get(spec.get("type"))
+    if factory is None:
+        raise ValueError(f"Unknown alert sink type: {spec.get('type')}")
+    return factory(spec)
+
+
+def default_sinks() -> List[AlertSink]:
+    """Sinks for rules that don't name their own (ALERT_WEBHOOK_URL / ALERT_FILE_PATH)."""
+    sinks: List[AlertSink] = []
+    if settings.ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.ALERT_WEBHOOK_URL))
+    if settings.ALERT_FILE_PATH:
+        sinks.append(FileSink(settings.ALERT_FILE_PATH))
+    return sinks
@@ -0,0 +1,282 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy import Integer, cast, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.cluster import Lease, SharedCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEASE = "scheduler"
+WORKER_LEASE_PREFIX = "worker:"
+SCHEDULES_REVISION = "revision:schedules"
+# Lease TTLs a worker may miss before its queued/running jobs are failed as orphaned
+ORPHAN_GRACE_TTLS = 4
+
+
+class ClusterService:
+    """
+    Coordination between uvicorn worker processes sharing one SQLite database.
+
+    Every worker heartbeats a "worker:<id>" lease. One worker at a time holds the
+    "scheduler" lease and is the only one whose APScheduler fires jobs; the others
+    keep their scheduler paused and take over once the leader's lease lapses.
+    Schedule changes made through any worker bump a shared revision so every
+    worker reloads its jobs. Leases are renewed every WORKER_LEASE_TTL / 3 seconds.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._seen_revision: Optional[int] = None
+
+    # --- leases ---
+
+    def try_acquire(self, name: str, ttl: float) -> bool:
+        """Take or renew the named lease if it is free, expired or already ours."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        db = SessionLocal()
+        try:
+            renewed = db.execute(
+                update(Lease)
+                .where(Lease.name == name)
+                .where((Lease.holder == self.worker_id) | (Lease.expires_at < now))
+                .values(holder=self.worker_id, expires_at=expires_at)
+            ).rowcount
+            if not renewed:
+                # First claim ever: the insert is a no-op if another worker holds it
+                renewed = db.execute(
+                    insert(Lease)
+                    .values(name=name, holder=self.worker_id, expires_at=expires_at)
+                    .on_conflict_do_nothing()
+                ).rowcount
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def get_lease(self, name: str) -> Optional[Tuple[str, datetime]]:
+        """(holder, expires_at) of the named lease, or None if nobody has taken or kept it."""
+        db = SessionLocal()
+        try:
+            lease = db.query(Lease).filter(Lease.name == name).first()
+            return (lease.holder, lease.expires_at) if lease else None
+        finally:
+            db.close()
+
+    def release(self, name: str):
+        db = SessionLocal()
+        try:
+            db.query(Lease).filter(Lease.name == name, Lease.holder == self.worker_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def recent_workers(self, within: float) -> Set[str]:
+        """Workers whose lease is current or lapsed less than `within` seconds ago."""
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=within)
+            leases = db.query(Lease.holder).filter(Lease.name.startswith(WORKER_LEASE_PREFIX), Lease.expires_at >= cutoff)
+            return {holder for (holder,) in leases}
+        finally:
+            db.close()
+
+    def live_workers(self) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            leader = db.query(Lease).filter(Lease.name == SCHEDULER_LEASE, Lease.expires_at >= now).first()
+            workers = (
+                db.query(Lease)
+                .filter(Lease.name.startswith(WORKER_LEASE_PREFIX), Lease.expires_at >= now)
+                .order_by(Lease.name)
+                .all()
+            )
+            return [
+                {
+                    "worker_id": lease.holder,
+                    "leader": bool(leader and leader.holder == lease.holder),
+                    "current": lease.holder == self.worker_id,
+                    "expires_at": lease.expires_at,
+                }
+                for lease in workers
+            ]
+        finally:
+            db.close()
+
+    # --- shared cache ---
+
+    def get_shared(self, key: str) -> Optional[Tuple[Any, datetime]]:
+        """(value, updated_at) of a shared entry, or None if it doesn't exist."""
+        db = SessionLocal()
+        try:
+            entry = db.query(SharedCache).filter(SharedCache.key == key).first()
+            if entry is None:
+                return None
+            return (json.loads(entry.value) if entry.value else None), entry.updated_at
+        finally:
+            db.close()
+
+    def put_shared(self, key: str, value: Any, updated_at: Optional[datetime] = None):
+        row = {"key": key, "value": json.dumps(value, default=str), "updated_at": updated_at or datetime.utcnow()}
+        db = SessionLocal()
+        try:
+            db.execute(insert(SharedCache).values(**row).on_conflict_do_update(index_elements=["key"], set_=row))
+            db.commit()
+        finally:
+            db.close()
+
+    def delete_shared(self, key: str):
+        db = SessionLocal()
+        try:
+            db.query(SharedCache).filter(SharedCache.key == key).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def expire_shared(self, prefix: str, before: datetime) -> int:
+        """Delete shared entries under `prefix` last updated before `before`."""
+        db = SessionLocal()
+        try:
+            removed = (
+                db.query(SharedCache)
+                .filter(SharedCache.key.startswith(prefix), SharedCache.updated_at < before)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def get_revision(self, key: str) -> int:
+        entry = self.get_shared(key)
+        return int(entry[0]) if entry and entry[0] is not None else 0
+
+    def bump_revision(self, key: str) -> int:
+        db = SessionLocal()
+        try:
+            db.execute(
+                insert(SharedCache)
+                .values(key=key, value="1", updated_at=datetime.utcnow())
+                .on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={"value": cast(SharedCache.value, Integer) + 1, "updated_at": datetime.utcnow()},
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+        return self.get_revision(key)
+
+    def schedules_changed(self):
+        """Called after schedule CRUD so the other workers reload their jobs."""
+        revision = self.bump_revision(SCHEDULES_REVISION)
+        # This worker already applied the change itself
+        if self._seen_revision is not None and revision == self._seen_revision + 1:
+            self._seen_revision = revision
+
+    # --- lifecycle ---
+
+    @contextmanager
+    def startup_lock(self) -> Iterator[None]:
+        """
+        Serialise schema creation and seeding between workers starting at the same time
+        (an exclusive lock on a file next to the SQLite database).
+        """
+        url = make_url(settings.SQLALCHEMY_DATABASE_URI)
+        if fcntl is None or url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+            yield
+            return
+        lock_path = Path(url.database).with_suffix(".startup.lock")
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def start(self):
+        await self.tick()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_leader(False)
+        # Let another worker take over immediately instead of waiting out the TTL
+        await asyncio.to_thread(self.release, SCHEDULER_LEASE)
+        await asyncio.to_thread(self.release, WORKER_LEASE_PREFIX + self.worker_id)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(settings.WORKER_LEASE_TTL / 3)
+            try:
+                await self.tick()
+            except Exception as e:
+                # Can't confirm the lease; stop firing jobs rather than risk running them twice
+                logger.error(f"Lease renewal failed: {e}")
+                self._set_leader(False)
+
+    async def tick(self):
+        ttl = settings.WORKER_LEASE_TTL
+        await asyncio.to_thread(self.try_acquire, WORKER_LEASE_PREFIX + self.worker_id, ttl)
+        # If this worker takes over, jobs are covered from where the previous leader's lease ran out
+        previous = None if self.is_leader else await asyncio.to_thread(self.get_lease, SCHEDULER_LEASE)
+        leader = await asyncio.to_thread(self.try_acquire, SCHEDULER_LEASE, ttl)
+
+        from app.services.scheduler_service import scheduler_service
+        revision = await asyncio.to_thread(self.get_revision, SCHEDULES_REVISION)
+        if self._seen_revision is not None and revision != self._seen_revision:
+            logger.info(f"Schedules changed in another worker (revision {revision}), reloading")
+            await asyncio.to_thread(scheduler_service.reload_jobs)
+        self._seen_revision = revision
+
+        since = None
+        if previous is not None and previous[0] != self.worker_id:
+            since = min(previous[1], datetime.utcnow()).replace(tzinfo=timezone.utc)
+        self._set_leader(leader, since)
+        if leader:
+            from app.services.job_service import job_service
+            # A worker that is only late renewing (GC pause, blocked loop) keeps its jobs
+            alive = await asyncio.to_thread(self.recent_workers, ttl * ORPHAN_GRACE_TTLS)
+            await asyncio.to_thread(job_service.fail_orphaned, alive)
+
+    def _set_leader(self, leader: bool, since: Optional[datetime] = None):
+        if leader == self.is_leader:
+            return
+        from app.services.scheduler_service import scheduler_service
+        self.is_leader = leader
+        if leader:
+            logger.info(f"Worker {self.worker_id} is now the scheduler leader")
+            scheduler_service.resume(since)
+        else:
+            logger.info(f"Worker {self.worker_id} is no longer the scheduler leader")
+            scheduler_service.pause()
+
+
+cluster_service = ClusterService()
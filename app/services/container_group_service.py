@@ -0,0 +1,227 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+import logging
+import threading
+import time
+
+from app.services.docker_service import docker_service
+from app.services.stats_history_service import stats_history_service
+
+logger = logging.getLogger(__name__)
+
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+# Shorthands accepted for `by`; anything else is taken as a label key
+GROUP_ALIASES = {
+    "compose": COMPOSE_PROJECT_LABEL,
+    "compose_service": "com.docker.compose.service",
+}
+# Containers in a group action run in parallel, at most
+MAX_PARALLEL_ACTIONS = 8
+# Rollup totals; each is summed over the group's running containers
+ROLLUP_FIELDS = ("cpu_percent", "memory_usage", "network_input", "network_output", "block_read", "block_write", "pids")
+
+
+def label_key(by: str) -> str:
+    return GROUP_ALIASES.get(by, by)
+
+
+class ContainerGroupService:
+    """
+    Groups containers by compose project or any label.
+
+    Membership comes from one container list call (labels are part of it, so no
+    per-container inspect). The service keeps the previous listing and an index
+    per label key (value -> container IDs) and applies only the differences on
+    each sync: containers that appeared, disappeared or changed labels. An index
+    for a new label key is built once on first use and then kept up to date the
+    same way.
+
+    Resource rollups sum the stats sampler's latest tick per group (live stats
+    only when sampling is off or hasn't ticked yet), and group actions run the
+    per-container calls in parallel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._containers: Dict[str, Dict[str, Any]] = {}  # full ID -> {id, name, state, labels}
+        self._index: Dict[str, Dict[Optional[str], Set[str]]] = {}  # label key -> value -> full IDs
+
+    # --- membership ---
+
+    def sync(self):
+        current = {c["id"]: c for c in docker_service.container_labels()}
+        with self._lock:
+            for container_id in set(self._containers) - set(current):
+                self._remove(container_id)
+            for container_id, container in current.items():
+                previous = self._containers.get(container_id)
+                if previous is not None and previous["labels"] == container["labels"]:
+                    # Only state or name changed; the index is unaffected
+                    self._containers[container_id] = container
+                    continue
+                if previous is not None:
+                    self._remove(container_id)
+                self._add(container)
+
+    def _add(self, container: Dict[str, Any]):
+        self._containers[container["id"]] = container
+        for key, groups in self._index.items():
+            groups.setdefault(container["labels"].get(key), set()).add(container["id"])
+
+    def _remove(self, container_id: str):
+        container = self._containers.pop(container_id)
+        for key, groups in self._index.items():
+            value = container["labels"].get(key)
+            members = groups.get(value)
+            if members is not None:
+                members.discard(container_id)
+                if not members:
+                    del groups[value]
+
+    def _groups(self, key: str) -> Dict[Optional[str], Set[str]]:
+        """The index for a label key (lock held), built on first use."""
+        if key not in self._index:
+            groups: Dict[Optional[str], Set[str]] = {}
+            for container_id, container in self._containers.items():
+                groups.setdefault(container["labels"].get(key), set()).add(container_id)
+            self._index[key] = groups
+        return self._index[key]
+
+    def groups(self, by: str = "compose") -> List[Dict[str, Any]]:
+        """Every group for `by`; containers without the label form the group with value None."""
+        key = label_key(by)
+        self.sync()
+        with self._lock:
+            result = [
+                {
+                    "label": key,
+                    "value": value,
+                    "total": len(members),
+                    "running": sum(1 for cid in members if self._containers[cid]["state"] == "running"),
+                    "containers": sorted(
+                        (
+                            {"id": cid[:12], "name": self._containers[cid]["name"], "state": self._containers[cid]["state"]}
+                            for cid in members
+                        ),
+                        key=lambda c: c["name"],
+                    ),
+                }
+                for value, members in self._groups(key).items()
+            ]
+        result.sort(key=lambda g: (g["value"] is None, g["value"] or ""))
+        return result
+
+    def members(self, by: str, value: str) -> List[Dict[str, Any]]:
+        key = label_key(by)
+        self.sync()
+        with self._lock:
+            return sorted((self._containers[cid] for cid in self._groups(key).get(value, ())), key=lambda c: c["name"])
+
+    # --- rollups ---
+
+    def rollups(self, by: str = "compose") -> List[Dict[str, Any]]:
+        """CPU/memory/network/block I/O totals per group from the stats sampler's latest tick."""
+        groups = self.groups(by)
+        sample = stats_history_service.last_sample()
+        if sample is None:
+            sample = (datetime.utcnow(), docker_service.get_all_container_stats())
+        sampled_at, container_stats_list = sample
+        stats = {s["id"]: s for s in container_stats_list}
+        result = []
+        for group in groups:
+            totals = {field: 0 for field in ROLLUP_FIELDS}
+            sampled = 0
+            for container in group["containers"]:
+                container_stats = stats.get(container["id"])
+                if container_stats is None:
+                    continue
+                sampled += 1
+                for field in ROLLUP_FIELDS:
+                    totals[field] += container_stats.get(field) or 0
+            totals["cpu_percent"] = round(totals["cpu_percent"], 2)
+            result.append({
+                "label": group["label"],
+                "value": group["value"],
+                "total": group["total"],
+                "running": group["running"],
+                "sampled": sampled,
+                "sampled_at": sampled_at,
+                **totals,
+            })
+        return result
+
+    # --- actions ---
+
+    def run_action(
+        self,
+        by: str,
+        value: str,
+        action: str,
+        report: Optional[Callable[..., None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Start, stop or restart every container of a group. Stops and restarts run
+        in parallel; starts go through startup_service, in parallel level by level
+        in compose depends_on order. None if the group has no containers.
+        """
+        members = self.members(by, value)
+        if not members:
+            return None
+        if report:
+            report(f"Running {action} on {len(members)} container(s) of {label_key(by)}={value}")
+        started = time.monotonic()
+        if action == "start":
+            results = self._start(members, report)
+        else:
+            results = self._parallel(members, action)
+        failed = sum(1 for r in results if not r["success"])
+        if failed:
+            logger.warning(f"Group {action} on {label_key(by)}={value}: {failed}/{len(results)} container(s) failed")
+        return {
+            "label": label_key(by),
+            "value": value,
+            "action": action,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "containers": results,
+        }
+
+    @staticmethod
+    def _start(members: List[Dict[str, Any]], report: Optional[Callable[..., None]]) -> List[Dict[str, Any]]:
+        # Imported here: startup_service uses this module's compose label constants
+        from app.services.startup_service import startup_service
+        result = startup_service.start([m["id"] for m in members], report=report)
+        return [
+            {
+                "container_id": step["container_id"],
+                "name": step["name"],
+                "success": step["status"] not in ("failed", "skipped"),
+                "message": step.get("error"),
+            }
+            for step in result["containers"]
+        ]
+
+    @staticmethod
+    def _parallel(members: List[Dict[str, Any]], action: str) -> List[Dict[str, Any]]:
+        call = {
+            "stop": docker_service.stop_container,
+            "restart": docker_service.restart_container,
+        }[action]
+
+        def perform(container: Dict[str, Any]) -> Dict[str, Any]:
+            entry = {"container_id": container["id"][:12], "name": container["name"], "success": False, "message": None}
+            try:
+                entry["success"] = call(container["id"])
+                if not entry["success"]:
+                    entry["message"] = f"Failed to {action} container"
+            except Exception as e:
+                entry["message"] = f"{type(e).__name__}: {e}"
+            return entry
+
+        with ThreadPoolExecutor(max_workers=min(len(members), MAX_PARALLEL_ACTIONS), thread_name_prefix="group-action") as pool:
+            return list(pool.map(perform, members))
+
+
+container_group_service = ContainerGroupService()
@@ -0,0 +1,258 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.services.cluster_service import cluster_service
+from app.services.docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+SHARED_KEY = "cache:docker-df"
+REFRESH_LEASE = "refresh:docker-df"
+
+
+def is_dangling(image: Dict[str, Any]) -> bool:
+    tags = image.get("RepoTags") or []
+    return not tags or tags == ["<none>:<none>"]
+
+
+def unique_size(image: Dict[str, Any]) -> int:
+    """Bytes only this image holds (layers not shared with any other image)."""
+    size = image.get("Size") or 0
+    shared = image.get("SharedSize") or 0
+    return max(size - shared, 0) if shared >= 0 else size
+
+
+def summarize(df: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce raw `docker system df` output to per-category totals and reclaimable bytes."""
+    images = df.get("Images") or []
+    containers = df.get("Containers") or []
+    volumes = df.get("Volumes") or []
+    build_cache = df.get("BuildCache") or []
+    layers_size = df.get("LayersSize") or 0
+
+    # Same accounting as `docker system df`: everything not held by an image in use is reclaimable
+    used_image_bytes = sum(unique_size(img) for img in images if (img.get("Containers") or 0) > 0)
+    image_details = [
+        {
+            "id": img["Id"],
+            "tags": img.get("RepoTags") or [],
+            "size": img.get("Size") or 0,
+            "shared_size": max(img.get("SharedSize") or 0, 0),
+            "unique_size": unique_size(img),
+            "containers": max(img.get("Containers") or 0, 0),
+            "created": img.get("Created"),
+        }
+        for img in images
+    ]
+    image_details.sort(key=lambda img: img["unique_size"], reverse=True)
+
+    container_size = sum(c.get("SizeRw") or 0 for c in containers)
+    stopped_size = sum(c.get("SizeRw") or 0 for c in containers if c.get("State") != "running")
+
+    volume_usage = [v.get("UsageData") or {} for v in volumes]
+    volume_size = sum(max(u.get("Size", 0), 0) for u in volume_usage)
+    unused_volume_size = sum(max(u.get("Size", 0), 0) for u in volume_usage if u.get("RefCount", 0) == 0)
+
+    cache_size = sum(entry.get("Size") or 0 for entry in build_cache)
+    idle_cache_size = sum(
+        entry.get("Size") or 0 for entry in build_cache if not entry.get("InUse") and not entry.get("Shared")
+    )
+
+    categories = {
+        "images": {
+            "count": len(images),
+            "active": sum(1 for img in images if (img.get("Containers") or 0) > 0),
+            "size": layers_size,
+            "shared_size": sum(max(img.get("SharedSize") or 0, 0) for img in images),
+            "unique_size": sum(unique_size(img) for img in images),
+            "reclaimable": max(layers_size - used_image_bytes, 0),
+        },
+        "containers": {
+            "count": len(containers),
+            "active": sum(1 for c in containers if c.get("State") == "running"),
+            "size": container_size,
+            "reclaimable": stopped_size,
+        },
+        "volumes": {
+            "count": len(volumes),
+            "active": sum(1 for u in volume_usage if u.get("RefCount", 0) > 0),
+            "size": volume_size,
+            "reclaimable": unused_volume_size,
+        },
+        "build_cache": {
+            "count": len(build_cache),
+            "active": sum(1 for entry in build_cache if entry.get("InUse")),
+            "size": cache_size,
+            "reclaimable": idle_cache_size,
+        },
+    }
+    return {
+        **categories,
+        "total_size": sum(c["size"] for c in categories.values()),
+        "total_reclaimable": sum(c["reclaimable"] for c in categories.values()),
+        "image_details": image_details,
+    }
+
+
+class DiskUsageService:
+    """
+    Caches `docker system df`. Readers get the cached snapshot; once it is older
+    than DOCKER_DF_TTL a single background refresh is started and the stale copy is
+    served until it lands. Only the first read, and the first read after a mutating
+    call invalidated the snapshot, wait on the daemon.
+
+    Snapshots are also written to the shared cache table, so with several workers
+    only one of them runs the (expensive) df per TTL and the others adopt its result.
+
+    Every invalidation bumps a generation counter; a df that started before the
+    invalidation is dropped when it lands instead of replacing the snapshot with
+    pre-prune numbers.
+    """
+
+    def __init__(self):
+        self._raw: Optional[Dict[str, Any]] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._fetched_at: Optional[datetime] = None
+        self._refreshing = False
+        self._invalidated = False
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict[str, Any]:
+        self._ensure_fresh()
+        return self._with_meta(self._summary)
+
+    def raw(self) -> Dict[str, Any]:
+        self._ensure_fresh()
+        return self._raw
+
+    def invalidate(self):
+        """Drop the snapshot after a mutating call (prune, delete) so the next read fetches a fresh one."""
+        with self._lock:
+            self._generation += 1
+            self._invalidated = True
+        try:
+            cluster_service.delete_shared(SHARED_KEY)
+        except Exception as e:
+            logger.error(f"Failed to invalidate shared docker df snapshot: {e}")
+
+    def refresh(self):
+        started = time.perf_counter()
+        generation = self._generation
+        raw = docker_service.disk_usage()
+        fetched_at = datetime.utcnow()
+        if not self._store(raw, fetched_at, generation):
+            logger.info("Discarded docker system df that started before the snapshot was invalidated")
+            return
+        try:
+            cluster_service.put_shared(SHARED_KEY, raw, updated_at=fetched_at)
+        except Exception as e:
+            logger.error(f"Failed to share docker df snapshot: {e}")
+        logger.info(f"Refreshed docker system df in {time.perf_counter() - started:.2f}s")
+
+    def prune_preview(self, all_unused: bool = False) -> Dict[str, Any]:
+        """
+        Exactly what `images.prune` would remove from the current snapshot and the bytes it would free.
+        Default prune only removes dangling images; all_unused matches `docker image prune -a`.
+        """
+        raw = self.raw()
+        images = raw.get("Images") or []
+        candidates = [
+            img for img in images
+            if (img.get("Containers") or 0) <= 0 and (all_unused or is_dangling(img))
+        ]
+        if all_unused:
+            # Removing every unused image frees everything not held by an image in use
+            kept = sum(unique_size(img) for img in images if (img.get("Containers") or 0) > 0)
+            reclaimable = max((raw.get("LayersSize") or 0) - kept, 0)
+        else:
+            reclaimable = sum(unique_size(img) for img in candidates)
+        return self._with_meta({
+            "images": [{"id": img["Id"], "tags": img.get("RepoTags") or [], "unique_size": unique_size(img)} for img in candidates],
+            "image_count": len(candidates),
+            "reclaimable_bytes": reclaimable,
+        })
+
+    def prime(self):
+        """Startup warmup: adopt another worker's snapshot, or fetch one if none exists."""
+        self._adopt_shared()
+        if self._summary is None:
+            self._refresh_once_across_workers()
+
+    def _refresh_once_across_workers(self):
+        # One worker refreshes; the others keep serving what they have and adopt its snapshot
+        if cluster_service.try_acquire(REFRESH_LEASE, settings.DOCKER_TIMEOUT):
+            try:
+                self.refresh()
+            finally:
+                cluster_service.release(REFRESH_LEASE)
+
+    def _ensure_fresh(self):
+        if self._summary is None or self._invalidated or self._age() > settings.DOCKER_DF_TTL:
+            # Another worker may have fetched a newer snapshot
+            self._adopt_shared()
+        if self._summary is None or self._invalidated:
+            self.refresh()
+        elif self._age() > settings.DOCKER_DF_TTL:
+            self._refresh_in_background()
+
+    def _adopt_shared(self):
+        generation = self._generation
+        try:
+            shared = cluster_service.get_shared(SHARED_KEY)
+        except Exception as e:
+            logger.error(f"Failed to read shared docker df snapshot: {e}")
+            return
+        if shared is None:
+            return
+        raw, fetched_at = shared
+        if self._fetched_at is None or fetched_at > self._fetched_at:
+            self._store(raw, fetched_at, generation)
+
+    def _store(self, raw: Dict[str, Any], fetched_at: datetime, generation: int) -> bool:
+        """Install a snapshot unless the cache was invalidated after it was requested."""
+        summary = summarize(raw)
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._raw = raw
+            self._summary = summary
+            self._fetched_at = fetched_at
+            self._invalidated = False
+        return True
+
+    def _age(self) -> float:
+        if self._fetched_at is None:
+            return float("inf")
+        return (datetime.utcnow() - self._fetched_at).total_seconds()
+
+    def _with_meta(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **data,
+            "fetched_at": self._fetched_at,
+            "age_seconds": round(self._age(), 1),
+            "stale": self._age() > settings.DOCKER_DF_TTL,
+        }
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh_once_across_workers()
+            except Exception as e:
+                logger.error(f"Background docker df refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="docker-df-refresh", daemon=True).start()
+
+
+disk_usage_service = DiskUsageService()
@@ -0,0 +1,350 @@
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.docker_event import DockerEvent
+from app.services.cluster_service import cluster_service
+from app.services.docker_service import docker_service, DockerUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# The stream is reopened this often (with `since` = where it stopped) so leadership
+# changes and shutdown are noticed and buffered events get flushed
+STREAM_WINDOW = 5.0
+# How often old events are pruned, at most
+PRUNE_INTERVAL = 3600
+FLAGS_SHARED_KEY = "docker-events:flags"
+# Container actions the sliding-window counters care about
+TRACKED_ACTIONS = ("oom", "die", "kill", "start", "restart", "health_status")
+
+
+def _is_id_prefix(value: str) -> bool:
+    return len(value) >= 4 and all(c in "0123456789abcdef" for c in value)
+
+
+class DockerEventService:
+    """
+    Consumes the daemon's event stream into the `dockerevent` table and keeps
+    sliding-window counters per container to flag trouble early:
+
+    - oom_killed: the kernel OOM-killed a process in the container
+    - crash_loop: DOCKER_EVENT_LOOP_THRESHOLD or more unexpected exits (non-zero
+      exit code not preceded by a stop/kill request) within DOCKER_EVENT_WINDOW
+    - restart_loop: as many restarts (a start right after a die) in the window
+    - unhealthy / health_flapping: the HEALTHCHECK currently fails, or went
+      unhealthy that many times in the window
+
+    Only the scheduler leader consumes the stream (every worker would otherwise
+    store each event again). It resumes from the newest stored event, so
+    nothing is lost across restarts and failovers. Rows are inserted in batches.
+    The leader republishes the flags to the shared cache for the other workers
+    after every stream window, so counts age out there too when nothing happens.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stream = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._cursor: Optional[int] = None  # time_nano the stream resumes from; None until leader
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Dict[str, Deque[float]]] = defaultdict(lambda: defaultdict(deque))
+        self._health: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._last_kill: Dict[str, float] = {}
+        self._last_die: Dict[str, float] = {}
+
+    # --- lifecycle ---
+
+    def start(self):
+        if self._thread is None and settings.DOCKER_EVENTS_ENABLED:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="docker-events", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            stream = self._stream
+            if stream is not None:
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+            self._thread.join(timeout=STREAM_WINDOW + 1)
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not cluster_service.is_leader:
+                self._cursor = None
+                self._stop.wait(1)
+                continue
+            try:
+                if self._cursor is None:
+                    self._cursor = self._resume_point()
+                    self._rebuild_counters()
+                self._consume_window()
+                self.flush()
+                cluster_service.put_shared(FLAGS_SHARED_KEY, self._compute_flags())
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    self.prune()
+            except DockerUnavailableError as e:
+                logger.debug(f"Docker event stream unavailable: {e}")
+                self._stop.wait(STREAM_WINDOW)
+            except Exception as e:
+                logger.error(f"Docker event stream failed: {e}")
+                self._stop.wait(STREAM_WINDOW)
+
+    def _resume_point(self) -> int:
+        db = SessionLocal()
+        try:
+            newest = db.query(func.max(DockerEvent.time_nano)).scalar()
+        finally:
+            db.close()
+        oldest_allowed = time.time_ns() - settings.DOCKER_EVENT_RETENTION_DAYS * 86400 * 10 ** 9
+        return max(newest or time.time_ns(), oldest_allowed)
+
+    def _consume_window(self):
+        until = time.time() + STREAM_WINDOW
+        since = f"{self._cursor // 10 ** 9}.{self._cursor % 10 ** 9:09d}"
+        self._stream = docker_service.events(since=since, until=int(until))
+        try:
+            for event in self._stream:
+                self._handle(event)
+                if len(self._buffer) >= settings.DOCKER_EVENT_BATCH_SIZE:
+                    self.flush()
+        finally:
+            self._stream = None
+        # Everything up to `until` has been delivered
+        self._cursor = max(self._cursor, int(until) * 10 ** 9)
+
+    def _handle(self, event: Dict[str, Any]):
+        actor = event.get("Actor") or {}
+        attributes = actor.get("Attributes") or {}
+        event_type = event.get("Type") or "unknown"
+        action = event.get("Action") or event.get("status") or ""
+        time_nano = event.get("timeNano") or int(event.get("time", time.time()) * 10 ** 9)
+        actor_id = actor.get("ID") or event.get("id") or ""
+        exit_code = attributes.get("exitCode")
+        row = {
+            "time": datetime.utcfromtimestamp(time_nano / 10 ** 9),
+            "time_nano": time_nano,
+            "type": event_type,
+            "action": action,
+            "actor_id": actor_id,
+            "container_name": attributes.get("name") if event_type == "container" else None,
+            "exit_code": int(exit_code) if exit_code is not None and str(exit_code).lstrip("-").isdigit() else None,
+            "attributes": json.dumps(attributes) if attributes else None,
+        }
+        with self._lock:
+            self._buffer.append(row)
+            if event_type == "container":
+                self._count(row)
+        self._cursor = max(self._cursor or 0, time_nano)
+
+    # --- counters ---
+
+    def _count(self, row: Dict[str, Any]):
+        """Update the sliding-window counters for one container event (lock held)."""
+        container_id = row["actor_id"]
+        at = row["time_nano"] / 10 ** 9
+        action = row["action"]
+        windows = self._windows[container_id]
+        if row["container_name"]:
+            self._names[container_id] = row["container_name"]
+
+        if action == "oom":
+            windows["oom"].append(at)
+        elif action == "kill":
+            self._last_kill[container_id] = at
+        elif action == "die":
+            self._last_die[container_id] = at
+            requested = at - self._last_kill.get(container_id, 0) <= settings.DOCKER_STOP_TIMEOUT + 5
+            if row["exit_code"] and not requested:
+                windows["crash"].append(at)
+        elif action in ("start", "restart"):
+            # Docker's restart policy and `docker restart` both show up as die followed by start
+            if action == "restart" or at - self._last_die.get(container_id, 0) <= 60:
+                windows["restart"].append(at)
+                self._last_die.pop(container_id, None)
+        elif action.startswith("health_status"):
+            status = action.split(":", 1)[-1].strip()
+            if status == "unhealthy" and self._health.get(container_id) != "unhealthy":
+                windows["unhealthy"].append(at)
+            self._health[container_id] = status
+
+    def _rebuild_counters(self):
+        """Replay the last window from the table after becoming leader."""
+        since = datetime.utcnow() - timedelta(seconds=settings.DOCKER_EVENT_WINDOW)
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(DockerEvent)
+                .filter(DockerEvent.type == "container", DockerEvent.time >= since)
+                .order_by(DockerEvent.time_nano)
+                .all()
+            )
+            replay = [
+                {
+                    "actor_id": r.actor_id,
+                    "time_nano": r.time_nano,
+                    "action": r.action,
+                    "container_name": r.container_name,
+                    "exit_code": r.exit_code,
+                }
+                for r in rows
+                if r.action.split(":")[0] in TRACKED_ACTIONS
+            ]
+        finally:
+            db.close()
+        with self._lock:
+            self._windows.clear()
+            self._health.clear()
+            self._last_kill.clear()
+            self._last_die.clear()
+            for row in replay:
+                self._count(row)
+
+    def _compute_flags(self) -> List[Dict[str, Any]]:
+        cutoff = time.time() - settings.DOCKER_EVENT_WINDOW
+        threshold = settings.DOCKER_EVENT_LOOP_THRESHOLD
+        result = []
+        with self._lock:
+            for container_id in list(self._windows):
+                windows = self._windows[container_id]
+                for timestamps in windows.values():
+                    while timestamps and timestamps[0] < cutoff:
+                        timestamps.popleft()
+                counts = {kind: len(windows.get(kind, ())) for kind in ("oom", "crash", "restart", "unhealthy")}
+                health = self._health.get(container_id)
+                flags = []
+                if counts["oom"]:
+                    flags.append("oom_killed")
+                if counts["crash"] >= threshold:
+                    flags.append("crash_loop")
+                if counts["restart"] >= threshold:
+                    flags.append("restart_loop")
+                if health == "unhealthy":
+                    flags.append("unhealthy")
+                if counts["unhealthy"] >= threshold:
+                    flags.append("health_flapping")
+                if not any(counts.values()) and health != "unhealthy":
+                    if not any(windows.values()):
+                        del self._windows[container_id]
+                    continue
+                result.append({
+                    "container_id": container_id[:12],
+                    "name": self._names.get(container_id),
+                    "oom_kills": counts["oom"],
+                    "crashes": counts["crash"],
+                    "restarts": counts["restart"],
+                    "unhealthy_transitions": counts["unhealthy"],
+                    "health": health,
+                    "flags": flags,
+                })
+        result.sort(key=lambda c: (len(c["flags"]), c["crashes"] + c["restarts"] + c["oom_kills"]), reverse=True)
+        return result
+
+    def flags(self) -> Dict[str, Any]:
+        """Per-container counters and flags over the last DOCKER_EVENT_WINDOW seconds."""
+        if cluster_service.is_leader or not settings.DOCKER_EVENTS_ENABLED:
+            return {"window_seconds": settings.DOCKER_EVENT_WINDOW, "updated_at": datetime.utcnow(), "containers": self._compute_flags()}
+        shared = cluster_service.get_shared(FLAGS_SHARED_KEY)
+        containers, updated_at = shared if shared else ([], None)
+        return {"window_seconds": settings.DOCKER_EVENT_WINDOW, "updated_at": updated_at, "containers": containers or []}
+
+    # --- storage ---
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(DockerEvent).on_conflict_do_nothing(), batch)
+            db.commit()
+        finally:
+            db.close()
+
+    def prune(self) -> int:
+        self._last_prune = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=settings.DOCKER_EVENT_RETENTION_DAYS)
+        db = SessionLocal()
+        try:
+            removed = db.query(DockerEvent).filter(DockerEvent.time < cutoff).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if removed:
+            logger.info(f"Pruned {removed} Docker event(s) older than {settings.DOCKER_EVENT_RETENTION_DAYS} days")
+        return removed
+
+    def query(
+        self,
+        container: Optional[str] = None,
+        event_type: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Newest first. The time range is always bounded (default: the last 24 hours)
+        and combined with an indexed column, so the table is never scanned whole.
+        `container` is an ID prefix or a container name.
+        """
+        until = until or datetime.utcnow()
+        since = since or until - timedelta(hours=24)
+        db = SessionLocal()
+        try:
+            query = db.query(DockerEvent).filter(DockerEvent.time >= since, DockerEvent.time <= until)
+            if container:
+                by_name = DockerEvent.container_name == container.lstrip("/")
+                if _is_id_prefix(container):
+                    # A range rather than LIKE so SQLite can use the (actor_id, time) index
+                    query = query.filter(or_(
+                        (DockerEvent.actor_id >= container) & (DockerEvent.actor_id < container + "g"),
+                        by_name,
+                    ))
+                else:
+                    query = query.filter(by_name)
+            if event_type:
+                query = query.filter(DockerEvent.type == event_type)
+            if action:
+                query = query.filter(DockerEvent.action == action)
+            if before_id is not None:
+                query = query.filter(DockerEvent.id < before_id)
+            rows = query.order_by(DockerEvent.id.desc()).limit(limit).all()
+            return [self._to_dict(row) for row in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _to_dict(row: DockerEvent) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "time": row.time,
+            "type": row.type,
+            "action": row.action,
+            "actor_id": row.actor_id,
+            "container_name": row.container_name,
+            "exit_code": row.exit_code,
+            "attributes": json.loads(row.attributes) if row.attributes else {},
+        }
+
+
+docker_event_service = DockerEventService()
@@ -0,0 +1,110 @@
+"""
+Background job handlers for slow Docker operations.
+Registered with the job service on import; endpoints submit them with `?background=true`.
+"""
+from typing import Any, Dict, List, Optional
+
+from app.services.disk_usage_service import disk_usage_service
+from app.services.container_group_service import container_group_service
+from app.services.docker_service import docker_service
+from app.services.image_gc_service import image_gc_service
+from app.schemas.docker import ImagePrunePolicy, RollingRestartPolicy, StartupPolicy
+from app.services.image_pull_service import image_pull_service
+from app.services.job_service import JobContext, job_service
+from app.services.rollout_service import rollout_service
+from app.services.startup_service import startup_service
+from app.services.stats_history_service import stats_history_service
+
+CREATE_CONTAINER = "container.create"
+RESTART_CONTAINER = "container.restart"
+ROLLING_RESTART = "container.rolling_restart"
+APPLY_RECOMMENDATIONS = "container.apply_recommendations"
+GROUP_ACTION = "container.group_action"
+START_CONTAINERS = "container.start_ordered"
+DELETE_IMAGE = "image.delete"
+PRUNE_IMAGES = "image.prune"
+COLLECT_IMAGES = "image.gc"
+
+
+def create_container(ctx: JobContext, **spec) -> Dict[str, Any]:
+    ctx.report(f"Ensuring image {spec['image']} is available")
+    image_pull_service.ensure_image(spec["image"])
+    ctx.report("Creating container", progress=0.5)
+    container = docker_service.create_container(**spec)
+    if not container:
+        raise RuntimeError("Failed to create container")
+    return {"container_id": container.short_id}
+
+
+def restart_container(ctx: JobContext, container_id: str) -> Dict[str, Any]:
+    ctx.report(f"Restarting {container_id}")
+    if not docker_service.restart_container(container_id):
+        raise RuntimeError("Failed to restart container or container not found")
+    return {"container_id": container_id}
+
+
+def rolling_restart(ctx: JobContext, container_ids: List[str], **policy) -> Dict[str, Any]:
+    result = rollout_service.rolling_restart(container_ids, RollingRestartPolicy(**policy), report=ctx.report)
+    if not result["success"]:
+        failed = [c["container_id"] for c in result["containers"] if c["status"] == "failed"]
+        state = "aborted" if result["aborted"] else "finished"
+        raise RuntimeError(f"Rolling restart {state} with failed containers: {', '.join(failed)}")
+    return result
+
+
+def start_containers(ctx: JobContext, container_ids: List[str], **policy) -> Dict[str, Any]:
+    result = startup_service.start(container_ids, StartupPolicy(**policy), report=ctx.report)
+    if not result["success"]:
+        failed = [c["container_id"] for c in result["containers"] if c["status"] in ("failed", "skipped")]
+        raise RuntimeError(f"Startup finished with containers not started: {', '.join(failed)}")
+    return result
+
+
+def apply_recommendations(ctx: JobContext, container_ids: List[str], **options) -> Dict[str, Any]:
+    ctx.report(f"Applying resource recommendations to {len(container_ids)} container(s)")
+    results = stats_history_service.apply(container_ids, **options)
+    return {"containers": results}
+
+
+def group_action(ctx: JobContext, by: str, value: str, action: str) -> Dict[str, Any]:
+    result = container_group_service.run_action(by, value, action, report=ctx.report)
+    if result is None:
+        raise RuntimeError(f"No containers in group {value}")
+    if result["failed"]:
+        failed = [c["container_id"] for c in result["containers"] if not c["success"]]
+        raise RuntimeError(f"Group {action} failed for: {', '.join(failed)}")
+    return result
+
+
+def delete_image(ctx: JobContext, image_id: str, force: bool = False) -> Dict[str, Any]:
+    ctx.report(f"Removing image {image_id}")
+    if not docker_service.delete_image(image_id, force=force):
+        raise RuntimeError("Failed to delete image (it might be in use)")
+    disk_usage_service.invalidate()
+    return {"image_id": image_id}
+
+
+def prune_images(ctx: JobContext, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    ctx.report("Pruning unused images")
+    result = docker_service.prune_images(filters)
+    disk_usage_service.invalidate()
+    return result
+
+
+def collect_images(ctx: JobContext, **policy) -> Dict[str, Any]:
+    policy = ImagePrunePolicy(**policy)
+    ctx.report("Computing image prune plan" if policy.dry_run else "Removing images selected by policy")
+    plan = image_gc_service.run(policy)
+    plan["policy"] = policy.model_dump()
+    return plan
+
+
+job_service.register(CREATE_CONTAINER, create_container, concurrency=4)
+job_service.register(RESTART_CONTAINER, restart_container)
+job_service.register(ROLLING_RESTART, rolling_restart)
+job_service.register(APPLY_RECOMMENDATIONS, apply_recommendations, concurrency=1)
+job_service.register(GROUP_ACTION, group_action, concurrency=2)
+job_service.register(START_CONTAINERS, start_containers, concurrency=2)
+job_service.register(DELETE_IMAGE, delete_image, concurrency=2)
+job_service.register(PRUNE_IMAGES, prune_images, concurrency=1)
+job_service.register(COLLECT_IMAGES, collect_images, concurrency=1)
@@ -1,37 +1,363 @@
 import docker
 from docker.errors import DockerException, APIError, NotFound
-from typing import List, Dict, Optional, Any
+from docker.utils import parse_bytes, parse_repository_tag
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+from typing import Callable, List, Dict, Optional, Any
+import functools
+import inspect
 import logging
 import os
+import threading
+import time
+
+from app.core.admission import admitted
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.core.tracing import KIND_CLIENT, span
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CPU_PERIOD = 100000  # Docker's CFS period in microseconds
+
+
+def working_set(usage: int, stat: Dict[str, int]) -> int:
+    """
+    Memory usage minus inactive file pages, which the kernel can reclaim without
+    swapping. `stat` is cgroup memory.stat (v2, or v1 with its total_* keys).
+    """
+    if "anon" in stat:
+        inactive_file = stat.get("inactive_file", 0)
+    else:
+        inactive_file = stat.get("total_inactive_file", stat.get("inactive_file", 0))
+    return max(usage - inactive_file, 0)
+
+
+def resource_limits(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A container's CPU and memory limits from its inspect data (None when
+    unlimited). --cpus limits (NanoCpus) are also expressed as a quota of the
+    container's CFS period.
+    """
+    host_config = attrs.get("HostConfig") or {}
+    cpu_period = host_config.get("CpuPeriod") or DEFAULT_CPU_PERIOD
+    nano_cpus = host_config.get("NanoCpus") or None
+    if nano_cpus:
+        cpu_quota = int(nano_cpus / 1e9 * cpu_period)
+    else:
+        cpu_quota = host_config.get("CpuQuota") if (host_config.get("CpuQuota") or 0) > 0 else None
+    return {
+        "cpu_quota": cpu_quota,
+        "cpu_period": cpu_period,
+        "nano_cpus": nano_cpus,
+        "mem_limit_bytes": host_config.get("Memory") or None,
+    }
+
+
+def update_nano_cpus(api, container_id: str, nano_cpus: int, mem_limit: Optional[str] = None):
+    """
+    Set a container's NanoCpus (and optionally its memory limit, without swap).
+
+    docker-py's update_container has no NanoCpus parameter (as of 7.x), so
+    unless a release adds one the body is posted through the private helpers
+    update_container itself is built on. A docker-py without them is refused
+    up front rather than failing on an AttributeError mid-update.
+    """
+    if "nano_cpus" in inspect.signature(api.update_container).parameters:
+        kwargs: Dict[str, Any] = {"nano_cpus": nano_cpus}
+        if mem_limit is not None:
+            kwargs["mem_limit"] = kwargs["memswap_limit"] = mem_limit
+        return api.update_container(container_id, **kwargs)
+    if not all(hasattr(api, name) for name in ("_url", "_post_json", "_result")):
+        raise DockerException(f"docker {docker.__version__} can't update NanoCpus; update the CPU limit as a quota instead")
+    data: Dict[str, Any] = {"NanoCpus": nano_cpus}
+    if mem_limit is not None:
+        data["Memory"] = data["MemorySwap"] = parse_bytes(mem_limit)
+    return api._result(api._post_json(api._url("/containers/{0}/update", container_id), data=data), True)
+
+
+class DockerUnavailableError(RuntimeError):
+    """Raised when the Docker daemon can't be reached or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Minimal circuit breaker for the Docker daemon connection.
+
+    CLOSED: calls go through. After `failure_threshold` consecutive failures it
+    goes OPEN and calls fail fast. After `reset_timeout` seconds a single probe
+    call is let through (HALF_OPEN) while the others keep failing fast; a success
+    closes the circuit, a failure re-opens it. A probe that never reports back
+    (e.g. it failed before reaching the daemon) is replaced after another
+    `reset_timeout`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._probe_started = None
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+# Depth of nested daemon_call methods on this thread (e.g. stop_container -> get_container)
+_call_state = threading.local()
+
+
+def daemon_call(func):
+    """
+    Wrap a DockerService method so connection-level failures (refused, reset,
+    read timeout on a hung daemon) feed the circuit breaker and surface as
+    DockerUnavailableError instead of raw requests exceptions.
+
+    Only the outermost call on a thread goes through the breaker: it is admitted
+    here, and `_check_client` and nested calls inside it don't ask again, so a
+    half-open probe isn't refused by its own inner `get_container` and its
+    outcome is always recorded.
+    """
+    span_name = f"docker.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        depth = getattr(_call_state, "depth", 0)
+        _call_state.depth = depth + 1
+        try:
+            if depth:
+                with span(span_name, kind=KIND_CLIENT):
+                    return func(self, *args, **kwargs)
+            self._admit()
+            try:
+                with span(span_name, kind=KIND_CLIENT):
+                    result = func(self, *args, **kwargs)
+            except (RequestsConnectionError, RequestsTimeout) as e:
+                self._record_failure(e)
+                raise DockerUnavailableError(f"Docker daemon unavailable: {e}") from e
+            except APIError:
+                # The daemon answered, so the connection itself is healthy
+                self.breaker.record_success()
+                raise
+            except DockerUnavailableError:
+                # No client: _check_client has already recorded the failure
+                raise
+            except Exception as e:
+                # Anything else didn't prove the daemon healthy; don't leave a probe hanging
+                self._record_failure(e)
+                raise
+            self.breaker.record_success()
+            return result
+        finally:
+            _call_state.depth = depth
+    return wrapper
+
+
+def coalesced(ttl_ms: int = 0):
+    """
+    Share one daemon call between concurrent identical calls of a read-only
+    DockerService method, and reuse its result for `ttl_ms` afterwards
+    (overridable per method with DOCKER_COALESCE_TTL_MS). Results are shared,
+    so callers mustn't modify them.
+    """
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not settings.DOCKER_COALESCING_ENABLED:
+                return func(self, *args, **kwargs)
+            ttl = settings.DOCKER_COALESCE_TTL_MS.get(name, ttl_ms) / 1000
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return self.singleflight.do(name, key, lambda: func(self, *args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def mutating(func):
+    """Invalidate coalesced results once a call that changes containers or images returns."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.singleflight.invalidate()
+    return wrapper
+
+
 class DockerService:
+    """
+    Nothing here talks to the daemon at import time: the client is created on
+    first use (or by `warmup()` in the background after startup), and the
+    Frame Dock container's own image is looked up the first time it is needed.
+    """
+
     def __init__(self):
+        self.client = None
+        # Get current container hostname (used as container ID)
+        self.current_container_id = os.environ.get('HOSTNAME', '')
+        self._current_image: Optional[str] = None
+        self._self_detected = False
+        self.last_error: Optional[str] = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.DOCKER_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.DOCKER_CIRCUIT_RESET_TIMEOUT,
+        )
+        self._connect_lock = threading.Lock()
+        self._backoff = settings.DOCKER_RECONNECT_MIN_BACKOFF
+        self._next_connect_at = 0.0
+        self.singleflight = SingleFlight()
+
+    def _connect(self) -> bool:
+        """Try to (re)create the Docker client. Failures schedule the next attempt with exponential backoff."""
         try:
-            self.client = docker.from_env()
-            # Get current container hostname (used as container ID)
-            self.current_container_id = os.environ.get('HOSTNAME', '')
-            # Get current image if running in Docker
-            self.current_image = None
-            if self.current_container_id:
-                try:
-                    container = self.client.containers.get(self.current_container_id)
-                    self.current_image = container.image.id
-                except Exception:
-                    pass
+            # One pooled connection per thread that may call the daemon concurrently
+            client = docker.from_env(
+                timeout=settings.DOCKER_TIMEOUT,
+                max_pool_size=settings.EXECUTOR_DOCKER_THREADS + settings.JOB_WORKERS,
+            )
         except DockerException as e:
             logger.error(f"Failed to initialize Docker client: {e}")
             self.client = None
-            self.current_container_id = ''
-            self.current_image = None
+            self._record_failure(e)
+            self._next_connect_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, settings.DOCKER_RECONNECT_MAX_BACKOFF)
+            return False
+
+        self.client = client
+        self.last_error = None
+        self._backoff = settings.DOCKER_RECONNECT_MIN_BACKOFF
+        self.breaker.record_success()
+        # Re-detect our own container on the new connection
+        self._self_detected = False
+        return True
+
+    @property
+    def current_image(self) -> Optional[str]:
+        """Image ID of the Frame Dock container itself (None outside Docker or if it can't be determined)."""
+        if not self._self_detected and self.current_container_id:
+            try:
+                self._check_client()
+                container = self.client.containers.get(self.current_container_id)
+                self._current_image = container.image.id
+                self._self_detected = True
+            except NotFound:
+                # HOSTNAME isn't a container on this daemon: not running in Docker
+                self._current_image = None
+                self._self_detected = True
+            except Exception:
+                pass  # Try again on next access
+        return self._current_image
+
+    def warmup(self) -> bool:
+        """Connect and detect our own container ahead of the first request."""
+        try:
+            self._check_client()
+        except DockerUnavailableError:
+            return False
+        _ = self.current_image
+        return True
+
+    def _record_failure(self, error: Exception):
+        self.last_error = str(error)
+        self.breaker.record_failure()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            raise DockerUnavailableError(
+                f"Docker daemon unavailable (circuit open, retry in {self.breaker.retry_after():.0f}s): {self.last_error}"
+            )
 
     def _check_client(self):
-        if not self.client:
-            raise RuntimeError("Docker client not initialized. Is Docker running?")
+        # Inside a daemon_call method the outermost call was already admitted
+        if not getattr(_call_state, "depth", 0):
+            self._admit()
+        if self.client is None:
+            with self._connect_lock:
+                if self.client is None:
+                    if time.monotonic() >= self._next_connect_at:
+                        self._connect()
+                    else:
+                        # Still backing off: count it like the failed connect it stands in for
+                        self.breaker.record_failure()
+            if self.client is None:
+                raise DockerUnavailableError("Docker client not initialized. Is Docker running?")
+
+    def health(self) -> Dict[str, Any]:
+        """Probe the daemon with a short-timeout ping and report connection/circuit state."""
+        latency_ms = None
+        connected = False
+        try:
+            if not self.breaker.allow():
+                raise DockerUnavailableError("circuit open")
+            # A dedicated short-timeout client, so /health never waits on the main client's
+            # (possibly still pending) connection. Without a known API version the probe
+            # negotiates one, which also round-trips to the daemon within the ping timeout.
+            version = self.client.api.api_version if self.client is not None else None
+            probe = docker.from_env(timeout=settings.DOCKER_PING_TIMEOUT, version=version)
+            try:
+                started = time.perf_counter()
+                probe.ping()
+                latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            finally:
+                probe.close()
+            self.breaker.record_success()
+            connected = True
+        except DockerUnavailableError:
+            pass
+        except (DockerException, RequestsConnectionError, RequestsTimeout) as e:
+            self._record_failure(e)
+
+        return {
+            "connected": connected,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "last_error": None if connected else self.last_error,
+            "latency_ms": latency_ms,
+        }
 
     # --- Container Management ---
 
+    @coalesced(ttl_ms=250)
+    @daemon_call
     def list_containers(self, all: bool = True) -> List[Dict[str, Any]]:
         self._check_client()
         containers = self.client.containers.list(all=all)
@@ -45,13 +371,84 @@ class DockerService:
                 "created": c.attrs["Created"],
                 "ports": c.attrs["NetworkSettings"]["Ports"],
                 "cpu_quota": c.attrs.get("HostConfig", {}).get("CpuQuota"),
-                "memory_limit": c.attrs.get("HostConfig", {}).get("Memory")
+                "memory_limit": c.attrs.get("HostConfig", {}).get("Memory"),
+                "labels": c.labels,
             }
             for c in containers
             # Exclude self container
             if not self.current_container_id or (c.id != self.current_container_id and not c.id.startswith(self.current_container_id))
         ]
 
+    @coalesced(ttl_ms=250)
+    @daemon_call
+    def running_container_ids(self) -> List[str]:
+        """Short IDs of running containers (one list call, no per-container inspect), excluding this app's own."""
+        self._check_client()
+        return [
+            c["Id"][:12]
+            for c in self.client.api.containers(quiet=True)
+            if not self.current_container_id or not c["Id"].startswith(self.current_container_id)
+        ]
+
+    @coalesced(ttl_ms=250)
+    @daemon_call
+    def running_containers(self) -> List[Dict[str, str]]:
+        """Full ID and name of running containers from a single list call, excluding this app's own."""
+        self._check_client()
+        return [
+            {"id": c["Id"], "name": (c.get("Names") or ["/" + c["Id"][:12]])[0].lstrip("/")}
+            for c in self.client.api.containers()
+            if not self.current_container_id or not c["Id"].startswith(self.current_container_id)
+        ]
+
+    @coalesced(ttl_ms=250)
+    @daemon_call
+    def container_labels(self) -> List[Dict[str, Any]]:
+        """Full ID, name, state and labels of every container from a single list call, excluding this app's own."""
+        self._check_client()
+        return [
+            {
+                "id": c["Id"],
+                "name": (c.get("Names") or ["/" + c["Id"][:12]])[0].lstrip("/"),
+                "state": c.get("State"),
+                "labels": c.get("Labels") or {},
+            }
+            for c in self.client.api.containers(all=True)
+            if not self.current_container_id or not c["Id"].startswith(self.current_container_id)
+        ]
+
+    @coalesced(ttl_ms=500)
+    @daemon_call
+    def get_memory_stats(self, container_id: str) -> Optional[Dict[str, Any]]:
+        """Raw `memory_stats` of one container; one_shot skips the daemon's 1s wait for a second CPU sample."""
+        self._check_client()
+        try:
+            return self.client.api.stats(container_id, stream=False, one_shot=True).get("memory_stats") or {}
+        except NotFound:
+            return None
+
+    @daemon_call
+    def get_usage_counters(self, container_id: str) -> Optional[Dict[str, int]]:
+        """Cumulative CPU time (ns) and network bytes of a running container; one_shot, so no 1s wait."""
+        self._check_client()
+        try:
+            stats = self.client.api.stats(container_id, stream=False, one_shot=True)
+        except NotFound:
+            return None
+        networks = (stats.get("networks") or {}).values()
+        return {
+            "cpu_total": (stats.get("cpu_stats") or {}).get("cpu_usage", {}).get("total_usage", 0),
+            "rx_bytes": sum(n.get("rx_bytes", 0) for n in networks),
+            "tx_bytes": sum(n.get("tx_bytes", 0) for n in networks),
+        }
+
+    @daemon_call
+    def events(self, since: Optional[str] = None, until: Optional[int] = None):
+        """Decoded event stream from the daemon; ends at `until` (or runs until closed)."""
+        self._check_client()
+        return self.client.events(since=since, until=until, decode=True)
+
+    @daemon_call
     def get_container(self, container_id: str):
         self._check_client()
         try:
@@ -59,30 +456,56 @@ class DockerService:
         except NotFound:
             return None
 
-    def restart_container(self, container_id: str) -> bool:
+    @daemon_call
+    def container_state(self, container_id: str) -> Optional[Dict[str, Any]]:
+        """Current run state and HEALTHCHECK status (None if the container has no healthcheck)."""
+        self._check_client()
+        try:
+            attrs = self.client.api.inspect_container(container_id)
+        except NotFound:
+            return None
+        state = attrs.get("State") or {}
+        networks = (attrs.get("NetworkSettings") or {}).get("Networks") or {}
+        return {
+            "status": state.get("Status"),
+            "running": bool(state.get("Running")) and not state.get("Restarting"),
+            "health": (state.get("Health") or {}).get("Status"),
+            "exit_code": state.get("ExitCode"),
+            "ip_address": next((n.get("IPAddress") for n in networks.values() if n.get("IPAddress")), None),
+        }
+
+    @admitted("restart")
+    @mutating
+    @daemon_call
+    def restart_container(self, container_id: str, timeout: Optional[int] = None) -> bool:
         self._check_client()
         container = self.get_container(container_id)
         if container:
             try:
-                container.restart()
+                container.restart(timeout=settings.DOCKER_STOP_TIMEOUT if timeout is None else timeout)
                 return True
             except APIError as e:
                 logger.error(f"Failed to restart container {container_id}: {e}")
                 return False
         return False
 
+    @mutating
+    @daemon_call
     def stop_container(self, container_id: str) -> bool:
         self._check_client()
         container = self.get_container(container_id)
         if container:
             try:
-                container.stop()
+                container.stop(timeout=settings.DOCKER_STOP_TIMEOUT)
                 return True
             except APIError as e:
                 logger.error(f"Failed to stop container {container_id}: {e}")
                 return False
         return False
 
+    @admitted("start")
+    @mutating
+    @daemon_call
     def start_container(self, container_id: str) -> bool:
         self._check_client()
         container = self.get_container(container_id)
@@ -95,6 +518,8 @@ class DockerService:
                 return False
         return False
 
+    @mutating
+    @daemon_call
     def create_container(self, image: str, name: Optional[str] = None,
                         ports: Optional[Dict[str, int]] = None,
                         environment: Optional[Dict[str, str]] = None,
@@ -131,6 +556,8 @@ class DockerService:
             logger.error(f"Error creating container: {e}")
             return None
 
+    @mutating
+    @daemon_call
     def delete_container(self, container_id: str, force: bool = False) -> bool:
         self._check_client()
         container = self.get_container(container_id)
@@ -143,15 +570,30 @@ class DockerService:
                 return False
         return False
 
+    @mutating
+    @daemon_call
     def update_container_resources(self, container_id: str, 
                                  cpu_quota: Optional[int] = None, 
-                                 mem_limit: Optional[str] = None) -> bool:
-        """Update resource limits for a running container."""
+                                 mem_limit: Optional[str] = None,
+                                 nano_cpus: Optional[int] = None) -> bool:
+        """
+        Update resource limits for a running container. The CPU limit is sent in
+        whichever form the container already uses: the daemon refuses a CpuQuota
+        update once NanoCpus is set (--cpus, compose `cpus:`) and vice versa.
+        """
         self._check_client()
         container = self.get_container(container_id)
         if not container:
             return False
-        
+
+        host_config = container.attrs.get("HostConfig") or {}
+        cpu_period = host_config.get("CpuPeriod") or DEFAULT_CPU_PERIOD
+        if host_config.get("NanoCpus"):
+            if cpu_quota is not None:
+                nano_cpus, cpu_quota = round(cpu_quota / cpu_period * 1e9), None
+        elif nano_cpus is not None:
+            cpu_quota, nano_cpus = round(nano_cpus / 1e9 * cpu_period), None
+
         kwargs: Dict[str, Any] = {}
         if cpu_quota is not None:
             kwargs["cpu_quota"] = cpu_quota
@@ -160,7 +602,10 @@ class DockerService:
             # Set memswap_limit to match mem_limit to avoid conflicts
             # -1 means unlimited swap, or we can set it equal to mem_limit (no swap)
             kwargs["memswap_limit"] = mem_limit
-        
+
+        if nano_cpus is not None:
+            update_nano_cpus(self.client.api, container.id, nano_cpus, mem_limit)
+            return True
         if kwargs:
             container.update(**kwargs)
             return True
@@ -168,6 +613,8 @@ class DockerService:
 
     # --- Monitoring ---
 
+    @coalesced(ttl_ms=500)
+    @daemon_call
     def get_container_stats(self, container_id: str, stream: bool = False):
         self._check_client()
         container = self.get_container(container_id)
@@ -191,6 +638,7 @@ class DockerService:
                 
                 # Memory usage
                 memory_usage = memory_stats.get("usage", 0)
+                memory_working_set = working_set(memory_usage, memory_stats.get("stats") or {})
                 memory_limit = memory_stats.get("limit", 0)
                 memory_percent = (memory_usage / memory_limit * 100) if memory_limit > 0 else 0
                 
@@ -215,6 +663,7 @@ class DockerService:
                     "name": container.name,
                     "cpu_percent": round(cpu_percent, 2),
                     "memory_usage": memory_usage,
+                    "memory_working_set": memory_working_set,
                     "memory_limit": memory_limit,
                     "memory_percent": round(memory_percent, 2),
                     "network_input": net_input,
@@ -222,12 +671,19 @@ class DockerService:
                     "block_read": block_read,
                     "block_write": block_write,
                     "pids": stats.get("pids_stats", {}).get("current", 0),
+                    # From the inspect get_container already made, so samples carry them for free
+                    "limits": resource_limits(container.attrs),
+                    "oom_killed": bool((container.attrs.get("State") or {}).get("OOMKilled")),
                 }
+            except (RequestsConnectionError, RequestsTimeout):
+                raise
             except Exception as e:
                 logger.error(f"Error getting stats for container {container_id}: {e}")
                 return None
         return None
 
+    @coalesced(ttl_ms=1000)
+    @daemon_call
     def get_all_container_stats(self) -> List[Dict[str, Any]]:
         self._check_client()
         containers = self.client.containers.list() # List only running containers by default
@@ -249,6 +705,34 @@ class DockerService:
 
     # --- Image Management ---
 
+    @daemon_call
+    def image_exists(self, reference: str) -> bool:
+        self._check_client()
+        try:
+            self.client.images.get(reference)
+            return True
+        except NotFound:
+            return False
+
+    @mutating
+    @daemon_call
+    def pull_image(self, reference: str, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """
+        Pull an image, passing each decoded progress message from the daemon to `on_progress`.
+        A reference without a tag pulls `latest` (not every tag, which is what the SDK would do).
+        """
+        self._check_client()
+        repository, tag = parse_repository_tag(reference)
+        if not tag:
+            tag = "latest"
+        for message in self.client.api.pull(repository, tag=tag, stream=True, decode=True):
+            if "error" in message:
+                raise APIError(message["error"])
+            if on_progress:
+                on_progress(message)
+
+    @coalesced(ttl_ms=1000)
+    @daemon_call
     def list_images(self) -> List[Dict[str, Any]]:
         self._check_client()
         images = self.client.images.list()
@@ -264,6 +748,8 @@ class DockerService:
             if not (self.current_image and img.id == self.current_image)
         ]
 
+    @mutating
+    @daemon_call
     def delete_image(self, image_id: str, force: bool = False) -> bool:
         self._check_client()
         try:
@@ -273,6 +759,14 @@ class DockerService:
             logger.error(f"Error removing image: {e}")
             return False
 
+    @daemon_call
+    def disk_usage(self) -> Dict[str, Any]:
+        """Raw `docker system df` data. Expensive on hosts with many images/volumes."""
+        self._check_client()
+        return self.client.df()
+
+    @mutating
+    @daemon_call
     def prune_images(self, filters: Optional[Dict] = None) -> Dict[str, Any]:
         self._check_client()
         return self.client.images.prune(filters=filters)
@@ -0,0 +1,210 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+import psutil
+
+from app.core.config import settings
+from app.services.docker_service import docker_service, DockerUnavailableError
+from app.services.memory_stats_service import CGROUP_V2_DIRS
+
+logger = logging.getLogger(__name__)
+
+PROC_PRESSURE_DIR = Path("/proc/pressure")
+PRESSURE_RESOURCES = ("cpu", "memory", "io")
+# Virtual block devices that only add noise to the per-disk rates
+IGNORED_DISK_PREFIXES = ("loop", "ram", "zram")
+
+
+def parse_pressure(text: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse a PSI file ("some avg10=0.12 avg60=0.05 avg300=0.01 total=12345" plus an
+    optional "full ..." line) into {"some": {...}, "full": {...}}.
+    """
+    result = {}
+    for line in text.splitlines():
+        kind, _, fields = line.partition(" ")
+        values = {}
+        for field in fields.split():
+            key, _, value = field.partition("=")
+            values[key] = int(value) if key == "total" else float(value)
+        result[kind] = values
+    return result
+
+
+def busy_percent(previous, current) -> Optional[float]:
+    """CPU busy % between two psutil cpu_times samples (idle and iowait count as idle)."""
+    total = sum(current) - sum(previous)
+    if total <= 0:
+        return None
+    idle = (current.idle + getattr(current, "iowait", 0.0)) - (previous.idle + getattr(previous, "iowait", 0.0))
+    return round(max(0.0, 1 - idle / total) * 100, 1)
+
+
+def _read_pressure(directory: Path, filename: str = "{}") -> Optional[Dict[str, Any]]:
+    """PSI of every resource in a directory; None when the kernel doesn't expose it."""
+    pressure = {}
+    for resource in PRESSURE_RESOURCES:
+        try:
+            pressure[resource] = parse_pressure((directory / filename.format(resource)).read_text())
+        except (OSError, ValueError):
+            pressure[resource] = None
+    return pressure if any(pressure.values()) else None
+
+
+class HostMetricsService:
+    """
+    Samples host contention and I/O signals every HOST_METRICS_INTERVAL seconds
+    in the background so /system/stats only reads the last snapshot:
+
+    - CPU busy %, overall and per CPU, from cpu_times deltas
+    - per-disk read/write bytes/s, IOPS and busy % from disk_io_counters deltas
+    - load averages
+    - CPU/memory/IO pressure stall information from /proc/pressure, and per
+      container from its cgroup v2 *.pressure files where available
+
+    Every worker samples for itself; it's a handful of /proc reads and one
+    container list call per interval.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._previous_io: Optional[Dict[str, Any]] = None
+        self._previous_at: Optional[float] = None
+        self._previous_cpu: Optional[List[Any]] = None
+        self._cgroup_dirs: Dict[str, Optional[Path]] = {}
+        self._snapshot: Dict[str, Any] = {
+            "sampled_at": None, "cpu_percent": None, "per_cpu_percent": [],
+            "load_average": None, "disk_io": [], "pressure": None, "container_pressure": [],
+        }
+
+    def start(self):
+        if self._thread is None and settings.HOST_METRICS_INTERVAL > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="host-metrics", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        while True:
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.error(f"Host metrics sampling failed: {e}")
+            if self._stop.wait(settings.HOST_METRICS_INTERVAL):
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The latest sample (CPU and disk rates are empty until the second one)."""
+        return self._snapshot
+
+    def cpu_usage(self) -> Tuple[float, List[float]]:
+        """
+        (busy %, per-CPU busy %) from the latest sample. Before the second sample, or
+        with sampling disabled, falls back to psutil's non-blocking change since its last call.
+        """
+        snapshot = self._snapshot
+        if snapshot["cpu_percent"] is not None:
+            return snapshot["cpu_percent"], snapshot["per_cpu_percent"]
+        return psutil.cpu_percent(interval=None), psutil.cpu_percent(interval=None, percpu=True)
+
+    def sample_once(self):
+        now = time.monotonic()
+        cpu_percent, per_cpu_percent = self._cpu()
+        snapshot = {
+            "sampled_at": datetime.utcnow(),
+            "cpu_percent": cpu_percent,
+            "per_cpu_percent": per_cpu_percent,
+            "load_average": self._load_average(),
+            "disk_io": self._disk_io(now),
+            "pressure": _read_pressure(PROC_PRESSURE_DIR),
+            "container_pressure": self._container_pressure(),
+        }
+        # Replaced whole so readers never see a half-built sample
+        self._snapshot = snapshot
+
+    def _cpu(self) -> Tuple[Optional[float], List[float]]:
+        # Our own baseline: psutil.cpu_percent(interval=None) shares one with every other caller
+        current = [psutil.cpu_times(), *psutil.cpu_times(percpu=True)]
+        previous, self._previous_cpu = self._previous_cpu, current
+        if previous is None or len(previous) != len(current):
+            return None, []
+        total, *per_cpu = [busy_percent(before, after) for before, after in zip(previous, current)]
+        return total, [percent or 0.0 for percent in per_cpu]
+
+    @staticmethod
+    def _load_average() -> Optional[Dict[str, float]]:
+        try:
+            load1, load5, load15 = os.getloadavg()
+        except OSError:
+            return None
+        return {"load1": load1, "load5": load5, "load15": load15}
+
+    def _disk_io(self, now: float) -> List[Dict[str, Any]]:
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        previous, previous_at = self._previous_io, self._previous_at
+        self._previous_io, self._previous_at = counters, now
+        if previous is None or now <= previous_at:
+            return []
+        elapsed = now - previous_at
+        rates = []
+        for name, current in counters.items():
+            before = previous.get(name)
+            if before is None or name.startswith(IGNORED_DISK_PREFIXES):
+                continue
+            busy_time = getattr(current, "busy_time", None)
+            rates.append({
+                "name": name,
+                # Counters can wrap or reset (device re-attached); clamp instead of reporting negatives
+                "read_bytes_per_sec": max(current.read_bytes - before.read_bytes, 0) / elapsed,
+                "write_bytes_per_sec": max(current.write_bytes - before.write_bytes, 0) / elapsed,
+                "read_iops": max(current.read_count - before.read_count, 0) / elapsed,
+                "write_iops": max(current.write_count - before.write_count, 0) / elapsed,
+                # busy_time is in ms (Linux only)
+                "busy_percent": min(max(busy_time - before.busy_time, 0) / (elapsed * 10), 100.0)
+                if busy_time is not None else None,
+            })
+        return rates
+
+    def _container_pressure(self) -> List[Dict[str, Any]]:
+        try:
+            containers = docker_service.running_containers()
+        except DockerUnavailableError:
+            return []
+        running = {c["id"] for c in containers}
+        for container_id in list(self._cgroup_dirs):
+            if container_id not in running:
+                del self._cgroup_dirs[container_id]
+
+        result = []
+        for container in containers:
+            cgroup = self._cgroup_dir(container["id"])
+            if cgroup is None:
+                continue
+            pressure = _read_pressure(cgroup, "{}.pressure")
+            if pressure is None:
+                self._cgroup_dirs.pop(container["id"], None)
+                continue
+            result.append({"id": container["id"][:12], "name": container["name"], **pressure})
+        return result
+
+    def _cgroup_dir(self, container_id: str) -> Optional[Path]:
+        # Only hits are cached: a new container's cgroup can show up after it is listed
+        if self._cgroup_dirs.get(container_id) is None:
+            root = Path(settings.CGROUP_ROOT)
+            candidates = [root / d.format(id=container_id) for d in CGROUP_V2_DIRS]
+            self._cgroup_dirs[container_id] = next((d for d in candidates if (d / "cpu.pressure").exists()), None)
+        return self._cgroup_dirs[container_id]
+
+
+host_metrics_service = HostMetricsService()
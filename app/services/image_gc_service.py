@@ -0,0 +1,163 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+import json
+import logging
+import time
+
+from docker.utils import parse_repository_tag
+
+from app.db.session import SessionLocal
+from app.models.schedule import ContainerSchedule
+from app.schemas.docker import ImagePrunePolicy
+from app.services.disk_usage_service import disk_usage_service, is_dangling, unique_size
+from app.services.docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+def _scheduled_container_refs() -> Set[str]:
+    """Container IDs/names referenced by any schedule, active or not."""
+    db = SessionLocal()
+    try:
+        refs: Set[str] = set()
+        for (raw_ids,) in db.query(ContainerSchedule.container_ids).all():
+            try:
+                ids = json.loads(raw_ids) if raw_ids else []
+            except (ValueError, TypeError):
+                ids = [raw_ids]
+            refs.update(str(i) for i in ids if i)
+        return refs
+    finally:
+        db.close()
+
+
+def _matches(container: Dict[str, Any], ref: str) -> bool:
+    names = [n.lstrip("/") for n in container.get("Names") or []]
+    return container["Id"].startswith(ref) or ref.lstrip("/") in names
+
+
+class ImageGCService:
+    """
+    Policy-driven image garbage collection on top of the cached `docker system df`.
+
+    Docker doesn't record when an image was last used; an image is only
+    considered unused when no container (running or stopped) references it,
+    and its age is measured from its creation time.
+    """
+
+    def plan(self, policy: ImagePrunePolicy, df: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if df is None:
+            df = disk_usage_service.raw()
+        images = df.get("Images") or []
+        containers = df.get("Containers") or []
+        now = time.time()
+
+        protected: Dict[str, List[str]] = defaultdict(list)
+        for container in containers:
+            reason = "used by running container" if container.get("State") == "running" else "used by stopped container"
+            if reason not in protected[container["ImageID"]]:
+                protected[container["ImageID"]].append(reason)
+
+        for ref in _scheduled_container_refs():
+            for container in containers:
+                if _matches(container, ref):
+                    protected[container["ImageID"]].append(f"referenced by schedule (container {ref})")
+
+        if docker_service.current_image:
+            protected[docker_service.current_image].append("Frame Dock image")
+
+        # Newest N tags per repository are kept regardless of the other rules
+        if policy.keep_recent_tags is not None:
+            by_repo: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for img in images:
+                for tag in img.get("RepoTags") or []:
+                    if tag != "<none>:<none>":
+                        by_repo[parse_repository_tag(tag)[0]].append(img)
+            for repo, repo_images in by_repo.items():
+                repo_images.sort(key=lambda img: img.get("Created") or 0, reverse=True)
+                for img in repo_images[:policy.keep_recent_tags]:
+                    if f"among {policy.keep_recent_tags} newest of {repo}" not in protected[img["Id"]]:
+                        protected[img["Id"]].append(f"among {policy.keep_recent_tags} newest of {repo}")
+
+        candidates = []
+        for img in images:
+            if protected.get(img["Id"]):
+                continue
+            reasons = []
+            old = policy.unused_days is not None and now - (img.get("Created") or now) > policy.unused_days * DAY
+            if is_dangling(img):
+                if policy.include_dangling:
+                    reasons.append("dangling")
+                if old:
+                    reasons.append(f"unused for over {policy.unused_days} days")
+            elif policy.keep_recent_tags is not None or policy.unused_days is not None:
+                # Tagged images must meet every retention rule that is set: beyond the newest N and old enough
+                if policy.unused_days is None or old:
+                    if policy.keep_recent_tags is not None:
+                        reasons.append(f"beyond {policy.keep_recent_tags} newest tags")
+                    if old:
+                        reasons.append(f"unused for over {policy.unused_days} days")
+            if reasons:
+                candidates.append({
+                    "id": img["Id"],
+                    "tags": [t for t in img.get("RepoTags") or [] if t != "<none>:<none>"],
+                    "size": img.get("Size") or 0,
+                    "unique_size": unique_size(img),
+                    "created": img.get("Created"),
+                    "reasons": reasons,
+                })
+
+        removed_ids = {c["id"] for c in candidates}
+        kept_unique = sum(unique_size(img) for img in images if img["Id"] not in removed_ids)
+        reclaimable = sum(c["unique_size"] for c in candidates)
+        # Shared layers are only freed once every image sharing them goes; without per-layer
+        # data the most that can go is everything the kept images don't hold exclusively.
+        reclaimable_max = min(
+            sum(c["size"] for c in candidates),
+            max((df.get("LayersSize") or 0) - kept_unique, reclaimable),
+        )
+
+        by_id = {img["Id"]: img for img in images}
+        return {
+            "dry_run": policy.dry_run,
+            "policy": policy,
+            "candidates": candidates,
+            "protected": [
+                {"id": image_id, "tags": (by_id[image_id].get("RepoTags") or []), "reasons": reasons}
+                for image_id, reasons in protected.items()
+                if reasons and image_id in by_id
+            ],
+            "reclaimable_bytes": reclaimable,
+            "reclaimable_bytes_max": reclaimable_max,
+        }
+
+    def run(self, policy: ImagePrunePolicy) -> Dict[str, Any]:
+        """Compute the plan from a fresh `docker system df` and, unless dry_run, remove the candidates."""
+        disk_usage_service.invalidate()
+        before = disk_usage_service.raw()
+        plan = self.plan(policy, before)
+        plan["removed"] = []
+        plan["failed"] = {}
+        if policy.dry_run:
+            return plan
+
+        for candidate in plan["candidates"]:
+            # Multi-tagged images need force to untag; protected images were excluded above
+            if docker_service.delete_image(candidate["id"], force=len(candidate["tags"]) > 1):
+                plan["removed"].append(candidate["id"])
+            else:
+                plan["failed"][candidate["id"]] = "removal refused by daemon (image may be in use)"
+
+        disk_usage_service.invalidate()
+        after = disk_usage_service.raw()
+        plan["reclaimed_bytes"] = max((before.get("LayersSize") or 0) - (after.get("LayersSize") or 0), 0)
+        logger.info(
+            f"Image GC removed {len(plan['removed'])} images, {len(plan['failed'])} failed, "
+            f"reclaimed {plan['reclaimed_bytes']} bytes"
+        )
+        return plan
+
+
+image_gc_service = ImageGCService()
@@ -0,0 +1,309 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+import uuid
+
+from docker.utils import parse_repository_tag
+
+from app.core.config import settings
+from app.services.cluster_service import cluster_service, ORPHAN_GRACE_TTLS
+from app.services.docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+SHARED_PREFIX = "pull:"  # Snapshot of a pull, by job id
+REFERENCE_PREFIX = "pull-ref:"  # Id of the latest pull of a reference
+LEASE_PREFIX = "pull:"  # Held by the worker running the pull of a reference
+# Seconds between snapshot writes while a pull reports progress
+FLUSH_INTERVAL = 1.0
+# Seconds between reads of another worker's snapshot
+REMOTE_POLL_INTERVAL = 1.0
+# How long to wait for the lease holder to publish its pull before pulling here as well
+ADOPT_WAIT = 2.0
+
+
+class PullStatus(str, Enum):
+    PENDING = "pending"
+    PULLING = "pulling"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+FINISHED = (PullStatus.COMPLETED, PullStatus.FAILED)
+
+
+def normalize_reference(reference: str) -> str:
+    """`nginx` and `nginx:latest` are the same pull, so key in-flight pulls on the tagged form."""
+    repository, tag = parse_repository_tag(reference.strip())
+    if not tag:
+        tag = "latest"
+    separator = "@" if tag.startswith("sha256:") else ":"
+    return f"{repository}{separator}{tag}"
+
+
+class PullJob:
+    """State of one background pull, shared by every request waiting on the same reference."""
+
+    def __init__(self, reference: str):
+        self.id = uuid.uuid4().hex
+        self.reference = reference
+        self.status = PullStatus.PENDING
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        # Latest progress per layer ID (updated under _cond; readers take a copy)
+        self.layers: Dict[str, Dict[str, Any]] = {}
+        # The most recent progress events for SSE consumers; `published` counts every event ever
+        # published, so event indexes stay stable as old ones drop off
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=settings.IMAGE_PULL_EVENT_HISTORY)
+        self.published = 0
+        self.flushed_at = 0.0
+        # Reentrant, so on_progress can publish while it holds it
+        self._cond = threading.Condition(threading.RLock())
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def first_event_index(self) -> int:
+        with self._cond:
+            return self.published - len(self.events)
+
+    def _publish(self, event: Dict[str, Any]):
+        with self._cond:
+            self.events.append(event)
+            self.published += 1
+            self._cond.notify_all()
+
+    def on_progress(self, message: Dict[str, Any]):
+        layer_id = message.get("id")
+        detail = message.get("progressDetail") or {}
+        if layer_id and ("progressDetail" in message or message.get("status", "").endswith("complete")):
+            # Pollers read the layers from request threads while the pull thread updates them
+            with self._cond:
+                layer = self.layers.setdefault(layer_id, {"status": None, "current": 0, "total": None})
+                layer["status"] = message.get("status")
+                if "current" in detail:
+                    layer["current"] = detail["current"]
+                if detail.get("total"):
+                    layer["total"] = detail["total"]
+                if message.get("status") in ("Download complete", "Pull complete", "Already exists") and layer["total"]:
+                    layer["current"] = layer["total"]
+                self._publish({"type": "layer", "layer": layer_id, **layer})
+        elif message.get("status"):
+            self._publish({"type": "status", "status": message["status"]})
+
+    def _layers_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {layer_id: dict(layer) for layer_id, layer in self.layers.items()}
+
+    def progress(self, layers: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[int, int]:
+        """Aggregate (current, total) bytes across layers whose size is known."""
+        current = total = 0
+        for layer in (layers if layers is not None else self._layers_snapshot()).values():
+            if layer["total"]:
+                total += layer["total"]
+                current += min(layer["current"] or 0, layer["total"])
+        return current, total
+
+    def finish(self, error: Optional[str] = None):
+        with self._cond:
+            self.status = PullStatus.FAILED if error else PullStatus.COMPLETED
+            self.error = error
+            self.finished_at = datetime.utcnow()
+            self._publish({"type": "done", "status": self.status.value, "error": error})
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the pull finishes. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout=timeout)
+
+    def events_since(self, index: int) -> Optional[List[Dict[str, Any]]]:
+        """Events from `index` on, or None if some of them have already been dropped."""
+        with self._cond:
+            first = self.published - len(self.events)
+            if index < first:
+                return None
+            return list(self.events)[index - first:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        layers = self._layers_snapshot()
+        current, total = self.progress(layers)
+        return {
+            "id": self.id,
+            "reference": self.reference,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "layers": [{"id": layer_id, **layer} for layer_id, layer in layers.items()],
+            "bytes_downloaded": current,
+            "bytes_total": total,
+        }
+
+
+class ImagePullService:
+    """
+    Runs image pulls in background threads.
+    Concurrent requests for the same reference share a single in-flight pull,
+    so the daemon only downloads each layer once.
+
+    With several workers, the worker that starts a pull takes a lease on its
+    reference, and the others join its pull instead of starting their own.
+    Every pull's state (status and latest progress per layer) is written to the
+    shared cache, at most once per FLUSH_INTERVAL, so any worker can answer for
+    it. Per-event progress streams are only available from the pulling worker;
+    the others follow the shared snapshot. Finished pulls are dropped after
+    IMAGE_PULL_TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, PullJob]" = OrderedDict()
+        self._in_flight: Dict[str, PullJob] = {}
+
+    @property
+    def _lease_ttl(self) -> float:
+        return settings.WORKER_LEASE_TTL * ORPHAN_GRACE_TTLS
+
+    def pull(self, reference: str) -> Dict[str, Any]:
+        reference = normalize_reference(reference)
+        deadline = time.monotonic() + ADOPT_WAIT
+        while True:
+            with self._lock:
+                job = self._in_flight.get(reference)
+                if job is None and cluster_service.try_acquire(LEASE_PREFIX + reference, self._lease_ttl):
+                    job = self._start(reference)
+            if job is not None:
+                return job.to_dict()
+            # Another worker holds the lease: join its pull once it has published it
+            pull = self._remote_in_flight(reference)
+            if pull is not None:
+                return pull
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.1)
+
+        logger.warning(f"Pull of {reference} is leased by another worker that hasn't published it, pulling here too")
+        with self._lock:
+            job = self._in_flight.get(reference) or self._start(reference)
+        return job.to_dict()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else self._shared(job_id)
+
+    def local(self, job_id: str) -> Optional[PullJob]:
+        """The pull if this worker is running (or ran) it."""
+        return self._jobs.get(job_id)
+
+    def ensure_image(self, reference: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Make sure `reference` is available locally, joining (or starting) the pull if it isn't.
+        Returns the pull that was waited on, or None if the image was already present.
+        """
+        with self._lock:
+            job = self._in_flight.get(normalize_reference(reference))
+        if job is None and docker_service.image_exists(reference):
+            return None
+        pull = job.to_dict() if job else self.pull(reference)
+
+        pull = self._wait(pull, timeout if timeout is not None else settings.IMAGE_PULL_TIMEOUT)
+        if pull["status"] not in FINISHED:
+            raise TimeoutError(f"Timed out waiting for pull of {pull['reference']}")
+        if pull["status"] == PullStatus.FAILED:
+            raise RuntimeError(f"Failed to pull {pull['reference']}: {pull['error']}")
+        return pull
+
+    def _wait(self, pull: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Latest state of `pull` once it has finished, or when `timeout` runs out."""
+        job = self._jobs.get(pull["id"])
+        if job is not None:
+            job.wait(timeout=timeout)
+            return job.to_dict()
+        deadline = time.monotonic() + timeout
+        while pull["status"] not in FINISHED and time.monotonic() < deadline:
+            time.sleep(REMOTE_POLL_INTERVAL)
+            pull = self._shared(pull["id"]) or {**pull, "status": PullStatus.FAILED, "error": "Pull expired"}
+        return pull
+
+    def _start(self, reference: str) -> PullJob:
+        """Register and start a pull; called with the lock held."""
+        self._trim_history()
+        job = PullJob(reference)
+        self._in_flight[reference] = job
+        self._jobs[job.id] = job
+        self._flush(job)
+        threading.Thread(target=self._run, args=(job,), name=f"pull-{reference}", daemon=True).start()
+        return job
+
+    def _run(self, job: PullJob):
+        job.status = PullStatus.PULLING
+        self._flush(job)
+        logger.info(f"Pulling image {job.reference} (job {job.id})")
+        try:
+            docker_service.pull_image(job.reference, on_progress=lambda message: self._on_progress(job, message))
+        except Exception as e:
+            logger.error(f"Failed to pull image {job.reference}: {e}")
+            job.finish(error=str(e))
+        else:
+            logger.info(f"Pulled image {job.reference}")
+            job.finish()
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.reference) is job:
+                    del self._in_flight[job.reference]
+            self._flush(job)
+            try:
+                cluster_service.release(LEASE_PREFIX + job.reference)
+            except Exception as e:
+                logger.error(f"Failed to release pull lease for {job.reference}: {e}")
+
+    def _on_progress(self, job: PullJob, message: Dict[str, Any]):
+        job.on_progress(message)
+        if time.monotonic() - job.flushed_at >= FLUSH_INTERVAL:
+            self._flush(job)
+
+    def _flush(self, job: PullJob):
+        """Write the pull's state to the shared cache and, while it runs, renew its lease."""
+        job.flushed_at = time.monotonic()
+        try:
+            cluster_service.put_shared(SHARED_PREFIX + job.id, {**job.to_dict(), "worker": cluster_service.worker_id})
+            if not job.done:
+                cluster_service.put_shared(REFERENCE_PREFIX + job.reference, job.id)
+                cluster_service.try_acquire(LEASE_PREFIX + job.reference, self._lease_ttl)
+        except Exception as e:
+            # Other workers see stale progress; the pull itself carries on
+            logger.error(f"Failed to share pull state of {job.reference}: {e}")
+
+    def _shared(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = cluster_service.get_shared(SHARED_PREFIX + job_id)
+        if entry is None:
+            return None
+        pull = entry[0]
+        if pull["status"] not in FINISHED and pull["worker"] not in cluster_service.recent_workers(self._lease_ttl):
+            pull.update(status=PullStatus.FAILED, error="Interrupted: the worker running the pull is gone")
+        return pull
+
+    def _remote_in_flight(self, reference: str) -> Optional[Dict[str, Any]]:
+        entry = cluster_service.get_shared(REFERENCE_PREFIX + reference)
+        pull = self._shared(entry[0]) if entry else None
+        return pull if pull is not None and pull["status"] not in FINISHED else None
+
+    def _trim_history(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.IMAGE_PULL_TTL)
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished:
+            if len(self._jobs) > settings.IMAGE_PULL_HISTORY or self._jobs[job_id].finished_at < cutoff:
+                del self._jobs[job_id]
+        # Entries of running pulls are rewritten with every flush, so only finished and abandoned ones expire
+        cluster_service.expire_shared(SHARED_PREFIX, cutoff)
+        cluster_service.expire_shared(REFERENCE_PREFIX, cutoff)
+
+
+image_pull_service = ImagePullService()
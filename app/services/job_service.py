@@ -0,0 +1,312 @@
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+import json
+import logging
+import threading
+import uuid
+
+from sqlalchemy import or_
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+from app.services.cluster_service import cluster_service
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs whose progress events stay available in memory for late SSE subscribers
+EVENT_HISTORY = 100
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+class JobContext:
+    """Handed to job handlers so they can report progress while they run."""
+
+    def __init__(self, service: "JobService", job_id: str):
+        self.service = service
+        self.job_id = job_id
+
+    def report(self, message: Optional[str] = None, progress: Optional[float] = None):
+        self.service._report(self.job_id, message, progress)
+
+
+class JobService:
+    """
+    In-process queue for long-running operations.
+
+    Jobs are persisted in the `job` table so their status survives the request
+    that created them; a bounded thread pool runs them. Each job kind can be
+    capped (e.g. one image prune at a time): jobs over the cap wait in a
+    per-kind queue instead of holding a worker.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._limits: Dict[str, Optional[int]] = {}
+        self._running: Dict[str, int] = {}
+        self._pending: Dict[str, Deque[str]] = {}
+        self._events: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, kind: str, handler: Callable[..., Any], concurrency: Optional[int] = None):
+        """
+        Register a handler for a job kind. The handler is called as
+        handler(ctx, **params) and its (JSON-serialisable) return value is stored as the result.
+        `concurrency` caps how many jobs of this kind run at once (None = only the pool limit).
+        """
+        self._handlers[kind] = handler
+        self._limits[kind] = concurrency
+        self._running.setdefault(kind, 0)
+        self._pending.setdefault(kind, deque())
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+        return self._executor
+
+    def submit(self, kind: str, **params) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            job = Job(
+                id=job_id,
+                kind=kind,
+                status=JobStatus.QUEUED,
+                params=json.dumps(params, default=str),
+                worker=cluster_service.worker_id,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            data = self._to_dict(job)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._events[job_id] = [{"type": "status", "status": JobStatus.QUEUED.value}]
+            self._trim_events()
+            limit = self._limits[kind]
+            if limit is not None and self._running[kind] >= limit:
+                self._pending[kind].append(job_id)
+                logger.info(f"Job {job_id} ({kind}) queued behind {self._running[kind]} running")
+                return data
+            self._running[kind] += 1
+
+        try:
+            self.executor.submit(self._run, job_id, kind, params)
+        except Exception as e:
+            # e.g. the pool is shutting down: the job never runs, so its slot goes to the next one
+            self._fail_unstarted(job_id, kind, e)
+            self._release(kind)
+            raise
+        return data
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            return self._to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def list(self, kind: Optional[str] = None, status: Optional[JobStatus] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            query = db.query(Job)
+            if kind:
+                query = query.filter(Job.kind == kind)
+            if status:
+                query = query.filter(Job.status == status)
+            return [self._to_dict(job) for job in query.order_by(Job.created_at.desc()).limit(limit).all()]
+        finally:
+            db.close()
+
+    def events_since(self, job_id: str, index: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Progress events after `index`, or None if this process holds no events for
+        the job, or not the ones the caller has already seen.
+        """
+        with self._lock:
+            events = self._events.get(job_id)
+            return None if events is None or index > len(events) else events[index:]
+
+    def recover(self):
+        """
+        Called at startup: drops finished jobs past the retention window. Jobs left
+        queued/running by a previous process are failed by `fail_orphaned` once that
+        process's worker lease has lapsed.
+        """
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+            removed = db.query(Job).filter(Job.finished_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+            if removed:
+                logger.info(f"Job recovery: {removed} expired")
+        finally:
+            db.close()
+
+    def fail_orphaned(self, live_workers: Set[str]):
+        """
+        Mark queued/running jobs owned by workers that are no longer alive as failed; they will never finish.
+        The caller passes every worker whose lease lapsed only recently, so a worker that is merely
+        late renewing keeps its jobs, and one that does come back can't overwrite the failure (see `_update`).
+        """
+        db = SessionLocal()
+        try:
+            interrupted = (
+                db.query(Job)
+                .filter(Job.status.in_(ACTIVE_STATUSES))
+                .filter(or_(Job.worker.is_(None), Job.worker.not_in(live_workers)))
+                .all()
+            )
+            for job in interrupted:
+                job.status = JobStatus.FAILED
+                job.error = "Interrupted by server restart"
+                job.finished_at = datetime.utcnow()
+            db.commit()
+            if interrupted:
+                logger.info(f"Job recovery: {len(interrupted)} interrupted")
+        finally:
+            db.close()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- internals ---
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]):
+        try:
+            if not self._update(job_id, status=JobStatus.RUNNING, started_at=datetime.utcnow()):
+                logger.warning(f"Job {job_id} ({kind}) was already finished before it started, not running it")
+                self._publish_final(job_id)
+                return
+            self._publish(job_id, {"type": "status", "status": JobStatus.RUNNING.value})
+            try:
+                result = self._handlers[kind](JobContext(self, job_id), **params)
+            except Exception as e:
+                logger.error(f"Job {job_id} ({kind}) failed: {e}")
+                if self._update(job_id, status=JobStatus.FAILED, error=str(e), finished_at=datetime.utcnow()):
+                    self._publish(job_id, {"type": "done", "status": JobStatus.FAILED.value, "error": str(e)})
+                else:
+                    self._publish_final(job_id)
+            else:
+                finished = self._update(
+                    job_id,
+                    status=JobStatus.SUCCEEDED,
+                    result=json.dumps(result, default=str),
+                    progress=1.0,
+                    finished_at=datetime.utcnow(),
+                )
+                if finished:
+                    self._publish(job_id, {"type": "done", "status": JobStatus.SUCCEEDED.value, "result": result})
+                else:
+                    logger.warning(f"Job {job_id} ({kind}) finished after it had been failed as orphaned, result discarded")
+                    self._publish_final(job_id)
+        finally:
+            self._release(kind)
+
+    def _release(self, kind: str):
+        """Hand a finished job's slot to the next queued job of its kind, or give it back."""
+        while True:
+            with self._lock:
+                pending = self._pending[kind]
+                if not pending:
+                    self._running[kind] -= 1
+                    return
+                next_id = pending.popleft()
+
+            try:
+                self.executor.submit(self._run, next_id, kind, self._load_params(next_id))
+                return
+            except Exception as e:
+                # It never runs, so the slot moves on to the job after it (or is given back)
+                self._fail_unstarted(next_id, kind, e)
+
+    def _fail_unstarted(self, job_id: str, kind: str, error: Exception):
+        logger.error(f"Job {job_id} ({kind}) could not be started: {error}")
+        try:
+            if self._update(job_id, status=JobStatus.FAILED, error=f"Could not be started: {error}", finished_at=datetime.utcnow()):
+                self._publish(job_id, {"type": "done", "status": JobStatus.FAILED.value, "error": str(error)})
+        except Exception as e:
+            logger.error(f"Failed to mark job {job_id} as failed: {e}")
+
+    def _load_params(self, job_id: str) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            return json.loads(job.params) if job and job.params else {}
+        finally:
+            db.close()
+
+    def _report(self, job_id: str, message: Optional[str], progress: Optional[float]):
+        fields: Dict[str, Any] = {}
+        if message is not None:
+            fields["message"] = message
+        if progress is not None:
+            fields["progress"] = progress
+        if fields:
+            self._update(job_id, **fields)
+            self._publish(job_id, {"type": "progress", **fields})
+
+    def _update(self, job_id: str, **fields) -> bool:
+        """Update a job that hasn't finished yet; a terminal status (e.g. failed as orphaned) is never overwritten."""
+        db = SessionLocal()
+        try:
+            updated = (
+                db.query(Job)
+                .filter(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+                .update(fields, synchronize_session=False)
+            )
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def _publish_final(self, job_id: str):
+        """Close the event stream with whatever terminal state the job table holds."""
+        job = self.get(job_id)
+        if job is not None:
+            self._publish(job_id, {"type": "done", "status": JobStatus(job["status"]).value, "error": job["error"], "result": job["result"]})
+
+    def _publish(self, job_id: str, event: Dict[str, Any]):
+        with self._lock:
+            self._events.setdefault(job_id, []).append(event)
+
+    def _trim_events(self):
+        # Only finished jobs are evicted: a running job's subscribers still need its events
+        excess = len(self._events) - EVENT_HISTORY
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, events in self._events.items() if events and events[-1]["type"] == "done"]
+        for job_id in finished[:excess]:
+            del self._events[job_id]
+
+    @staticmethod
+    def _to_dict(job: Job) -> Dict[str, Any]:
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "params": json.loads(job.params) if job.params else None,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "progress": job.progress,
+            "message": job.message,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+
+job_service = JobService()
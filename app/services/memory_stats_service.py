@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+import heapq
+import logging
+
+import psutil
+
+from app.core.config import settings
+from app.services.docker_service import docker_service, working_set
+
+logger = logging.getLogger(__name__)
+
+# Where Docker puts container cgroups, relative to CGROUP_ROOT, for the systemd and cgroupfs drivers
+CGROUP_V2_DIRS = ("system.slice/docker-{id}.scope", "docker/{id}")
+CGROUP_V1_DIRS = ("memory/system.slice/docker-{id}.scope", "memory/docker/{id}")
+# Kernel memory in cgroup v2 memory.stat on kernels that don't report "kernel" itself
+V2_KERNEL_KEYS = ("kernel_stack", "pagetables", "percpu", "sock", "slab", "vmalloc")
+# Parallel stats API calls when the cgroups aren't readable
+API_CONCURRENCY = 8
+
+
+def breakdown(usage: int, stat: Dict[str, int]) -> Dict[str, int]:
+    """
+    Split usage into anon / file (page cache) / kernel from cgroup memory.stat
+    keys (v2, or v1's rss/cache), plus the working set (usage minus inactive
+    file pages, which the kernel can reclaim without swapping).
+    """
+    if "anon" in stat:
+        anon = stat.get("anon", 0)
+        file = stat.get("file", 0)
+        kernel = stat["kernel"] if "kernel" in stat else sum(stat.get(key, 0) for key in V2_KERNEL_KEYS)
+    else:
+        anon = stat.get("total_rss", stat.get("rss", 0))
+        file = stat.get("total_cache", stat.get("cache", 0))
+        kernel = max(usage - anon - file, 0)  # v1 doesn't break it down; this is what's left
+    return {"anon": anon, "file": file, "kernel": kernel, "working_set": working_set(usage, stat)}
+
+
+def _read_stat(path: Path) -> Dict[str, int]:
+    stat = {}
+    for line in path.read_text().splitlines():
+        key, _, value = line.partition(" ")
+        if value.isdigit():
+            stat[key] = int(value)
+    return stat
+
+
+class MemoryStatsService:
+    """
+    Memory-only container stats, for ranking containers by memory.
+
+    Reads memory.current/memory.stat (or the v1 equivalents) straight from each
+    container's cgroup when CGROUP_ROOT exposes them: a few small file reads per
+    container and no daemon round trips besides the container list. Otherwise
+    falls back to one-shot stats API calls made in parallel. Only the top N are
+    kept, selected with a heap rather than sorting every container.
+    """
+
+    def __init__(self):
+        # Shared by concurrent requests: entries are popped, and looked up without a separate `in` check
+        self._cgroup_dirs: Dict[str, Optional[Path]] = {}
+        # Threads are started on first use
+        self._pool = ThreadPoolExecutor(max_workers=API_CONCURRENCY, thread_name_prefix="memory-stats")
+
+    def top(self, top: Optional[int] = None) -> Dict[str, Any]:
+        containers = docker_service.running_containers()
+        # Forget cgroup paths of containers that are gone
+        running = {c["id"] for c in containers}
+        for container_id in list(self._cgroup_dirs):
+            if container_id not in running:
+                self._cgroup_dirs.pop(container_id, None)
+
+        host_memory = psutil.virtual_memory().total
+        from_api = []
+        entries = []
+        for container in containers:
+            entry = self._from_cgroup(container, host_memory)
+            if entry is None:
+                from_api.append(container)
+            else:
+                entries.append(entry)
+        if from_api:
+            entries += [e for e in self._pool.map(lambda c: self._from_api(c, host_memory), from_api) if e]
+
+        selected = heapq.nlargest(top, entries, key=lambda e: e["memory_usage"]) if top else sorted(
+            entries, key=lambda e: e["memory_usage"], reverse=True
+        )
+        return {
+            "count": len(entries),
+            "total_usage": sum(e["memory_usage"] for e in entries),
+            "host_memory": host_memory,
+            "containers": selected,
+        }
+
+    def _cgroup_dir(self, container_id: str) -> Optional[Path]:
+        try:
+            return self._cgroup_dirs[container_id]
+        except KeyError:
+            root = Path(settings.CGROUP_ROOT)
+            candidates = [root / d.format(id=container_id) for d in CGROUP_V2_DIRS + CGROUP_V1_DIRS]
+            cgroup = self._cgroup_dirs[container_id] = next((d for d in candidates if (d / "memory.stat").exists()), None)
+            return cgroup
+
+    def _from_cgroup(self, container: Dict[str, str], host_memory: int) -> Optional[Dict[str, Any]]:
+        cgroup = self._cgroup_dir(container["id"])
+        if cgroup is None:
+            return None
+        try:
+            stat = _read_stat(cgroup / "memory.stat")
+            if (cgroup / "memory.current").exists():
+                usage = int((cgroup / "memory.current").read_text())
+                limit_raw = (cgroup / "memory.max").read_text().strip()
+            else:
+                usage = int((cgroup / "memory.usage_in_bytes").read_text())
+                limit_raw = (cgroup / "memory.limit_in_bytes").read_text().strip()
+        except (OSError, ValueError):
+            # Container stopped between listing and reading
+            self._cgroup_dirs.pop(container["id"], None)
+            return None
+        # "max" (v2) or a huge number (v1) means unlimited; Docker reports host memory then
+        limit = host_memory if limit_raw == "max" else min(int(limit_raw), host_memory)
+        return self._entry(container, usage, limit, stat, "cgroup")
+
+    def _from_api(self, container: Dict[str, str], host_memory: int) -> Optional[Dict[str, Any]]:
+        try:
+            memory_stats = docker_service.get_memory_stats(container["id"])
+        except Exception as e:
+            logger.error(f"Error getting memory stats for container {container['id'][:12]}: {e}")
+            return None
+        if not memory_stats or "usage" not in memory_stats:
+            return None
+        usage = memory_stats["usage"]
+        limit = memory_stats.get("limit") or host_memory
+        return self._entry(container, usage, limit, memory_stats.get("stats") or {}, "api")
+
+    @staticmethod
+    def _entry(container: Dict[str, str], usage: int, limit: int, stat: Dict[str, int], source: str) -> Dict[str, Any]:
+        return {
+            "id": container["id"][:12],
+            "name": container["name"],
+            "memory_usage": usage,
+            "memory_limit": limit,
+            "memory_percent": round(usage / limit * 100, 2) if limit else 0.0,
+            **breakdown(usage, stat),
+            "source": source,
+        }
+
+
+memory_stats_service = MemoryStatsService()
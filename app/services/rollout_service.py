@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import contextvars
+import logging
+import socket
+import time
+
+from docker.errors import APIError
+
+from app.core.config import settings
+from app.schemas.docker import RollingRestartPolicy
+from app.services.docker_service import docker_service, DockerUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Containers in a batch restarted in parallel, at most
+MAX_PARALLEL_RESTARTS = 8
+
+HEALTHY = "healthy"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class HealthCheckFailed(Exception):
+    """The container can't become healthy any more (exited, or its HEALTHCHECK reports unhealthy)."""
+
+
+class RolloutService:
+    """
+    Health-aware restarts. A rolling restart restarts containers batch_size at a
+    time and waits for every container in the batch to pass its health check
+    before starting the next batch, so a replicated service never has all its
+    replicas down at once. A batch that fails or times out aborts the rollout
+    (unless abort_on_failure is off), leaving the remaining containers untouched.
+    """
+
+    @staticmethod
+    def worst_case_seconds(count: int, policy: RollingRestartPolicy) -> int:
+        """Longest a rollout of `count` containers can take: every batch uses its full stop and health timeouts."""
+        batches = -(-count // policy.batch_size)
+        stop_timeout = settings.DOCKER_STOP_TIMEOUT if policy.stop_timeout is None else policy.stop_timeout
+        return batches * (stop_timeout + policy.health_timeout)
+
+    def rolling_restart(
+        self,
+        container_ids: List[str],
+        policy: RollingRestartPolicy,
+        report: Optional[Callable[..., None]] = None,
+    ) -> Dict[str, Any]:
+        started = time.monotonic()
+        batches = [container_ids[i:i + policy.batch_size] for i in range(0, len(container_ids), policy.batch_size)]
+        steps: List[Dict[str, Any]] = []
+        aborted = False
+
+        for number, batch in enumerate(batches, start=1):
+            if aborted:
+                steps += [{"container_id": cid, "batch": number, "status": SKIPPED} for cid in batch]
+                continue
+            if report:
+                report(f"Batch {number}/{len(batches)}: restarting {', '.join(batch)}", progress=(number - 1) / len(batches))
+
+            batch_steps = self._restart_batch(number, batch, policy)
+            steps += batch_steps
+            failed = [step for step in batch_steps if step["status"] == FAILED]
+            for step in failed:
+                logger.warning(f"Rolling restart: {step['container_id']} failed: {step['error']}")
+                if report:
+                    report(f"{step['container_id']} failed: {step['error']}")
+            if failed and policy.abort_on_failure and number < len(batches):
+                aborted = True
+                if report:
+                    report(f"Aborting rollout after batch {number}/{len(batches)}")
+
+        success = all(step["status"] == HEALTHY for step in steps)
+        return {
+            "success": success,
+            "aborted": aborted,
+            "batches": len(batches),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "containers": steps,
+        }
+
+    def _restart_batch(self, number: int, batch: List[str], policy: RollingRestartPolicy) -> List[Dict[str, Any]]:
+        def restart(container_id: str) -> Dict[str, Any]:
+            step: Dict[str, Any] = {"container_id": container_id, "batch": number}
+            restart_started = time.monotonic()
+            try:
+                ok = docker_service.restart_container(container_id, timeout=policy.stop_timeout)
+                error = None if ok else "Failed to restart container or container not found"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            step["restart_ms"] = round((time.monotonic() - restart_started) * 1000, 1)
+            if error:
+                step.update(status=FAILED, error=error)
+            return step
+
+        # Pool threads start with an empty context; carry the caller's over so an admission
+        # slot it already holds for a container (see admit_async) isn't queued for again
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(len(batch), MAX_PARALLEL_RESTARTS), thread_name_prefix="rollout") as pool:
+            steps = list(pool.map(lambda container_id: context.copy().run(restart, container_id), batch))
+
+        # The timeout covers the whole batch, measured from the last restart returning
+        ready_started = time.monotonic()
+        deadline = ready_started + policy.health_timeout
+        pending = [step for step in steps if "status" not in step]
+        while pending:
+            time.sleep(policy.probe_interval)
+            for step in list(pending):
+                try:
+                    check, healthy = self.check_health(step["container_id"], policy)
+                except HealthCheckFailed as e:
+                    step.update(status=FAILED, error=str(e))
+                except (DockerUnavailableError, APIError) as e:
+                    # Can't tell whether it came up; failing the step lets the policy halt the rollout
+                    step.update(status=FAILED, error=f"{type(e).__name__}: {e}")
+                else:
+                    step["check"] = check
+                    if not healthy:
+                        continue
+                    step["status"] = HEALTHY
+                step["ready_ms"] = round((time.monotonic() - ready_started) * 1000, 1)
+                pending.remove(step)
+            if pending and time.monotonic() >= deadline:
+                for step in pending:
+                    step.update(status=FAILED, error=f"Not healthy within {policy.health_timeout}s")
+                break
+        return steps
+
+    def check_health(self, container_id: str, policy: RollingRestartPolicy):
+        """
+        (check used, healthy?) for one poll. Raises HealthCheckFailed when waiting
+        longer can't help.
+        """
+        state = docker_service.container_state(container_id)
+        if state is None:
+            raise HealthCheckFailed("Container disappeared")
+        if not state["running"] and state["status"] in ("exited", "dead"):
+            raise HealthCheckFailed(f"Container {state['status']} with code {state['exit_code']}")
+
+        check = policy.health_check
+        if check == "auto":
+            check = "healthcheck" if state["health"] else ("tcp" if policy.probe_port else "running")
+
+        if check == "healthcheck":
+            if state["health"] is None:
+                raise HealthCheckFailed("Container has no HEALTHCHECK")
+            if state["health"] == "unhealthy":
+                raise HealthCheckFailed("HEALTHCHECK reports unhealthy")
+            return check, state["health"] == "healthy"
+
+        if not state["running"]:
+            return check, False
+        if check == "running":
+            return check, True
+
+        host = policy.probe_host or state["ip_address"]
+        if not host:
+            raise HealthCheckFailed("No address to probe; set probe_host")
+        if check == "tcp":
+            return check, self._tcp_probe(host, policy.probe_port, policy.probe_interval)
+        return check, self._http_probe(host, policy.probe_port, policy.probe_path, policy.probe_interval)
+
+    @staticmethod
+    def _tcp_probe(host: str, port: int, timeout: float) -> bool:
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _http_probe(host: str, port: int, path: str, timeout: float) -> bool:
+        import httpx
+        try:
+            response = httpx.get(f"http://{host}:{port}/{path.lstrip('/')}", timeout=timeout)
+        except httpx.HTTPError:
+            return False
+        return response.status_code < 400
+
+
+rollout_service = RolloutService()
@@ -0,0 +1,458 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.percentiles import percentile
+from app.db.session import SessionLocal
+from app.models.scale_to_zero import ScaleToZeroTarget
+from app.services.cluster_service import cluster_service
+from app.services.docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+TARGETS_REVISION = "scale-to-zero:revision"
+STATUS_SHARED_KEY = "scale-to-zero:status"
+# How often the leader looks for target changes and retries ports that failed to bind
+RELOAD_INTERVAL = 5.0
+STOP_POLL_INTERVAL = 0.5
+# Cold starts kept per target for the latency percentiles
+COLD_START_WINDOW = 100
+# Between connection attempts while a woken container's port opens
+PORT_POLL_INTERVAL = 0.2
+SPLICE_CHUNK = 64 * 1024
+# Request-line prefixes that get an HTTP 503 (rather than a bare close) when waking fails
+HTTP_METHODS = (b"GET ", b"HEAD ", b"POST ", b"PUT ", b"DELETE ", b"PATCH ", b"OPTIONS ")
+
+
+def _utc(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
+
+
+class WakeError(Exception):
+    """The container couldn't be started, or its port didn't open within wake_timeout."""
+
+
+@dataclass
+class ProxyTarget:
+    """Runtime state of one target on the leader."""
+    config: Dict[str, Any]
+    server: Optional[asyncio.AbstractServer] = None
+    bind_attempted: float = 0.0
+    state: str = "unknown"
+    host: Optional[str] = None  # Resolved upstream address while running
+    waking: Optional[asyncio.Task] = None
+    stopping: Optional[asyncio.Future] = None  # Set while an idle stop is in progress
+    active_connections: int = 0
+    total_connections: int = 0
+    last_activity: Optional[float] = None
+    counters: Optional[Dict[str, int]] = None
+    counters_at: float = 0.0
+    cpu_percent: Optional[float] = None
+    network_rate: Optional[float] = None
+    quiet_since: Optional[float] = None
+    slept_at: Optional[float] = None
+    cold_starts: Deque[float] = field(default_factory=lambda: deque(maxlen=COLD_START_WINDOW))
+    cold_start_count: int = 0
+    failures: int = 0
+    error: Optional[str] = None
+
+
+class ScaleToZeroService:
+    """
+    Stops opted-in containers once they have been idle for idle_seconds, and
+    starts them again when a client connects.
+
+    Each target gets a proxy port (listen_port) that clients use instead of the
+    container's own. Connections are spliced to target_port byte for byte, so
+    any TCP protocol works; HTTP clients additionally get a 503 if the wake
+    fails. A connection to a sleeping container starts it (once, however many
+    clients arrive meanwhile; the start goes through admission control like any
+    other), waits for the port to accept connections and then proxies; the time
+    from the first connection to the port opening is recorded as the cold start.
+
+    Idle means no open proxied connections, and CPU and network rates (from
+    one-shot stats every SCALE_TO_ZERO_CHECK_INTERVAL seconds) below
+    SCALE_TO_ZERO_CPU_PERCENT / SCALE_TO_ZERO_NETWORK_BYTES, so traffic that
+    bypasses the proxy keeps the container awake too.
+
+    The feature is off unless SCALE_TO_ZERO_ENABLED is set. Proxy ports listen
+    on SCALE_TO_ZERO_BIND_HOST (127.0.0.1 by default) and only ever forward to
+    the target container's own IP address.
+
+    The proxy and the idle checks run on the scheduler leader, on a thread with
+    its own event loop; the other workers serve status from the shared cache.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._targets: Dict[int, ProxyTarget] = {}
+        self._revision: Optional[int] = None
+        self._last_check = 0.0
+
+    def start(self):
+        if self._thread is None and settings.SCALE_TO_ZERO_ENABLED:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scale-to-zero", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def targets_changed(self):
+        """Called after target CRUD; the leader rebinds its proxy ports on the next reload."""
+        cluster_service.bump_revision(TARGETS_REVISION)
+
+    # --- manager loop ---
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _main(self):
+        try:
+            while not self._stop.is_set():
+                if cluster_service.is_leader:
+                    try:
+                        await self._reload()
+                        if time.monotonic() - self._last_check >= settings.SCALE_TO_ZERO_CHECK_INTERVAL:
+                            self._last_check = time.monotonic()
+                            await self._check_idle()
+                            await asyncio.to_thread(cluster_service.put_shared, STATUS_SHARED_KEY, self._status())
+                    except Exception as e:
+                        logger.error(f"Scale-to-zero check failed: {e}")
+                elif self._targets:
+                    # Leadership moved; the new leader binds the ports
+                    await self._close_all()
+                # Short sleeps so stop() doesn't wait out a whole interval
+                deadline = time.monotonic() + RELOAD_INTERVAL
+                while not self._stop.is_set() and time.monotonic() < deadline:
+                    await asyncio.sleep(STOP_POLL_INTERVAL)
+        finally:
+            await self._close_all()
+
+    async def _reload(self):
+        revision = await asyncio.to_thread(cluster_service.get_revision, TARGETS_REVISION)
+        if revision != self._revision:
+            configs = {c["id"]: c for c in await asyncio.to_thread(self._load_targets)}
+            for target_id in list(self._targets):
+                target = self._targets[target_id]
+                config = configs.get(target_id)
+                if config is None or (config["listen_port"], config["container_id"]) != (
+                    target.config["listen_port"], target.config["container_id"]
+                ):
+                    await self._close(self._targets.pop(target_id))
+                else:
+                    target.config = config
+                    target.host = None  # target_port may have changed
+            for target_id, config in configs.items():
+                if target_id not in self._targets:
+                    self._targets[target_id] = ProxyTarget(config=config)
+            self._revision = revision
+
+        now = time.monotonic()
+        for target in self._targets.values():
+            if target.server is None and now - target.bind_attempted >= settings.SCALE_TO_ZERO_CHECK_INTERVAL:
+                await self._bind(target)
+
+    @staticmethod
+    def _load_targets() -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            targets = db.query(ScaleToZeroTarget).filter(ScaleToZeroTarget.is_active == True).all()  # noqa: E712
+            return [
+                {column: getattr(t, column) for column in (
+                    "id", "container_id", "listen_port", "target_port", "idle_seconds", "wake_timeout"
+                )}
+                for t in targets
+            ]
+        finally:
+            db.close()
+
+    async def _bind(self, target: ProxyTarget):
+        target.bind_attempted = time.monotonic()
+        port = target.config["listen_port"]
+        try:
+            target.server = await asyncio.start_server(
+                lambda reader, writer: self._handle(target, reader, writer), settings.SCALE_TO_ZERO_BIND_HOST, port
+            )
+        except OSError as e:
+            target.state, target.error = "error", f"Can't listen on port {port}: {e}"
+            logger.error(f"Scale-to-zero: {target.error}")
+            return
+        if target.state == "error":
+            target.state, target.error = "unknown", None
+        logger.info(f"Scale-to-zero: proxying port {port} to {target.config['container_id']}:{target.config['target_port']}")
+
+    async def _close(self, target: ProxyTarget):
+        if target.server is not None:
+            target.server.close()
+            await target.server.wait_closed()
+            target.server = None
+
+    async def _close_all(self):
+        for target in self._targets.values():
+            await self._close(target)
+        self._targets.clear()
+        self._revision = None
+
+    # --- idle checks ---
+
+    async def _check_idle(self):
+        for target in list(self._targets.values()):
+            if target.waking is not None or target.state == "error":
+                continue
+            try:
+                if await asyncio.to_thread(self._check_target, target):
+                    await self._sleep(target)
+            except Exception as e:
+                logger.error(f"Scale-to-zero: idle check of {target.config['container_id']} failed: {e}")
+
+    def _check_target(self, target: ProxyTarget) -> bool:
+        """
+        Measure a target; True if it has been idle for idle_seconds. Runs on a
+        worker thread: daemon calls only, plus plain attribute updates.
+        """
+        container_id = target.config["container_id"]
+        state = docker_service.container_state(container_id)
+        if state is None or not state["running"]:
+            target.state = "sleeping" if state is not None else "unknown"
+            target.error = None if state is not None else "Container not found"
+            target.host = target.counters = target.cpu_percent = target.network_rate = target.quiet_since = None
+            return False
+        target.state, target.error = "running", None
+
+        counters = docker_service.get_usage_counters(container_id)
+        now = time.time()
+        previous, previous_at = target.counters, target.counters_at
+        target.counters, target.counters_at = counters, now
+        if counters is None or previous is None or now <= previous_at or counters["cpu_total"] < previous["cpu_total"]:
+            # First sample after a (re)start: nothing to compare against yet
+            target.cpu_percent = target.network_rate = target.quiet_since = None
+            return False
+        elapsed = now - previous_at
+        target.cpu_percent = round((counters["cpu_total"] - previous["cpu_total"]) / (elapsed * 1e9) * 100, 2)
+        network = counters["rx_bytes"] + counters["tx_bytes"] - previous["rx_bytes"] - previous["tx_bytes"]
+        target.network_rate = round(max(network, 0) / elapsed, 1)
+
+        quiet = (
+            target.active_connections == 0
+            and target.cpu_percent < settings.SCALE_TO_ZERO_CPU_PERCENT
+            and target.network_rate < settings.SCALE_TO_ZERO_NETWORK_BYTES
+        )
+        if not quiet:
+            target.quiet_since = None
+            return False
+        # Quiet since the start of this interval, or since the last proxied byte if that was later
+        if target.quiet_since is None:
+            target.quiet_since = previous_at
+        if target.last_activity is not None and target.last_activity > target.quiet_since:
+            target.quiet_since = target.last_activity
+        return now - target.quiet_since >= target.config["idle_seconds"]
+
+    async def _sleep(self, target: ProxyTarget):
+        """Stop an idle target. Runs on the loop, so no connection can slip in between the re-check and "stopping"."""
+        if target.active_connections or target.waking is not None or (target.last_activity or 0) > target.quiet_since:
+            return
+        container_id = target.config["container_id"]
+        logger.info(f"Scale-to-zero: stopping {container_id}, idle for {round(time.time() - target.quiet_since)}s")
+        # Connections arriving from here on wait for the stop, then wake the container again
+        target.state = "stopping"
+        target.stopping = asyncio.get_running_loop().create_future()
+        try:
+            stopped = await asyncio.to_thread(docker_service.stop_container, container_id)
+        except Exception as e:
+            logger.error(f"Scale-to-zero: stopping {container_id} failed: {e}")
+            stopped = False
+        if stopped:
+            target.slept_at = time.time()
+            target.host = target.counters = target.cpu_percent = target.network_rate = target.quiet_since = None
+        else:
+            target.error = "Failed to stop container"
+        if target.waking is None:
+            target.state = "sleeping" if stopped else "unknown"
+        target.stopping.set_result(None)
+        target.stopping = None
+
+    # --- proxy ---
+
+    async def _handle(self, target: ProxyTarget, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        target.active_connections += 1
+        target.total_connections += 1
+        target.last_activity = time.time()
+        upstream_writer = None
+        try:
+            try:
+                upstream_reader, upstream_writer = await self._connect_upstream(target)
+            except WakeError as e:
+                await self._refuse(reader, writer, str(e))
+                return
+            await asyncio.gather(
+                self._pipe(target, reader, upstream_writer),
+                self._pipe(target, upstream_reader, writer),
+            )
+        except Exception as e:
+            logger.debug(f"Scale-to-zero: connection to port {target.config['listen_port']} ended: {e}")
+        finally:
+            target.active_connections -= 1
+            target.last_activity = time.time()
+            for w in (writer, upstream_writer):
+                if w is not None:
+                    w.close()
+
+    async def _connect_upstream(self, target: ProxyTarget):
+        for attempt in range(2):
+            if target.host is None or target.state != "running":
+                if target.waking is None:
+                    target.waking = asyncio.get_running_loop().create_task(self._wake(target))
+                # shield: one client giving up mustn't cancel the wake for everyone else
+                await asyncio.shield(target.waking)
+            try:
+                return await asyncio.wait_for(
+                    asyncio.open_connection(target.host, target.config["target_port"]), target.config["wake_timeout"]
+                )
+            except (OSError, asyncio.TimeoutError):
+                if attempt:
+                    raise WakeError(f"Can't connect to {target.host}:{target.config['target_port']}")
+                # Stopped behind our back (or its address changed): check again and wake it if needed
+                target.state = "unknown"
+
+    async def _wake(self, target: ProxyTarget):
+        config = target.config
+        started = time.monotonic()
+        previous_state, target.state = target.state, "waking"
+        cold = False
+        try:
+            if target.stopping is not None:
+                await asyncio.shield(target.stopping)
+            state = await asyncio.to_thread(docker_service.container_state, config["container_id"])
+            if state is None:
+                raise WakeError("Container not found")
+            if not state["running"]:
+                cold = True
+                logger.info(f"Scale-to-zero: waking {config['container_id']}")
+                if not await asyncio.to_thread(docker_service.start_container, config["container_id"]):
+                    raise WakeError("Failed to start container")
+                state = await asyncio.to_thread(docker_service.container_state, config["container_id"])
+            # Only ever the container's own address: a proxy port must not become a relay to other hosts
+            host = (state or {}).get("ip_address")
+            if not host:
+                raise WakeError("Container has no IP address")
+
+            deadline = started + config["wake_timeout"]
+            while True:
+                try:
+                    _, probe = await asyncio.wait_for(asyncio.open_connection(host, config["target_port"]), PORT_POLL_INTERVAL * 5)
+                    probe.close()
+                    break
+                except (OSError, asyncio.TimeoutError):
+                    if time.monotonic() >= deadline:
+                        raise WakeError(f"Port {config['target_port']} not open within {config['wake_timeout']}s")
+                    await asyncio.sleep(PORT_POLL_INTERVAL)
+        except Exception as e:
+            if cold:
+                target.failures += 1
+            target.state, target.error = ("sleeping" if cold else previous_state), str(e)
+            logger.warning(f"Scale-to-zero: waking {config['container_id']} failed: {e}")
+            raise WakeError(str(e)) from e
+        finally:
+            target.waking = None
+
+        target.state, target.host, target.error = "running", host, None
+        if cold:
+            target.cold_starts.append(round((time.monotonic() - started) * 1000, 1))
+            target.cold_start_count += 1
+            target.counters = target.quiet_since = None
+            logger.info(f"Scale-to-zero: {config['container_id']} ready after {target.cold_starts[-1]}ms")
+
+    @staticmethod
+    async def _pipe(target: ProxyTarget, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                data = await reader.read(SPLICE_CHUNK)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+                target.last_activity = time.time()
+        finally:
+            # Half-close so the other direction can finish its response
+            if writer.can_write_eof() and not writer.is_closing():
+                try:
+                    writer.write_eof()
+                except OSError:
+                    pass
+
+    @staticmethod
+    async def _refuse(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reason: str):
+        try:
+            head = await asyncio.wait_for(reader.read(16), 1.0)
+        except (OSError, asyncio.TimeoutError):
+            head = b""
+        if head.startswith(HTTP_METHODS):
+            body = f"Service unavailable: {reason}\n".encode()
+            writer.write(
+                b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: text/plain\r\nConnection: close\r\nRetry-After: 5\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            try:
+                await writer.drain()
+            except OSError:
+                pass
+
+    # --- status ---
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-target state: live on the scheduler leader, the leader's last published copy elsewhere."""
+        if cluster_service.is_leader and self._thread is not None:
+            return self._status()
+        shared = cluster_service.get_shared(STATUS_SHARED_KEY)
+        return (shared[0] or []) if shared else []
+
+    def _status(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        statuses = []
+        for target_id, target in sorted(self._targets.items()):
+            cold_starts = sorted(target.cold_starts)
+            statuses.append({
+                "id": target_id,
+                "container_id": target.config["container_id"],
+                "listen_port": target.config["listen_port"],
+                "state": target.state,
+                "listening": target.server is not None,
+                "active_connections": target.active_connections,
+                "total_connections": target.total_connections,
+                "cpu_percent": target.cpu_percent,
+                "network_bytes_per_sec": target.network_rate,
+                "idle_seconds": target.config["idle_seconds"],
+                "quiet_for": round(now - target.quiet_since, 1) if target.quiet_since is not None else None,
+                "last_activity": _utc(target.last_activity),
+                "slept_at": _utc(target.slept_at),
+                "cold_starts": {
+                    "count": target.cold_start_count,
+                    "failures": target.failures,
+                    "last_ms": target.cold_starts[-1] if cold_starts else None,
+                    "p50_ms": percentile(cold_starts, 0.50),
+                    "p95_ms": percentile(cold_starts, 0.95),
+                    "max_ms": cold_starts[-1] if cold_starts else None,
+                },
+                "error": target.error,
+            })
+        return statuses
+
+
+scale_to_zero_service = ScaleToZeroService()
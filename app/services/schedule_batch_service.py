@@ -0,0 +1,169 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+import json
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.models.schedule import ContainerSchedule
+from app.schemas.schedule import Schedule, ScheduleApplyItem, ScheduleBase, ScheduleBatch, ScheduleCreate
+from app.services.cluster_service import cluster_service
+from app.services.scheduler_service import scheduler_service
+
+logger = logging.getLogger(__name__)
+
+# Schedule fields written and compared (everything but the id)
+FIELDS = tuple(ScheduleBase.model_fields)
+# Ids per DELETE ... IN (...), well under SQLite's bound parameter limit
+DELETE_CHUNK = 500
+
+
+class ScheduleBatchError(ValueError):
+    """The batch can't be applied as a whole (unknown ids, ambiguous names); nothing was written."""
+
+
+def schedule_columns(schedule_in: ScheduleBase) -> Dict[str, Any]:
+    """Model columns for a validated schedule, with container_ids and options as JSON."""
+    data = schedule_in.model_dump(include=set(FIELDS))
+    data["container_ids"] = json.dumps(data["container_ids"])
+    if data.get("options") is not None:
+        data["options"] = json.dumps(data["options"])
+    return data
+
+
+def changed_fields(schedule: ContainerSchedule, schedule_in: ScheduleBase) -> List[str]:
+    current = Schedule.model_validate(schedule).model_dump(include=set(FIELDS))
+    new = schedule_in.model_dump(include=set(FIELDS))
+    return [field for field in FIELDS if current[field] != new[field]]
+
+
+class ScheduleBatchService:
+    """
+    Many schedule changes as one unit: the whole set is validated up front
+    (by the request schemas, plus id/name matching here), written in a single
+    transaction, and the scheduler is reconciled once against the resulting
+    diff, with a single revision bump so the other workers reload once.
+    Updates that change nothing are neither written nor rescheduled.
+
+    `batch` takes explicit create/update/delete lists; `apply` takes the full
+    desired set (e.g. an export, edited) and works out the diff itself,
+    deleting schedules that aren't in it unless prune is off.
+    """
+
+    def batch(self, db: Session, batch: ScheduleBatch, dry_run: bool = False) -> Dict[str, Any]:
+        ids = [u.id for u in batch.update] + batch.delete
+        repeated = sorted(i for i, n in Counter(ids).items() if n > 1)
+        if repeated:
+            raise ScheduleBatchError(f"Schedules appear more than once: {repeated}")
+        rows = {r.id: r for r in db.query(ContainerSchedule).filter(ContainerSchedule.id.in_(ids)).all()} if ids else {}
+        missing = [i for i in ids if i not in rows]
+        if missing:
+            raise ScheduleBatchError(f"Schedules not found: {missing}")
+        return self._execute(
+            db,
+            creates=batch.create,
+            updates=[(rows[u.id], u) for u in batch.update],
+            deletes=[rows[i] for i in batch.delete],
+            dry_run=dry_run,
+        )
+
+    def apply(
+        self,
+        db: Session,
+        items: List[ScheduleApplyItem],
+        match: str = "id",
+        prune: bool = True,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Make the stored schedules equal `items`. match="id" updates the schedule
+        with each item's id (items without one are created); match="name" pairs
+        items and schedules by schedule_name instead, ignoring ids, for sets
+        kept outside this instance.
+        """
+        existing = db.query(ContainerSchedule).order_by(ContainerSchedule.id).all()
+        creates: List[ScheduleCreate] = []
+        updates: List[Tuple[ContainerSchedule, ScheduleCreate]] = []
+
+        if match == "name":
+            repeated = sorted(name for name, n in Counter(i.schedule_name for i in items).items() if n > 1)
+            if repeated:
+                raise ScheduleBatchError(f"Schedule names appear more than once: {repeated}")
+            by_name: Dict[str, List[ContainerSchedule]] = defaultdict(list)
+            for schedule in existing:
+                by_name[schedule.schedule_name].append(schedule)
+            ambiguous = sorted(i.schedule_name for i in items if len(by_name.get(i.schedule_name, ())) > 1)
+            if ambiguous:
+                raise ScheduleBatchError(f"Several existing schedules are named {ambiguous}; match by id instead")
+            for item in items:
+                matched = by_name.get(item.schedule_name)
+                if matched:
+                    updates.append((matched[0], item))
+                else:
+                    creates.append(item)
+        else:
+            repeated = sorted(i for i, n in Counter(i.id for i in items if i.id is not None).items() if n > 1)
+            if repeated:
+                raise ScheduleBatchError(f"Schedules appear more than once: {repeated}")
+            by_id = {schedule.id: schedule for schedule in existing}
+            missing = [i.id for i in items if i.id is not None and i.id not in by_id]
+            if missing:
+                raise ScheduleBatchError(f"Schedules not found: {missing}")
+            for item in items:
+                if item.id is None:
+                    creates.append(item)
+                else:
+                    updates.append((by_id[item.id], item))
+
+        kept = {schedule.id for schedule, _ in updates}
+        deletes = [schedule for schedule in existing if schedule.id not in kept] if prune else []
+        return self._execute(db, creates, updates, deletes, dry_run)
+
+    def _execute(
+        self,
+        db: Session,
+        creates: List[ScheduleCreate],
+        updates: List[Tuple[ContainerSchedule, ScheduleCreate]],
+        deletes: List[ContainerSchedule],
+        dry_run: bool,
+    ) -> Dict[str, Any]:
+        changed = []
+        for schedule, schedule_in in updates:
+            fields = changed_fields(schedule, schedule_in)
+            if fields:
+                changed.append((schedule, schedule_in, fields))
+        result: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "created": [{"id": None, "schedule_name": c.schedule_name} for c in creates],
+            "updated": [{"id": s.id, "schedule_name": i.schedule_name, "fields": f} for s, i, f in changed],
+            "deleted": [{"id": s.id, "schedule_name": s.schedule_name} for s in deletes],
+            "unchanged": len(updates) - len(changed),
+        }
+        if dry_run or not (creates or changed or deletes):
+            return result
+
+        created = [ContainerSchedule(**schedule_columns(c)) for c in creates]
+        db.add_all(created)
+        for schedule, schedule_in, _ in changed:
+            for field, value in schedule_columns(schedule_in).items():
+                setattr(schedule, field, value)
+        deleted_ids = [s.id for s in deletes]
+        for start in range(0, len(deleted_ids), DELETE_CHUNK):
+            chunk = deleted_ids[start:start + DELETE_CHUNK]
+            db.query(ContainerSchedule).filter(ContainerSchedule.id.in_(chunk)).delete(synchronize_session=False)
+        # The rows are handed to the scheduler after the commit; don't reload each one
+        db.expire_on_commit = False
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        result["created"] = [{"id": s.id, "schedule_name": s.schedule_name} for s in created]
+        scheduler_service.apply_changes(created + [s for s, _, _ in changed], deleted_ids)
+        cluster_service.schedules_changed()
+        logger.info(f"Schedule batch: {len(created)} created, {len(changed)} updated, {len(deleted_ids)} deleted")
+        return result
+
+
+schedule_batch_service = ScheduleBatchService()
@@ -0,0 +1,225 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.percentiles import percentiles
+from app.db.session import SessionLocal
+from app.models.schedule import ActionType
+from app.models.schedule_run import ScheduleRun, ScheduleRunStatus
+
+logger = logging.getLogger(__name__)
+
+# How often old rows are pruned, at most
+PRUNE_INTERVAL = 3600
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, like every other timestamp in the database."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+class ScheduleRunService:
+    """
+    History of schedule executions in the `schedule_run` table.
+
+    The scheduler records a run when it finishes; rows are queued in memory and
+    a background thread inserts them in one statement every
+    SCHEDULE_RUN_FLUSH_INTERVAL seconds (or sooner once SCHEDULE_RUN_BATCH_SIZE
+    are waiting), so a schedule touching many containers doesn't cost a commit
+    per container. The same thread prunes rows older than SCHEDULE_RUN_RETENTION_DAYS.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def record(
+        self,
+        schedule_id: int,
+        job_id: str,
+        action: Optional[ActionType],
+        status: ScheduleRunStatus,
+        scheduled_at: datetime,
+        started_at: Optional[datetime] = None,
+        finished_at: Optional[datetime] = None,
+        results: Optional[List[Dict[str, Any]]] = None,
+        detail: Optional[str] = None,
+    ):
+        scheduled_at = _utc(scheduled_at)
+        started_at = _utc(started_at) if started_at else None
+        finished_at = _utc(finished_at) if finished_at else None
+        results = results or []
+        row = {
+            "schedule_id": schedule_id,
+            "job_id": job_id,
+            "action": action,
+            "status": status,
+            "scheduled_at": scheduled_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "lag_ms": (started_at - scheduled_at).total_seconds() * 1000 if started_at else None,
+            "duration_ms": (finished_at - started_at).total_seconds() * 1000 if started_at and finished_at else None,
+            "containers_total": len(results),
+            "containers_failed": sum(1 for r in results if not r["ok"]),
+            "results": json.dumps(results) if results else None,
+            "detail": detail,
+        }
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning(f"Schedule run history queue full; dropped run of schedule {schedule_id}")
+            return
+        if self._queue.qsize() >= settings.SCHEDULE_RUN_BATCH_SIZE:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="schedule-runs", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout=settings.SCHEDULE_RUN_FLUSH_INTERVAL + 1)
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(settings.SCHEDULE_RUN_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    self.prune()
+            except Exception as e:
+                logger.error(f"Failed to write schedule run history: {e}")
+
+    def flush(self):
+        """Insert everything queued so far. Also called before reads so they see this worker's latest runs."""
+        with self._flush_lock:
+            while True:
+                batch: List[Dict[str, Any]] = []
+                while len(batch) < settings.SCHEDULE_RUN_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                db = SessionLocal()
+                try:
+                    db.execute(insert(ScheduleRun), batch)
+                    db.commit()
+                finally:
+                    db.close()
+
+    def prune(self) -> int:
+        self._last_prune = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=settings.SCHEDULE_RUN_RETENTION_DAYS)
+        db = SessionLocal()
+        try:
+            removed = db.query(ScheduleRun).filter(ScheduleRun.scheduled_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if removed:
+            logger.info(f"Pruned {removed} schedule run(s) older than {settings.SCHEDULE_RUN_RETENTION_DAYS} days")
+        return removed
+
+    # --- reads ---
+
+    def list(self, schedule_id: int, limit: int = 50, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest first; pass the last id of a page as `before_id` for the next one."""
+        self.flush()
+        db = SessionLocal()
+        try:
+            query = db.query(ScheduleRun).filter(ScheduleRun.schedule_id == schedule_id)
+            if before_id is not None:
+                query = query.filter(ScheduleRun.id < before_id)
+            return [self._to_dict(run) for run in query.order_by(ScheduleRun.id.desc()).limit(limit).all()]
+        finally:
+            db.close()
+
+    def stats(self, schedule_id: int, window: int = 500) -> Dict[str, Any]:
+        """
+        Latency percentiles over the last `window` runs: scheduler lag (fire time to
+        start), whole-run duration, and per-container action latency, slowest first.
+        """
+        self.flush()
+        db = SessionLocal()
+        try:
+            runs = (
+                db.query(ScheduleRun)
+                .filter(ScheduleRun.schedule_id == schedule_id)
+                .order_by(ScheduleRun.id.desc())
+                .limit(window)
+                .all()
+            )
+        finally:
+            db.close()
+
+        per_container: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for run in runs:
+            for result in json.loads(run.results) if run.results else []:
+                per_container[result["container_id"]].append(result)
+
+        containers = [
+            {
+                "container_id": container_id,
+                "runs": len(results),
+                "failures": sum(1 for r in results if not r["ok"]),
+                "latency_ms": percentiles((r["latency_ms"] for r in results), ndigits=1),
+                "last_error": next((r["error"] for r in results if r.get("error")), None),
+            }
+            for container_id, results in per_container.items()
+        ]
+        containers.sort(key=lambda c: c["latency_ms"]["p95"] if c["latency_ms"] else 0, reverse=True)
+
+        return {
+            "schedule_id": schedule_id,
+            "runs": len(runs),
+            "since": runs[-1].scheduled_at if runs else None,
+            "status_counts": dict(Counter(run.status.value for run in runs)),
+            "lag_ms": percentiles((run.lag_ms for run in runs if run.lag_ms is not None), ndigits=1),
+            "duration_ms": percentiles((run.duration_ms for run in runs if run.duration_ms is not None), ndigits=1),
+            "containers": containers,
+        }
+
+    @staticmethod
+    def _to_dict(run: ScheduleRun) -> Dict[str, Any]:
+        return {
+            "id": run.id,
+            "schedule_id": run.schedule_id,
+            "job_id": run.job_id,
+            "action": run.action,
+            "status": run.status,
+            "scheduled_at": run.scheduled_at,
+            "started_at": run.started_at,
+            "finished_at": run.finished_at,
+            "lag_ms": run.lag_ms,
+            "duration_ms": run.duration_ms,
+            "containers_total": run.containers_total,
+            "containers_failed": run.containers_failed,
+            "results": json.loads(run.results) if run.results else [],
+            "detail": run.detail,
+        }
+
+
+schedule_run_service = ScheduleRunService()
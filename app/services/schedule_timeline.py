@@ -0,0 +1,239 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+
+from tzlocal import get_localzone
+
+from app.core.config import settings
+from app.models.schedule import ActionType
+
+logger = logging.getLogger(__name__)
+
+# Extending the horizon goes this far past what's needed, so adding schedules
+# one after another doesn't re-extend every job each time the clock moves
+HORIZON_SLACK = timedelta(hours=1)
+# Same-container actions this close together are reported as conflicting
+CONFLICT_WINDOW = timedelta(seconds=60)
+# Actions that undo each other when they hit the same container at once
+OPPOSING = {
+    frozenset({ActionType.START, ActionType.STOP}),
+    frozenset({ActionType.RESTART, ActionType.STOP}),
+    frozenset({ActionType.ROLLING_RESTART, ActionType.STOP}),
+}
+
+
+def _next_fire_times(trigger, start: datetime, end: datetime, limit: int) -> List[datetime]:
+    """Fire times of `trigger` in [start, end], at most `limit` of them."""
+    times: List[datetime] = []
+    previous = None
+    now = start
+    while len(times) < limit:
+        fire_time = trigger.get_next_fire_time(previous, now)
+        if fire_time is None or fire_time > end:
+            break
+        if fire_time >= start:
+            times.append(fire_time)
+        previous = fire_time
+        now = fire_time + timedelta(microseconds=1)
+    return times
+
+
+class _TimelineJob:
+    def __init__(self, job):
+        self.job_id: str = job.job_id
+        self.schedule_id: int = job.schedule_id
+        self.schedule_name: str = job.schedule_name
+        self.action: ActionType = job.action
+        self.container_ids: List[str] = list(job.container_ids or [])
+        self.trigger = job.trigger
+        self.spread_seconds: int = job.spread_seconds
+        self.computed_until: Optional[datetime] = None
+
+
+class ScheduleTimeline:
+    """
+    Index of upcoming fire times for every scheduler job, kept sorted so a time
+    window is two bisects away instead of walking every trigger per request.
+
+    Fire times are precomputed up to a horizon that only moves forward: adding or
+    removing a schedule recomputes just that schedule's jobs, a query past the
+    horizon extends every job from where it stopped, and entries in the past are
+    dropped as queries go by. APScheduler's own triggers produce the times, so
+    the preview can't drift from what actually fires.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, _TimelineJob] = {}
+        self._entries: List[Tuple[datetime, str]] = []  # (fire_time, job_id), sorted
+        self._horizon: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def add(self, jobs: Iterable[Any]):
+        jobs = [_TimelineJob(job) for job in jobs]
+        with self._lock:
+            now = self._now()
+            # Replaced jobs leave the index in one pass, not one rebuild per job
+            self._drop({job.job_id for job in jobs})
+            horizon = self._ensure_horizon(now)
+            new_entries = []
+            for job in jobs:
+                self._jobs[job.job_id] = job
+                new_entries += self._extend(job, now, horizon)
+            self._merge(new_entries)
+
+    def remove(self, schedule_id: int):
+        self.remove_many([schedule_id])
+
+    def remove_many(self, schedule_ids: Iterable[int]):
+        """remove() for a batch of schedules, rebuilding the index once."""
+        schedule_ids = set(schedule_ids)
+        with self._lock:
+            self._drop({j.job_id for j in self._jobs.values() if j.schedule_id in schedule_ids})
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+            self._entries.clear()
+
+    def upcoming(self, start: Optional[datetime], end: Optional[datetime], limit: int) -> Dict[str, Any]:
+        """
+        Fire times in [start, end] (defaults: now and now + SCHEDULE_PREVIEW_DEFAULT_HOURS), plus conflicts.
+        Schedules whose fire times were capped at SCHEDULE_PREVIEW_MAX_FIRES before `end` are listed in
+        truncated_schedule_ids: their runs (and conflicts) past the cap are missing.
+        """
+        with self._lock:
+            now = self._now()
+            start = max(self._localize(start) if start else now, now)
+            end = self._localize(end) if end else start + timedelta(hours=settings.SCHEDULE_PREVIEW_DEFAULT_HOURS)
+            if end - start > timedelta(days=settings.SCHEDULE_PREVIEW_MAX_DAYS):
+                raise ValueError(f"Preview window is limited to {settings.SCHEDULE_PREVIEW_MAX_DAYS} days")
+
+            # Past entries can't fire any more
+            del self._entries[:bisect_left(self._entries, (now, ""))]
+            if end > self._ensure_horizon(now):
+                self._extend_all(now, end)
+
+            lo = bisect_left(self._entries, (start, ""))
+            hi = bisect_right(self._entries, (end, "\uffff"))
+            window = self._entries[lo:hi]
+            runs = [self._run(fire_time, self._jobs[job_id]) for fire_time, job_id in window]
+            # A job stops short of the horizon only when it hit SCHEDULE_PREVIEW_MAX_FIRES
+            capped = sorted({job.schedule_id for job in self._jobs.values() if job.computed_until and job.computed_until < end})
+
+        return {
+            "start": start,
+            "end": end,
+            "total": len(runs),
+            "truncated": len(runs) > limit or bool(capped),
+            "truncated_schedule_ids": capped,
+            "runs": runs[:limit],
+            "conflicts": find_conflicts(runs),
+        }
+
+    # --- internals (call with the lock held) ---
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(get_localzone())
+
+    @staticmethod
+    def _localize(value: datetime) -> datetime:
+        # Naive datetimes are in the scheduler's (server-local) timezone
+        return value.replace(tzinfo=get_localzone()) if value.tzinfo is None else value
+
+    def _ensure_horizon(self, now: datetime) -> datetime:
+        minimum = now + timedelta(hours=settings.SCHEDULE_PREVIEW_DEFAULT_HOURS)
+        if self._horizon is None or self._horizon < minimum:
+            self._extend_all(now, minimum + HORIZON_SLACK)
+        return self._horizon
+
+    def _extend_all(self, now: datetime, until: datetime):
+        self._horizon = until
+        new_entries = []
+        for job in self._jobs.values():
+            new_entries += self._extend(job, now, until)
+        self._merge(new_entries)
+
+    def _extend(self, job: _TimelineJob, now: datetime, until: datetime) -> List[Tuple[datetime, str]]:
+        """Compute `job`'s fire times from where it stopped up to `until`."""
+        start = now if job.computed_until is None else max(job.computed_until + timedelta(microseconds=1), now)
+        if start > until:
+            return []
+        fire_times = _next_fire_times(job.trigger, start, until, settings.SCHEDULE_PREVIEW_MAX_FIRES)
+        if len(fire_times) >= settings.SCHEDULE_PREVIEW_MAX_FIRES:
+            # Continue from the last computed fire time on the next extension
+            logger.warning(f"Schedule job {job.job_id} fires over {len(fire_times)} times before {until}; preview truncated")
+            job.computed_until = fire_times[-1]
+        else:
+            job.computed_until = until
+        return [(fire_time, job.job_id) for fire_time in fire_times]
+
+    def _merge(self, new_entries: List[Tuple[datetime, str]]):
+        if new_entries:
+            # Timsort merges the already-sorted runs in roughly linear time
+            self._entries = sorted(self._entries + sorted(new_entries))
+
+    def _drop(self, job_ids: Set[str]):
+        dropped = {job_id for job_id in job_ids if self._jobs.pop(job_id, None) is not None}
+        if dropped:
+            self._entries = [entry for entry in self._entries if entry[1] not in dropped]
+
+    @staticmethod
+    def _run(fire_time: datetime, job: _TimelineJob) -> Dict[str, Any]:
+        return {
+            "fire_time": fire_time,
+            "schedule_id": job.schedule_id,
+            "schedule_name": job.schedule_name,
+            "job_id": job.job_id,
+            "action": job.action,
+            "container_ids": job.container_ids,
+            "spread_seconds": job.spread_seconds,
+        }
+
+
+def find_conflicts(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Pairs of runs from different jobs that hit the same container within
+    CONFLICT_WINDOW (plus the earlier run's jitter/stagger spread): opposing
+    actions (start vs stop) are conflicts, the same action from two schedules is
+    a duplicate. `runs` must be sorted by fire time.
+    """
+    by_container: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for run in runs:
+        for container_id in run["container_ids"]:
+            by_container[container_id].append(run)
+    max_window = CONFLICT_WINDOW + timedelta(seconds=max((run["spread_seconds"] for run in runs), default=0))
+
+    conflicts = []
+    for container_id, container_runs in by_container.items():
+        window_start = 0
+        for i, run in enumerate(container_runs):
+            while run["fire_time"] - container_runs[window_start]["fire_time"] > max_window:
+                window_start += 1
+            for other in container_runs[window_start:i]:
+                if other["job_id"] == run["job_id"]:
+                    continue
+                if run["fire_time"] - other["fire_time"] > CONFLICT_WINDOW + timedelta(seconds=other["spread_seconds"]):
+                    continue
+                if other["action"] == run["action"]:
+                    if other["schedule_id"] == run["schedule_id"]:
+                        continue
+                    kind = "duplicate"
+                elif frozenset({other["action"], run["action"]}) in OPPOSING:
+                    kind = "conflict"
+                else:
+                    continue
+                conflicts.append({
+                    "container_id": container_id,
+                    "kind": kind,
+                    "first": other,
+                    "second": run,
+                })
+    conflicts.sort(key=lambda c: c["second"]["fire_time"])
+    return conflicts
+
+
+schedule_timeline = ScheduleTimeline()
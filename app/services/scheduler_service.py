@@ -1,173 +1,396 @@
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.base import BaseTrigger
 from sqlalchemy.orm import Session
-from datetime import datetime
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
 import json
 import logging
+import random
+import time
 
+from app.core.schedule_triggers import build_trigger
+from app.core.tracing import traced
 from app.db.session import SessionLocal
-from app.models.schedule import ContainerSchedule, ScheduleType, ActionType
+from app.models.schedule import ContainerSchedule, ActionType
+from app.models.schedule_run import ScheduleRunStatus
 from app.services.docker_service import docker_service
+from app.services.job_service import job_service
+from app.schemas.docker import RollingRestartPolicy, StartupPolicy
+from app.services.rollout_service import rollout_service
+from app.services.startup_service import startup_service, DependencyCycleError
+from app.services.schedule_run_service import schedule_run_service
+from app.services.schedule_timeline import schedule_timeline
+from app.services import docker_jobs
 
 logger = logging.getLogger(__name__)
 
+# APScheduler's default: a run starting more than this late is skipped and reported as missed
+MISFIRE_GRACE_TIME = 1
+
+
+@dataclass
+class ScheduledJob:
+    """One APScheduler job derived from a schedule (SLEEP schedules produce a sleep and a wake job)."""
+    job_id: str
+    schedule_id: int
+    schedule_name: str
+    action: ActionType
+    container_ids: List[str]
+    trigger: BaseTrigger
+    args: list
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    spread_seconds: int = 0  # Containers run up to this long after the fire time (jitter + stagger)
+
+
+def build_jobs(schedule: ContainerSchedule) -> List[ScheduledJob]:
+    """The scheduler jobs for a schedule, without adding them anywhere."""
+    job_id = str(schedule.id)
+
+    # Parse container IDs
+    try:
+        container_ids = json.loads(schedule.container_ids)
+    except (ValueError, TypeError):
+        # Fallback for old data or simple string
+        container_ids = [schedule.container_ids] if schedule.container_ids else []
+    if isinstance(container_ids, str):
+        container_ids = [container_ids]
+    options = json.loads(schedule.options) if schedule.options else None
+    spread = {
+        key: value
+        for key, value in (("jitter_seconds", schedule.jitter_seconds), ("stagger_seconds", schedule.stagger_seconds))
+        if value
+    }
+
+    def job(suffix: str, expression: str, action: ActionType, args: list, dependency_order: bool = False) -> ScheduledJob:
+        # Dependency-ordered starts are paced by their levels, so jitter/stagger don't apply
+        job_spread = {} if dependency_order else spread
+        extra = {"dependency_order": True} if dependency_order else {}
+        return ScheduledJob(
+            job_id=job_id + suffix,
+            schedule_id=schedule.id,
+            schedule_name=schedule.schedule_name,
+            action=action,
+            container_ids=container_ids,
+            trigger=build_trigger(schedule.schedule_type, expression, schedule.timezone),
+            args=args,
+            kwargs={**job_spread, **extra, "schedule_id": schedule.id, "job_id": job_id + suffix},
+            spread_seconds=sum(job_spread.values()),
+        )
+
+    # For SLEEP action, we need to create two jobs: stop at time_expression, start at wake_time_expression
+    if schedule.action == ActionType.SLEEP:
+        if not schedule.wake_time_expression:
+            raise ValueError("SLEEP action requires wake_time_expression")
+        return [
+            job("_sleep", schedule.time_expression, ActionType.STOP, [container_ids, ActionType.STOP]),
+            # Wake brings the stack back up in dependency order; options hold its StartupPolicy
+            job("_wake", schedule.wake_time_expression, ActionType.START, [container_ids, ActionType.START, options],
+                dependency_order=True),
+        ]
+
+    # Regular actions (START, STOP, RESTART, PRUNE_IMAGES)
+    return [job("", schedule.time_expression, schedule.action, [container_ids, schedule.action, options])]
+
+
+def container_delays(container_ids: List[str], jitter_seconds: int = 0, stagger_seconds: int = 0) -> List[tuple]:
+    """
+    (delay, container_id) pairs in execution order: containers are spaced evenly
+    across stagger_seconds in list order, and each gets a random extra delay of up
+    to jitter_seconds.
+    """
+    count = len(container_ids)
+    step = stagger_seconds / count if stagger_seconds and count > 1 else 0.0
+    delays = [
+        (i * step + (random.uniform(0, jitter_seconds) if jitter_seconds else 0.0), container_id)
+        for i, container_id in enumerate(container_ids)
+    ]
+    return sorted(delays, key=lambda pair: pair[0])
+
+
 class SchedulerService:
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
+        self.scheduler = AsyncIOScheduler(job_defaults={"misfire_grace_time": MISFIRE_GRACE_TIME})
         # We don't start it immediately in __init__ because it might need a running loop
         # It will be started when added to the app lifespan or manually
+        # Fire times handed over by the submission event, consumed by execute_action
+        self._fire_times: Dict[str, Deque[datetime]] = defaultdict(deque)
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
 
     def start(self):
+        # Started paused: jobs only fire in the worker holding the scheduler lease (see cluster_service)
         if not self.scheduler.running:
-            self.scheduler.start()
+            self.scheduler.start(paused=True)
+
+    def pause(self):
+        if self.scheduler.running:
+            self.scheduler.pause()
+
+    def resume(self, since: Optional[datetime] = None):
+        """
+        Start firing jobs (this worker took the scheduler lease). A paused
+        scheduler keeps the run times its jobs had when they were loaded, and
+        the previous leader has executed those runs since; resuming as is would
+        report each one as missed. So every job's next run is first recomputed
+        from `since`, when the previous leader's lease expired (now if it was
+        released or there was none): only runs in that leaderless gap are missed.
+        """
+        if self.scheduler.running:
+            self._reschedule_from(since or datetime.now(timezone.utc))
+            self.scheduler.resume()
+
+    def _reschedule_from(self, since: datetime):
+        for job in self.scheduler.get_jobs():
+            next_run_time = job.trigger.get_next_fire_time(None, since)
+            if next_run_time is None or next_run_time < since:
+                # One-time job the previous leader already ran
+                job.remove()
+            else:
+                job.modify(next_run_time=next_run_time)
+
+    def _on_job_event(self, event):
+        if event.code == EVENT_JOB_SUBMITTED:
+            # Dispatched before the coroutine gets to run, so execute_action can pick it up
+            self._fire_times[event.job_id].extend(event.scheduled_run_times)
+            return
+
+        # Missed: the scheduler was paused or busy past the misfire grace time (e.g. no leader)
+        logger.warning(f"Scheduled job {event.job_id} missed its run at {event.scheduled_run_time}")
+        try:
+            schedule_id = int(event.job_id.split("_")[0])
+        except ValueError:
+            return
+        # One-time jobs are already gone from the job store by now
+        job = self.scheduler.get_job(event.job_id)
+        schedule_run_service.record(
+            schedule_id=schedule_id,
+            job_id=event.job_id,
+            action=job.args[1] if job else None,
+            status=ScheduleRunStatus.MISSED,
+            scheduled_at=event.scheduled_run_time,
+        )
+
+    def _take_fire_time(self, job_id: Optional[str]) -> datetime:
+        now = datetime.now(timezone.utc)
+        fire_times = self._fire_times.get(job_id)
+        fire_time = None
+        while fire_times:
+            candidate = fire_times.popleft()
+            # Runs past the grace time were skipped by APScheduler (and recorded as missed)
+            if (now - candidate).total_seconds() <= MISFIRE_GRACE_TIME:
+                fire_time = candidate
+                break
+        if fire_times is not None and not fire_times:
+            del self._fire_times[job_id]
+        return fire_time or now  # Called directly rather than fired by the scheduler
+
+    @traced("scheduler.execute_action")
+    async def execute_action(
+        self,
+        container_ids: list,
+        action: ActionType,
+        options: Optional[dict] = None,
+        jitter_seconds: int = 0,
+        stagger_seconds: int = 0,
+        schedule_id: Optional[int] = None,
+        job_id: Optional[str] = None,
+        dependency_order: bool = False,
+    ):
+        scheduled_at = self._take_fire_time(job_id)
+        started_at = datetime.now(timezone.utc)
+
+        def record(status: ScheduleRunStatus, results=None, detail=None):
+            if schedule_id is not None:
+                schedule_run_service.record(
+                    schedule_id=schedule_id,
+                    job_id=job_id,
+                    action=action,
+                    status=status,
+                    scheduled_at=scheduled_at,
+                    started_at=started_at,
+                    finished_at=datetime.now(timezone.utc),
+                    results=results,
+                    detail=detail,
+                )
+
+        if action == ActionType.PRUNE_IMAGES:
+            # Runs on the job queue so it shows up in /jobs and respects the one-at-a-time limit.
+            # Submitting writes the job row, so it happens off the event loop
+            try:
+                job = await asyncio.to_thread(job_service.submit, docker_jobs.COLLECT_IMAGES, **(options or {}))
+            except Exception as e:
+                logger.error(f"Failed to submit scheduled image prune: {e}")
+                record(ScheduleRunStatus.FAILED, detail=str(e))
+                return
+            logger.info(f"Scheduled image prune submitted as job {job['id']}")
+            record(ScheduleRunStatus.SUBMITTED, detail=f"job {job['id']}")
+            return
 
-    async def execute_action(self, container_ids: list, action: ActionType):
         if isinstance(container_ids, str):
             container_ids = [container_ids]
             
         logger.info(f"Executing scheduled action {action} on containers {container_ids}")
-        
-        for container_id in container_ids:
+
+        if action == ActionType.ROLLING_RESTART:
+            # Paced by its batches and health checks, so jitter/stagger don't apply
+            try:
+                rollout = await asyncio.to_thread(
+                    rollout_service.rolling_restart, container_ids, RollingRestartPolicy(**(options or {}))
+                )
+            except Exception as e:
+                # e.g. an invalid stored policy; the run still gets a record
+                logger.error(f"Scheduled rolling restart of {container_ids} failed: {e}")
+                record(ScheduleRunStatus.FAILED, detail=f"{type(e).__name__}: {e}")
+                return
+            results = [
+                {
+                    "container_id": step["container_id"],
+                    "ok": step["status"] == "healthy",
+                    "delay_ms": 0.0,
+                    "latency_ms": round((step.get("restart_ms") or 0.0) + (step.get("ready_ms") or 0.0), 1),
+                    "error": step.get("error") or ("Skipped: rollout aborted" if step["status"] == "skipped" else None),
+                }
+                for step in rollout["containers"]
+            ]
+            record(self._status(results), results=results, detail="Rollout aborted after a failed batch" if rollout["aborted"] else None)
+            return
+
+        if action == ActionType.START and dependency_order:
+            try:
+                startup = await asyncio.to_thread(startup_service.start, container_ids, StartupPolicy(**(options or {})))
+            except DependencyCycleError as e:
+                logger.error(f"Scheduled start of {container_ids} failed: {e}")
+                record(ScheduleRunStatus.FAILED, detail=str(e))
+                return
+            except Exception as e:
+                # e.g. DockerUnavailableError while resolving dependencies; the run still gets a record
+                logger.error(f"Scheduled start of {container_ids} failed: {e}")
+                record(ScheduleRunStatus.FAILED, detail=f"{type(e).__name__}: {e}")
+                return
+            results = [
+                {
+                    "container_id": step["container_id"],
+                    "ok": step["status"] not in ("failed", "skipped"),
+                    "delay_ms": 0.0,
+                    "latency_ms": round((step.get("start_ms") or 0.0) + (step.get("ready_ms") or 0.0), 1),
+                    "error": step.get("error"),
+                }
+                for step in startup["containers"]
+            ]
+            record(self._status(results), results=results, detail=f"{len(startup['levels'])} dependency level(s)")
+            return
+
+        started = time.monotonic()
+        results = []
+        for delay, container_id in container_delays(container_ids, jitter_seconds, stagger_seconds):
+            wait = started + delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            call_started = time.monotonic()
+            error = None
             try:
-                if action == ActionType.STOP:
-                    docker_service.stop_container(container_id)
-                elif action == ActionType.START:
-                    docker_service.start_container(container_id)
-                elif action == ActionType.RESTART:
-                    docker_service.restart_container(container_id)
+                # Off the event loop: a slow daemon call mustn't stall other jobs and requests
+                ok = await asyncio.to_thread(self._perform, container_id, action)
+                if not ok:
+                    error = "Container not found or the daemon refused the action"
             except Exception as e:
+                ok = False
+                error = f"{type(e).__name__}: {e}"
                 logger.error(f"Failed to execute {action} on container {container_id}: {e}")
+            results.append({
+                "container_id": container_id,
+                "ok": ok,
+                "delay_ms": round(delay * 1000, 1),
+                "latency_ms": round((time.monotonic() - call_started) * 1000, 1),
+                "error": error,
+            })
+
+        record(self._status(results), results=results)
+
+    @staticmethod
+    def _status(results: List[Dict[str, Any]]) -> ScheduleRunStatus:
+        failed = sum(1 for r in results if not r["ok"])
+        if failed == 0:
+            return ScheduleRunStatus.SUCCEEDED
+        if failed == len(results):
+            return ScheduleRunStatus.FAILED
+        return ScheduleRunStatus.PARTIAL
+
+    @staticmethod
+    def _perform(container_id: str, action: ActionType) -> bool:
+        if action == ActionType.STOP:
+            return docker_service.stop_container(container_id)
+        if action == ActionType.START:
+            return docker_service.start_container(container_id)
+        if action == ActionType.RESTART:
+            return docker_service.restart_container(container_id)
+        return False
 
     def add_job_from_model(self, schedule: ContainerSchedule):
-        job_id = str(schedule.id)
-        
         # Remove existing jobs if present to avoid duplicates on update
         self.remove_job(schedule.id)
+        schedule_timeline.add(self._add_jobs(schedule))
+
+    def apply_changes(self, upserted: List[ContainerSchedule], removed_ids: List[int]):
+        """
+        Bring the jobs in line with a committed batch of schedule changes; the
+        timeline is updated once for the whole batch rather than per schedule.
+        """
+        changed_ids = list(removed_ids) + [schedule.id for schedule in upserted]
+        schedule_timeline.remove_many(changed_ids)
+        for schedule_id in changed_ids:
+            self._remove_jobs(schedule_id)
+        jobs: List[ScheduledJob] = []
+        for schedule in upserted:
+            jobs += self._add_jobs(schedule)
+        schedule_timeline.add(jobs)
 
+    def _add_jobs(self, schedule: ContainerSchedule) -> List[ScheduledJob]:
         if not schedule.is_active:
-            return
+            return []
 
-        # Parse container IDs
         try:
-            container_ids = json.loads(schedule.container_ids)
-        except (ValueError, TypeError):
-            # Fallback for old data or simple string
-            container_ids = [schedule.container_ids] if schedule.container_ids else []
-
-        trigger = None
-        wake_trigger = None
-        
-        # Parse time expression
-        # time_expression format example validation should happen in service/schema layer
-        try:
-            # For SLEEP action, we need to create two jobs
-            if schedule.action == ActionType.SLEEP:
-                if not schedule.wake_time_expression:
-                    logger.error(f"SLEEP action requires wake_time_expression for schedule {schedule.id}")
-                    return
-                
-                # Create sleep trigger (stop container)
-                if schedule.schedule_type == ScheduleType.DAILY:
-                    hour, minute = schedule.time_expression.split(':')
-                    trigger = CronTrigger(hour=hour, minute=minute)
-                    
-                    wake_hour, wake_minute = schedule.wake_time_expression.split(':')
-                    wake_trigger = CronTrigger(hour=wake_hour, minute=wake_minute)
-                
-                elif schedule.schedule_type == ScheduleType.WEEKLY:
-                    day, time_str = schedule.time_expression.split(' ')
-                    hour, minute = time_str.split(':')
-                    trigger = CronTrigger(day_of_week=day, hour=hour, minute=minute)
-                    
-                    wake_day, wake_time_str = schedule.wake_time_expression.split(' ')
-                    wake_hour, wake_minute = wake_time_str.split(':')
-                    wake_trigger = CronTrigger(day_of_week=wake_day, hour=wake_hour, minute=wake_minute)
-
-                elif schedule.schedule_type == ScheduleType.MONTHLY:
-                    day, time_str = schedule.time_expression.split(' ')
-                    hour, minute = time_str.split(':')
-                    trigger = CronTrigger(day=day, hour=hour, minute=minute)
-                    
-                    wake_day, wake_time_str = schedule.wake_time_expression.split(' ')
-                    wake_hour, wake_minute = wake_time_str.split(':')
-                    wake_trigger = CronTrigger(day=wake_day, hour=wake_hour, minute=wake_minute)
-
-                elif schedule.schedule_type == ScheduleType.CUSTOM:
-                    run_date = datetime.strptime(schedule.time_expression, "%Y-%m-%d %H:%M:%S")
-                    trigger = DateTrigger(run_date=run_date)
-                    
-                    wake_date = datetime.strptime(schedule.wake_time_expression, "%Y-%m-%d %H:%M:%S")
-                    wake_trigger = DateTrigger(run_date=wake_date)
-                
-                # Add both jobs for SLEEP action
-                if trigger and wake_trigger:
-                    # Job to stop container
-                    self.scheduler.add_job(
-                        self.execute_action,
-                        trigger,
-                        id=f"{job_id}_sleep",
-                        args=[container_ids, ActionType.STOP],
-                        replace_existing=True
-                    )
-                    # Job to start container
-                    self.scheduler.add_job(
-                        self.execute_action,
-                        wake_trigger,
-                        id=f"{job_id}_wake",
-                        args=[container_ids, ActionType.START],
-                        replace_existing=True
-                    )
-                    logger.info(f"Added SLEEP jobs for schedule {job_id}: stop and wake for {schedule.schedule_name}")
-            
-            else:
-                # Handle regular actions (START, STOP, RESTART)
-                if schedule.schedule_type == ScheduleType.DAILY:
-                    # Exp: "14:30"
-                    hour, minute = schedule.time_expression.split(':')
-                    trigger = CronTrigger(hour=hour, minute=minute)
-                
-                elif schedule.schedule_type == ScheduleType.WEEKLY:
-                    # Exp: "mon 14:30"
-                    day, time_str = schedule.time_expression.split(' ')
-                    hour, minute = time_str.split(':')
-                    trigger = CronTrigger(day_of_week=day, hour=hour, minute=minute)
-
-                elif schedule.schedule_type == ScheduleType.MONTHLY:
-                    # Exp: "1 14:30" (1st day of month)
-                    day, time_str = schedule.time_expression.split(' ')
-                    hour, minute = time_str.split(':')
-                    trigger = CronTrigger(day=day, hour=hour, minute=minute)
-
-                elif schedule.schedule_type == ScheduleType.CUSTOM:
-                    # Exp: "2023-10-27 14:30:00"
-                    run_date = datetime.strptime(schedule.time_expression, "%Y-%m-%d %H:%M:%S")
-                    trigger = DateTrigger(run_date=run_date)
-
-                if trigger:
-                    self.scheduler.add_job(
-                        self.execute_action,
-                        trigger,
-                        id=job_id,
-                        args=[container_ids, schedule.action],
-                        replace_existing=True
-                    )
-                    logger.info(f"Added job {job_id} for {schedule.schedule_name}")
-                
+            jobs = build_jobs(schedule)
         except Exception as e:
             logger.error(f"Failed to schedule job {schedule.id}: {e}")
+            return []
+
+        for job in jobs:
+            self.scheduler.add_job(
+                self.execute_action,
+                job.trigger,
+                id=job.job_id,
+                args=job.args,
+                kwargs=job.kwargs,
+                replace_existing=True
+            )
+        if jobs:
+            logger.info(f"Added {len(jobs)} job(s) for schedule {schedule.id} ({schedule.schedule_name})")
+        return jobs
 
     def load_jobs_from_db(self):
         """Reloads all active schedules from the database."""
         db: Session = SessionLocal()
         try:
             schedules = db.query(ContainerSchedule).filter(ContainerSchedule.is_active == True).all()
-            for schedule in schedules:
-                self.add_job_from_model(schedule)
+            self.apply_changes(schedules, [])
         finally:
             db.close()
 
+    def reload_jobs(self):
+        """Replace all jobs with the active schedules in the database (after another worker changed them)."""
+        self.scheduler.remove_all_jobs()
+        schedule_timeline.clear()
+        self.load_jobs_from_db()
+
     def remove_job(self, schedule_id: int):
+        schedule_timeline.remove(schedule_id)
+        self._remove_jobs(schedule_id)
+
+    def _remove_jobs(self, schedule_id: int):
         job_id = str(schedule_id)
         # Remove regular job
         if self.scheduler.get_job(job_id):
@@ -0,0 +1,254 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+import logging
+import time
+
+from app.schemas.docker import StartupPolicy
+from app.services.container_group_service import COMPOSE_PROJECT_LABEL
+from app.services.docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+COMPOSE_DEPENDS_ON_LABEL = "com.docker.compose.depends_on"  # "db:service_healthy:false,cache:service_started:false"
+# Containers in a level started in parallel, at most
+MAX_PARALLEL_STARTS = 8
+
+STARTED = "started"
+HEALTHY = "healthy"
+COMPLETED = "completed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# What a dependency must reach before its dependents start, weakest first
+CONDITIONS = (STARTED, HEALTHY, COMPLETED)
+COMPOSE_CONDITIONS = {
+    "service_started": STARTED,
+    "service_healthy": HEALTHY,
+    "service_completed_successfully": COMPLETED,
+}
+
+
+class DependencyCycleError(ValueError):
+    pass
+
+
+class DependencyNotReady(Exception):
+    """The dependency can't reach its condition any more (exited, unhealthy, gone)."""
+
+
+def parse_depends_on(value: str) -> Dict[str, str]:
+    """Compose's depends_on label -> {service: condition}."""
+    result = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        service, _, rest = entry.partition(":")
+        condition = rest.split(":", 1)[0]
+        result[service] = COMPOSE_CONDITIONS.get(condition, STARTED)
+    return result
+
+
+class StartupService:
+    """
+    Dependency-aware startup. Builds a graph over the containers being started
+    from compose depends_on labels and user-declared edges (dependencies outside
+    the set are assumed to be up already), splits it into topological levels,
+    and starts each level in parallel. Before the next level starts, every
+    container something still depends on must reach the strongest condition
+    asked of it: running, healthy, or exited with code 0. A container whose
+    dependency fails is skipped; unrelated containers carry on.
+    """
+
+    def start(
+        self,
+        container_ids: List[str],
+        policy: Optional[StartupPolicy] = None,
+        report: Optional[Callable[..., None]] = None,
+    ) -> Dict[str, Any]:
+        policy = policy or StartupPolicy()
+        started = time.monotonic()
+        nodes, missing = self._resolve(container_ids)
+        deps = self._dependencies(nodes, policy)
+        levels = self._levels(nodes, deps)
+
+        steps: Dict[str, Dict[str, Any]] = {}
+        for number, level in enumerate(levels):
+            for node in level:
+                steps[node] = {"container_id": node[:12], "name": nodes[node]["name"], "level": number}
+        results = [
+            {"container_id": cid, "name": None, "level": None, "status": FAILED, "error": "Container not found"}
+            for cid in missing
+        ]
+
+        # Strongest condition each container must reach for its dependents
+        required: Dict[str, str] = {}
+        for node, node_deps in deps.items():
+            for dep, condition in node_deps.items():
+                if dep not in required or CONDITIONS.index(condition) > CONDITIONS.index(required[dep]):
+                    required[dep] = condition
+
+        for number, level in enumerate(levels):
+            runnable = []
+            for node in level:
+                blocked = [d for d in deps[node] if steps[d]["status"] in (FAILED, SKIPPED)]
+                if blocked:
+                    steps[node].update(status=SKIPPED, error=f"Dependency {nodes[blocked[0]]['name']} is not ready")
+                else:
+                    runnable.append(node)
+            if report:
+                report(f"Level {number + 1}/{len(levels)}: starting {', '.join(nodes[n]['name'] for n in runnable) or 'nothing'}",
+                       progress=number / len(levels))
+            if not runnable:
+                continue
+            self._start_level(runnable, steps)
+            # Only gate on containers that later levels wait for
+            gated = [n for n in runnable if n in required and steps[n]["status"] == STARTED]
+            if gated:
+                self._wait_ready(gated, required, steps, policy)
+            for node in runnable:
+                if steps[node]["status"] == FAILED:
+                    logger.warning(f"Startup: {nodes[node]['name']} failed: {steps[node]['error']}")
+                    if report:
+                        report(f"{nodes[node]['name']} failed: {steps[node]['error']}")
+
+        results += [steps[node] for level in levels for node in level]
+        return {
+            "success": all(step["status"] not in (FAILED, SKIPPED) for step in results),
+            "levels": [[node[:12] for node in level] for level in levels],
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "containers": results,
+        }
+
+    # --- graph ---
+
+    @staticmethod
+    def _resolve(container_ids: List[str]):
+        """Match IDs (full or prefix) and names against one container list call."""
+        containers = docker_service.container_labels()
+        nodes: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for wanted in container_ids:
+            match = next(
+                (c for c in containers if c["id"].startswith(wanted) or c["name"] == wanted.lstrip("/")),
+                None,
+            )
+            if match is None:
+                missing.append(wanted)
+            else:
+                nodes[match["id"]] = match
+        return nodes, missing
+
+    @staticmethod
+    def _dependencies(nodes: Dict[str, Dict[str, Any]], policy: StartupPolicy) -> Dict[str, Dict[str, str]]:
+        """container -> {dependency: condition}, restricted to the containers being started."""
+        deps: Dict[str, Dict[str, str]] = {node: {} for node in nodes}
+
+        def find(reference: str) -> Optional[str]:
+            return next((n for n, c in nodes.items() if n.startswith(reference) or c["name"] == reference.lstrip("/")), None)
+
+        if policy.use_compose:
+            by_service = {
+                (c["labels"].get(COMPOSE_PROJECT_LABEL), c["labels"].get(COMPOSE_SERVICE_LABEL)): n
+                for n, c in nodes.items()
+                if c["labels"].get(COMPOSE_SERVICE_LABEL)
+            }
+            for node, container in nodes.items():
+                project = container["labels"].get(COMPOSE_PROJECT_LABEL)
+                for service, condition in parse_depends_on(container["labels"].get(COMPOSE_DEPENDS_ON_LABEL, "")).items():
+                    # A scaled service has several containers; only one is indexed, which is enough to order by
+                    dep = by_service.get((project, service))
+                    if dep is not None and dep != node:
+                        deps[node][dep] = condition
+
+        for reference, dependencies in (policy.edges or {}).items():
+            node = find(reference)
+            if node is None:
+                continue
+            for dependency in dependencies:
+                dep = find(dependency)
+                if dep is not None and dep != node:
+                    deps[node].setdefault(dep, HEALTHY if policy.wait_healthy else STARTED)
+        return deps
+
+    @staticmethod
+    def _levels(nodes: Dict[str, Dict[str, Any]], deps: Dict[str, Dict[str, str]]) -> List[List[str]]:
+        """Kahn's algorithm, one list per level (sorted by name for stable output)."""
+        remaining = {node: set(node_deps) for node, node_deps in deps.items()}
+        levels = []
+        while remaining:
+            level = sorted((n for n, d in remaining.items() if not d), key=lambda n: nodes[n]["name"])
+            if not level:
+                names = ", ".join(sorted(nodes[n]["name"] for n in remaining))
+                raise DependencyCycleError(f"Dependency cycle between: {names}")
+            levels.append(level)
+            done: Set[str] = set(level)
+            remaining = {n: d - done for n, d in remaining.items() if n not in done}
+        return levels
+
+    # --- execution ---
+
+    @staticmethod
+    def _start_level(level: List[str], steps: Dict[str, Dict[str, Any]]):
+        def start(node: str):
+            step = steps[node]
+            call_started = time.monotonic()
+            try:
+                ok = docker_service.start_container(node)
+                error = None if ok else "Failed to start container"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            step["start_ms"] = round((time.monotonic() - call_started) * 1000, 1)
+            if error:
+                step.update(status=FAILED, error=error)
+            else:
+                step["status"] = STARTED
+
+        with ThreadPoolExecutor(max_workers=min(len(level), MAX_PARALLEL_STARTS), thread_name_prefix="startup") as pool:
+            list(pool.map(start, level))
+
+    def _wait_ready(self, gated: List[str], required: Dict[str, str], steps: Dict[str, Dict[str, Any]], policy: StartupPolicy):
+        wait_started = time.monotonic()
+        deadline = wait_started + policy.health_timeout
+        pending = list(gated)
+        while pending:
+            for node in list(pending):
+                condition = required[node]
+                try:
+                    ready = self._ready(node, condition)
+                except DependencyNotReady as e:
+                    steps[node].update(status=FAILED, error=str(e))
+                else:
+                    if not ready:
+                        continue
+                    if condition != STARTED:
+                        steps[node]["status"] = condition
+                steps[node]["ready_ms"] = round((time.monotonic() - wait_started) * 1000, 1)
+                pending.remove(node)
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                for node in pending:
+                    steps[node].update(status=FAILED, error=f"Not {required[node]} within {policy.health_timeout}s")
+                break
+            time.sleep(policy.probe_interval)
+
+    @staticmethod
+    def _ready(container_id: str, condition: str) -> bool:
+        state = docker_service.container_state(container_id)
+        if state is None:
+            raise DependencyNotReady("Container disappeared")
+        exited = not state["running"] and state["status"] in ("exited", "dead")
+        if condition == COMPLETED:
+            if exited and state["exit_code"] != 0:
+                raise DependencyNotReady(f"Container exited with code {state['exit_code']}")
+            return exited
+        if exited:
+            raise DependencyNotReady(f"Container {state['status']} with code {state['exit_code']}")
+        if condition == HEALTHY and state["health"] is not None:
+            if state["health"] == "unhealthy":
+                raise DependencyNotReady("HEALTHCHECK reports unhealthy")
+            return state["health"] == "healthy"
+        # No HEALTHCHECK: running is as ready as it can tell
+        return state["running"]
+
+
+startup_service = StartupService()
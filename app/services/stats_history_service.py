@@ -0,0 +1,340 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import func, insert
+
+from app.core.config import settings
+from app.core.percentiles import percentiles
+from app.db.session import SessionLocal
+from app.models.stats import ContainerStatsSample
+from app.services.cluster_service import cluster_service
+from app.services.docker_service import docker_service, DockerUnavailableError, resource_limits
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+MIN_CPU_QUOTA = 10000  # 10% of a core
+MIN_MEMORY_LIMIT = 64 * MIB
+# How often old samples are pruned, at most
+PRUNE_INTERVAL = 3600
+# The leader's latest per-container stats, for readers on every worker
+LAST_SAMPLE_KEY = "stats:last-sample"
+# A last sample older than this many sample intervals is treated as missing (sampler stopped or failed over)
+LAST_SAMPLE_MAX_AGE_INTERVALS = 3
+
+# A limit this many times the recommendation is flagged as over-provisioned
+OVER_PROVISIONED_FACTOR = 2.0
+# Usage this close to the limit is flagged as at risk
+RISK_RATIO = 0.9
+
+
+def _round_up(value: float, step: int) -> int:
+    return int(math.ceil(value / step) * step)
+
+
+class StatsHistoryService:
+    """
+    Samples CPU and memory of every running container every STATS_SAMPLE_INTERVAL
+    seconds into the `containerstatssample` table, and derives right-sized
+    resource limits from that history.
+
+    Only the scheduler leader samples (with several workers the others would
+    just write duplicates). Recommendations use the p99 of CPU and the peak of
+    the memory working set (usage without reclaimable page cache) over the
+    window plus headroom; they are only made once a container has
+    RECOMMENDATION_MIN_SAMPLES samples.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._last_prune = 0.0
+        self._listeners: List[Callable[[datetime, List[Dict[str, Any]]], None]] = []
+        self._last_sample: Optional[Tuple[datetime, List[Dict[str, Any]]]] = None
+
+    # --- sampling ---
+
+    def add_listener(self, listener: Callable[[datetime, List[Dict[str, Any]]], None]):
+        """Called on the sampler thread with (sampled_at, container stats) after every sample."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def start(self):
+        if self._thread is None and settings.STATS_SAMPLE_INTERVAL > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="stats-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _loop(self):
+        while not self._stop.wait(settings.STATS_SAMPLE_INTERVAL):
+            if not cluster_service.is_leader:
+                continue
+            try:
+                self.sample_once()
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    self.prune()
+            except DockerUnavailableError as e:
+                logger.debug(f"Skipping stats sample: {e}")
+            except Exception as e:
+                logger.error(f"Stats sampling failed: {e}")
+
+    def sample_once(self) -> int:
+        """Record one sample per running container; returns how many were written."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=settings.STATS_SAMPLE_CONCURRENCY, thread_name_prefix="stats-sample")
+        sampled_at = datetime.utcnow()
+        # Each stats call blocks ~1s on the daemon while it measures CPU, so run them in parallel
+        stats = [s for s in self._pool.map(docker_service.get_container_stats, docker_service.running_container_ids()) if s]
+        rows = [
+            {
+                "container_id": s["id"],
+                "container_name": s["name"],
+                "sampled_at": sampled_at,
+                "cpu_percent": s["cpu_percent"],
+                "memory_usage": s["memory_usage"],
+                "memory_working_set": s["memory_working_set"],
+                "memory_limit": s["memory_limit"] or None,
+            }
+            for s in stats
+        ]
+        if rows:
+            db = SessionLocal()
+            try:
+                db.execute(insert(ContainerStatsSample), rows)
+                db.commit()
+            finally:
+                db.close()
+        self._last_sample = (sampled_at, stats)
+        try:
+            cluster_service.put_shared(LAST_SAMPLE_KEY, stats, updated_at=sampled_at)
+        except Exception as e:
+            logger.error(f"Failed to share stats sample: {e}")
+        for listener in self._listeners:
+            try:
+                listener(sampled_at, stats)
+            except Exception as e:
+                logger.error(f"Stats listener {getattr(listener, '__qualname__', listener)} failed: {e}")
+        return len(rows)
+
+    def last_sample(self) -> Optional[Tuple[datetime, List[Dict[str, Any]]]]:
+        """
+        (sampled_at, container stats) of the latest tick, taken by this worker or
+        shared by the leader. None with sampling disabled, before the first tick,
+        or once the last one is older than LAST_SAMPLE_MAX_AGE_INTERVALS intervals.
+        """
+        if settings.STATS_SAMPLE_INTERVAL <= 0:
+            return None
+        sample = self._last_sample
+        if not cluster_service.is_leader:
+            try:
+                shared = cluster_service.get_shared(LAST_SAMPLE_KEY)
+            except Exception as e:
+                logger.error(f"Failed to read shared stats sample: {e}")
+                shared = None
+            if shared is not None and (sample is None or shared[1] > sample[0]):
+                stats, sampled_at = shared
+                sample = (sampled_at, stats or [])
+        max_age = timedelta(seconds=settings.STATS_SAMPLE_INTERVAL * LAST_SAMPLE_MAX_AGE_INTERVALS)
+        if sample is None or datetime.utcnow() - sample[0] > max_age:
+            return None
+        return sample
+
+    def prune(self) -> int:
+        self._last_prune = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=settings.STATS_RETENTION_DAYS)
+        db = SessionLocal()
+        try:
+            removed = db.query(ContainerStatsSample).filter(ContainerStatsSample.sampled_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if removed:
+            logger.info(f"Pruned {removed} stats sample(s) older than {settings.STATS_RETENTION_DAYS} days")
+        return removed
+
+    # --- recommendations ---
+
+    def recommend_all(self, window_hours: Optional[int] = None, flagged: bool = False) -> List[Dict[str, Any]]:
+        """
+        Recommendations for containers with samples in the window (that still exist).
+        Limits come from the sampler's latest tick, which carries them for every running
+        container; only containers missing from it (stopped since) are inspected.
+        """
+        window_hours = window_hours or settings.RECOMMENDATION_WINDOW_HOURS
+        sample = self.last_sample()
+        # Samples shared by an older version have no limits
+        sampled = {s["id"]: s for s in (sample[1] if sample else []) if "limits" in s}
+        recommendations = []
+        for container_id, samples in self._samples(window_hours).items():
+            container = sampled.get(container_id) or self._inspect(container_id)
+            if container is None:
+                continue
+            recommendation = self._recommend(container, samples, window_hours)
+            if flagged and not set(recommendation["flags"]) - {"insufficient_data"}:
+                continue
+            recommendations.append(recommendation)
+        return recommendations
+
+    def _samples(self, window_hours: int, container_id: Optional[str] = None) -> Dict[str, List[Any]]:
+        """Samples in the window by container ID, in one query."""
+        since = datetime.utcnow() - timedelta(hours=window_hours)
+        db = SessionLocal()
+        try:
+            query = db.query(
+                ContainerStatsSample.container_id,
+                ContainerStatsSample.cpu_percent,
+                ContainerStatsSample.memory_usage,
+                # Samples from before the working set was recorded fall back to raw usage
+                func.coalesce(ContainerStatsSample.memory_working_set, ContainerStatsSample.memory_usage).label("working_set"),
+            ).filter(ContainerStatsSample.sampled_at >= since)
+            if container_id is not None:
+                query = query.filter(ContainerStatsSample.container_id == container_id)
+            samples: Dict[str, List[Any]] = {}
+            for row in query.all():
+                samples.setdefault(row.container_id, []).append(row)
+            return samples
+        finally:
+            db.close()
+
+    @staticmethod
+    def _inspect(container_id: str) -> Optional[Dict[str, Any]]:
+        """ID, name, limits and OOM state of a container, as the sampler records them; None if it doesn't exist."""
+        container = docker_service.get_container(container_id)
+        if container is None:
+            return None
+        return {
+            "id": container.short_id,
+            "name": container.name,
+            "limits": resource_limits(container.attrs),
+            "oom_killed": bool((container.attrs.get("State") or {}).get("OOMKilled")),
+        }
+
+    def recommend(self, container_id: str, window_hours: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Recommendation for one container, or None if it doesn't exist."""
+        container = self._inspect(container_id)
+        if container is None:
+            return None
+        window_hours = window_hours or settings.RECOMMENDATION_WINDOW_HOURS
+        samples = self._samples(window_hours, container["id"]).get(container["id"], [])
+        return self._recommend(container, samples, window_hours)
+
+    def _recommend(self, container: Dict[str, Any], samples: List[Any], window_hours: int) -> Dict[str, Any]:
+        limits = container["limits"]
+        cpu_period = limits["cpu_period"]
+        cpu_quota = limits["cpu_quota"]
+        memory_limit = limits["mem_limit_bytes"]
+
+        cpu = percentiles(s.cpu_percent for s in samples)
+        usage = percentiles(s.memory_usage for s in samples)
+        # Page cache is reclaimed under the limit, so limits and OOM risk go by the working set
+        memory = percentiles(s.working_set for s in samples)
+        result: Dict[str, Any] = {
+            "container_id": container["id"],
+            "name": container["name"],
+            "window_hours": window_hours,
+            "samples": len(samples),
+            "cpu_percent": cpu,
+            "memory_usage": usage,
+            "memory_working_set": memory,
+            "current": dict(limits),
+            "recommended": None,
+            "flags": [],
+        }
+        flags: List[str] = result["flags"]
+        if container["oom_killed"]:
+            flags.append("oom_killed")
+        if len(samples) < settings.RECOMMENDATION_MIN_SAMPLES:
+            flags.append("insufficient_data")
+            return result
+
+        # CPU: p99 (100 = one core) plus headroom, as a quota of the container's CFS period
+        recommended_quota = max(
+            _round_up(cpu["p99"] * settings.RECOMMENDATION_CPU_HEADROOM / 100 * cpu_period, 1000),
+            MIN_CPU_QUOTA,
+        )
+        # Memory: peak plus headroom; sizing to a percentile would OOM-kill at the next peak
+        recommended_memory = max(_round_up(memory["max"] * settings.RECOMMENDATION_MEMORY_HEADROOM, MIB), MIN_MEMORY_LIMIT)
+        result["recommended"] = {
+            "cpu_quota": recommended_quota,
+            "cpu_period": cpu_period,
+            # --cpus containers can only be updated through NanoCpus
+            "nano_cpus": round(recommended_quota / cpu_period * 1e9) if limits["nano_cpus"] else None,
+            "mem_limit": f"{recommended_memory // MIB}m",
+            "mem_limit_bytes": recommended_memory,
+        }
+
+        if cpu_quota is None:
+            flags.append("cpu_unbounded")
+        else:
+            quota_percent = cpu_quota / cpu_period * 100
+            if cpu["p99"] >= quota_percent * RISK_RATIO:
+                flags.append("cpu_throttling_risk")
+            elif cpu_quota >= recommended_quota * OVER_PROVISIONED_FACTOR:
+                flags.append("cpu_over_provisioned")
+        if memory_limit is None:
+            flags.append("memory_unbounded")
+        else:
+            if memory["max"] >= memory_limit * RISK_RATIO:
+                flags.append("oom_risk")
+            elif memory_limit >= recommended_memory * OVER_PROVISIONED_FACTOR:
+                flags.append("memory_over_provisioned")
+        return result
+
+    def apply(
+        self,
+        container_ids: List[str],
+        window_hours: Optional[int] = None,
+        cpu: bool = True,
+        memory: bool = True,
+        dry_run: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Apply recommendations through the regular resource update (container.update)."""
+        results = []
+        for container_id in container_ids:
+            entry: Dict[str, Any] = {
+                "container_id": container_id, "applied": False, "cpu_quota": None, "nano_cpus": None, "mem_limit": None,
+            }
+            results.append(entry)
+            recommendation = self.recommend(container_id, window_hours)
+            if recommendation is None:
+                entry["error"] = "Container not found"
+                continue
+            if recommendation["recommended"] is None:
+                entry["error"] = f"Not enough samples ({recommendation['samples']}/{settings.RECOMMENDATION_MIN_SAMPLES})"
+                continue
+            if cpu and recommendation["recommended"]["nano_cpus"]:
+                entry["nano_cpus"] = recommendation["recommended"]["nano_cpus"]
+            elif cpu:
+                entry["cpu_quota"] = recommendation["recommended"]["cpu_quota"]
+            if memory:
+                entry["mem_limit"] = recommendation["recommended"]["mem_limit"]
+            if dry_run:
+                continue
+            try:
+                entry["applied"] = docker_service.update_container_resources(
+                    container_id, cpu_quota=entry["cpu_quota"], nano_cpus=entry["nano_cpus"], mem_limit=entry["mem_limit"]
+                )
+                if not entry["applied"]:
+                    entry["error"] = "Failed to update resources"
+            except Exception as e:
+                # e.g. a memory limit below current usage is refused by the daemon
+                entry["error"] = f"{type(e).__name__}: {e}"
+        return results
+
+
+stats_history_service = StatsHistoryService()
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files produced by `benchmarks.run`.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits non-zero if any endpoint's p95 latency regressed by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def pct_change(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return (new - old) / old * 100.0
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    old_results, new_results = baseline["results"], candidate["results"]
+    print(f"baseline {baseline['meta'].get('commit')}  ->  candidate {candidate['meta'].get('commit')}")
+    print(f"{'endpoint':<22}" + "".join(f"{m:>24}" for m in METRICS))
+    for name in sorted(set(old_results) | set(new_results)):
+        if name not in old_results or name not in new_results:
+            print(f"{name:<22} (only in {'candidate' if name in new_results else 'baseline'})")
+            continue
+        cells = []
+        for metric in METRICS:
+            old, new = old_results[name][metric], new_results[name][metric]
+            change = pct_change(old, new)
+            cells.append(f"{old:>9.2f} -> {new:>9.2f} " + (f"{change:+6.1f}%" if change is not None else "     -"))
+        print(f"{name:<22}" + "".join(f"{c:>24}" for c in cells))
+
+        p95_change = pct_change(old_results[name]["p95_ms"], new_results[name]["p95_ms"])
+        if p95_change is not None and p95_change > threshold:
+            regressions.append(f"{name}: p95 {p95_change:+.1f}%")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 regression in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print("\nRegressions over threshold:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
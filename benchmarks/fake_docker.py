@@ -0,0 +1,706 @@
+"""
+Fake Docker Engine API served over a Unix socket.
+
+Implements just enough of the Engine API for the Docker SDK calls Frame Dock
+makes (list/inspect/stats/start/stop/restart/create/remove containers, list/
+inspect/pull/remove/prune images, system df, events) against an in-memory
+inventory of N containers and M images, with configurable per-call latency.
+
+Usage:
+    python -m benchmarks.fake_docker --socket /tmp/fake-docker.sock --containers 50 --images 20
+    DOCKER_HOST=unix:///tmp/fake-docker.sock uvicorn app.main:app
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_VERSION = "1.44"
+VERSIONED_PATH = re.compile(r"^/v\d+\.\d+(/.*)$")
+
+
+def _digest(seed: str) -> str:
+    return "sha256:" + hashlib.sha256(seed.encode()).hexdigest()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeDockerState:
+    """In-memory inventory of images and containers."""
+
+    def __init__(self, containers: int = 10, images: int = 5, seed: int = 42):
+        self.lock = threading.RLock()
+        self.rng = random.Random(seed)
+        self.images: Dict[str, Dict[str, Any]] = {}
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.events: List["queue.Queue[Dict[str, Any]]"] = []
+        now = time.time()
+        for i in range(max(images, 1)):
+            self._add_image(f"app{i}", "latest", created=now - 86400 * (i + 1))
+        image_ids = list(self.images)
+        for i in range(containers):
+            project = f"stack{i % 5}"
+            self._add_container(
+                name=f"svc{i}",
+                image_id=image_ids[i % len(image_ids)],
+                running=(i % 4 != 3),
+                labels={
+                    "com.docker.compose.project": project,
+                    "com.docker.compose.service": f"svc{i}",
+                    "tier": "web" if i % 2 == 0 else "worker",
+                },
+                created=now - 3600 * (i + 1),
+            )
+
+    # --- inventory helpers ---
+
+    def _add_image(self, repo: str, tag: str, created: Optional[float] = None) -> Dict[str, Any]:
+        image_id = _digest(f"image:{repo}:{tag}")
+        size = self.rng.randint(20, 800) * 1024 * 1024
+        image = {
+            "Id": image_id,
+            "RepoTags": [f"{repo}:{tag}"],
+            "RepoDigests": [],
+            "Created": created or time.time(),
+            "Size": size,
+            "SharedSize": size // 3,
+            "Labels": {},
+        }
+        self.images[image_id] = image
+        return image
+
+    def _add_container(self, name: str, image_id: str, running: bool,
+                       labels: Optional[Dict[str, str]] = None,
+                       created: Optional[float] = None,
+                       host_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        container_id = hashlib.sha256(f"container:{name}:{time.time()}".encode()).hexdigest()
+        now = time.time()
+        container = {
+            "Id": container_id,
+            "Name": name,
+            "ImageID": image_id,
+            "Created": created or now,
+            "Running": running,
+            "StartedAt": now if running else 0,
+            "FinishedAt": 0 if running else now,
+            "Labels": labels or {},
+            "HostConfig": {"CpuQuota": 0, "Memory": 0, **(host_config or {})},
+            "SizeRw": self.rng.randint(0, 50) * 1024 * 1024,
+            "cpu_total": self.rng.randint(10 ** 9, 10 ** 10),
+            "memory": self.rng.randint(20, 900) * 1024 * 1024,
+            "rx": self.rng.randint(10 ** 5, 10 ** 9),
+            "tx": self.rng.randint(10 ** 5, 10 ** 9),
+        }
+        self.containers[container_id] = container
+        return container
+
+    def find_container(self, ref: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if ref in self.containers:
+                return self.containers[ref]
+            for c in self.containers.values():
+                if c["Id"].startswith(ref) or c["Name"] == ref.lstrip("/"):
+                    return c
+        return None
+
+    def find_image(self, ref: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if ref in self.images:
+                return self.images[ref]
+            if ":" not in ref or ref.startswith("sha256:"):
+                candidates = [ref, f"{ref}:latest"]
+            else:
+                candidates = [ref]
+            for img in self.images.values():
+                if img["Id"].startswith(ref) or img["Id"].split(":", 1)[1].startswith(ref):
+                    return img
+                if any(tag in img["RepoTags"] for tag in candidates):
+                    return img
+        return None
+
+    def image_tag(self, image_id: str) -> str:
+        image = self.images.get(image_id)
+        return image["RepoTags"][0] if image and image["RepoTags"] else image_id
+
+    def emit(self, event_type: str, action: str, actor_id: str, attributes: Dict[str, str]):
+        now = time.time()
+        event = {
+            "Type": event_type,
+            "Action": action,
+            "Actor": {"ID": actor_id, "Attributes": attributes},
+            "scope": "local",
+            "time": int(now),
+            "timeNano": int(now * 1e9),
+        }
+        if event_type == "container":
+            event["status"] = action
+            event["id"] = actor_id
+            event["from"] = attributes.get("image", "")
+        with self.lock:
+            subscribers = list(self.events)
+        for q in subscribers:
+            q.put(event)
+
+    def container_event(self, container: Dict[str, Any], action: str, **extra: str):
+        attributes = {"name": container["Name"], "image": self.image_tag(container["ImageID"])}
+        attributes.update(container["Labels"])
+        attributes.update(extra)
+        self.emit("container", action, container["Id"], attributes)
+
+    # --- API representations ---
+
+    def container_summary(self, c: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "Id": c["Id"],
+            "Names": [f"/{c['Name']}"],
+            "Image": self.image_tag(c["ImageID"]),
+            "ImageID": c["ImageID"],
+            "Command": "/entrypoint.sh",
+            "Created": int(c["Created"]),
+            "State": "running" if c["Running"] else "exited",
+            "Status": "Up" if c["Running"] else "Exited (0)",
+            "Ports": [],
+            "Labels": c["Labels"],
+            "SizeRw": c["SizeRw"],
+            "SizeRootFs": c["SizeRw"] + self.images.get(c["ImageID"], {}).get("Size", 0),
+            "HostConfig": {"NetworkMode": "default"},
+            "NetworkSettings": {"Networks": {}},
+            "Mounts": [],
+        }
+
+    def container_inspect(self, c: Dict[str, Any]) -> Dict[str, Any]:
+        state = {
+            "Status": "running" if c["Running"] else "exited",
+            "Running": c["Running"],
+            "Paused": False,
+            "Restarting": False,
+            "OOMKilled": False,
+            "Dead": False,
+            "Pid": 1234 if c["Running"] else 0,
+            "ExitCode": 0,
+            "StartedAt": _iso(c["StartedAt"]) if c["StartedAt"] else "0001-01-01T00:00:00Z",
+            "FinishedAt": _iso(c["FinishedAt"]) if c["FinishedAt"] else "0001-01-01T00:00:00Z",
+        }
+        return {
+            "Id": c["Id"],
+            "Created": _iso(c["Created"]),
+            "Name": f"/{c['Name']}",
+            "Image": c["ImageID"],
+            "ImageID": c["ImageID"],
+            "State": state,
+            "RestartCount": 0,
+            "Config": {"Image": self.image_tag(c["ImageID"]), "Labels": c["Labels"], "Env": []},
+            "HostConfig": c["HostConfig"],
+            "NetworkSettings": {"Ports": {}, "Networks": {}},
+            "Mounts": [],
+        }
+
+    def image_summary(self, img: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            users = sum(1 for c in self.containers.values() if c["ImageID"] == img["Id"])
+        return {
+            "Id": img["Id"],
+            "ParentId": "",
+            "RepoTags": img["RepoTags"],
+            "RepoDigests": img["RepoDigests"],
+            "Created": int(img["Created"]),
+            "Size": img["Size"],
+            "SharedSize": img["SharedSize"],
+            "VirtualSize": img["Size"],
+            "Labels": img["Labels"],
+            "Containers": users,
+        }
+
+    def image_inspect(self, img: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "Id": img["Id"],
+            "RepoTags": img["RepoTags"],
+            "RepoDigests": img["RepoDigests"],
+            "Created": _iso(img["Created"]),
+            "Size": img["Size"],
+            "Config": {"Labels": img["Labels"]},
+        }
+
+    def container_stats(self, c: Dict[str, Any]) -> Dict[str, Any]:
+        jitter = self.rng.randint(0, 10 ** 8)
+        system = int(time.time() * 1e9) * 4
+        memory = c["memory"] + self.rng.randint(0, 4 * 1024 * 1024)
+        return {
+            "read": _iso(time.time()),
+            "preread": _iso(time.time() - 1),
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": c["cpu_total"] + jitter},
+                "system_cpu_usage": system,
+                "online_cpus": 4,
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": c["cpu_total"]},
+                "system_cpu_usage": system - 4 * 10 ** 9,
+                "online_cpus": 4,
+            },
+            "memory_stats": {
+                "usage": memory,
+                "limit": c["HostConfig"].get("Memory") or 8 * 1024 ** 3,
+                "stats": {
+                    "anon": memory * 6 // 10,
+                    "file": memory * 3 // 10,
+                    "kernel": memory // 20,
+                    "kernel_stack": memory // 100,
+                    "slab": memory // 40,
+                    "sock": 0,
+                },
+            },
+            "networks": {"eth0": {"rx_bytes": c["rx"], "tx_bytes": c["tx"]}},
+            "blkio_stats": {"io_service_bytes_recursive": [
+                {"major": 8, "minor": 0, "op": "read", "value": 4096 * 100},
+                {"major": 8, "minor": 0, "op": "write", "value": 4096 * 50},
+            ]},
+            "pids_stats": {"current": 5},
+        }
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeDockerServer"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from BaseHTTPRequestHandler
+        pass
+
+    # --- plumbing ---
+
+    def _route(self, method: str):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        m = VERSIONED_PATH.match(path)
+        if m:
+            path = m.group(1)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.record_call(method, path)
+        delay = self.server.latency_for(path)
+        if delay:
+            time.sleep(delay)
+        try:
+            handler = self.server.app.dispatch(method, path)
+            if handler is None:
+                return self._json(404, {"message": f"page not found: {method} {path}"})
+            func, params = handler
+            func(self, query, body, **params)
+        except BrokenPipeError:
+            pass
+
+    def _json(self, status: int, payload: Any):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Api-Version", API_VERSION)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _empty(self, status: int = 204):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _text(self, status: int, text: str):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, payload: Any):
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def do_HEAD(self):
+        self._route("HEAD")
+
+
+class FakeDockerApp:
+    """Route table for the fake daemon."""
+
+    def __init__(self, state: FakeDockerState, pull_layers: int = 3, pull_step_delay: float = 0.05):
+        self.state = state
+        self.pull_layers = pull_layers
+        self.pull_step_delay = pull_step_delay
+        self.routes = [
+            ("GET", r"/_ping", self.ping),
+            ("HEAD", r"/_ping", self.ping),
+            ("GET", r"/version", self.version),
+            ("GET", r"/info", self.info),
+            ("GET", r"/containers/json", self.list_containers),
+            ("POST", r"/containers/create", self.create_container),
+            ("GET", r"/containers/(?P<ref>[^/]+)/json", self.inspect_container),
+            ("GET", r"/containers/(?P<ref>[^/]+)/stats", self.container_stats),
+            ("POST", r"/containers/(?P<ref>[^/]+)/start", self.start_container),
+            ("POST", r"/containers/(?P<ref>[^/]+)/stop", self.stop_container),
+            ("POST", r"/containers/(?P<ref>[^/]+)/restart", self.restart_container),
+            ("POST", r"/containers/(?P<ref>[^/]+)/update", self.update_container),
+            ("DELETE", r"/containers/(?P<ref>[^/]+)", self.remove_container),
+            ("GET", r"/images/json", self.list_images),
+            ("POST", r"/images/create", self.pull_image),
+            ("POST", r"/images/prune", self.prune_images),
+            ("GET", r"/images/(?P<ref>.+)/json", self.inspect_image),
+            ("DELETE", r"/images/(?P<ref>.+)", self.remove_image),
+            ("GET", r"/system/df", self.system_df),
+            ("GET", r"/events", self.events),
+        ]
+        self.compiled = [(m, re.compile(f"^{p}$"), f) for m, p, f in self.routes]
+
+    def dispatch(self, method: str, path: str):
+        for m, pattern, func in self.compiled:
+            if m != method:
+                continue
+            match = pattern.match(path)
+            if match:
+                return func, match.groupdict()
+        return None
+
+    # --- system ---
+
+    def ping(self, h: FakeDockerHandler, query, body):
+        h._text(200, "OK")
+
+    def version(self, h: FakeDockerHandler, query, body):
+        h._json(200, {"ApiVersion": API_VERSION, "Version": "25.0.0-fake", "MinAPIVersion": "1.24", "Os": "linux", "Arch": "amd64"})
+
+    def info(self, h: FakeDockerHandler, query, body):
+        with self.state.lock:
+            running = sum(1 for c in self.state.containers.values() if c["Running"])
+            h._json(200, {"Containers": len(self.state.containers), "ContainersRunning": running, "Images": len(self.state.images)})
+
+    def system_df(self, h: FakeDockerHandler, query, body):
+        s = self.state
+        with s.lock:
+            images = [s.image_summary(img) for img in s.images.values()]
+            containers = [s.container_summary(c) for c in s.containers.values()]
+        layers = sum(img["Size"] - img["SharedSize"] for img in images) + max((img["SharedSize"] for img in images), default=0)
+        h._json(200, {
+            "LayersSize": layers,
+            "Images": images,
+            "Containers": containers,
+            "Volumes": [
+                {"Name": "data", "Driver": "local", "UsageData": {"Size": 512 * 1024 * 1024, "RefCount": 1}},
+                {"Name": "orphan", "Driver": "local", "UsageData": {"Size": 128 * 1024 * 1024, "RefCount": 0}},
+            ],
+            "BuildCache": [
+                {"ID": "cache1", "Type": "regular", "Size": 64 * 1024 * 1024, "InUse": False, "Shared": False},
+                {"ID": "cache2", "Type": "regular", "Size": 32 * 1024 * 1024, "InUse": True, "Shared": False},
+            ],
+        })
+
+    def events(self, h: FakeDockerHandler, query, body):
+        q: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        with self.state.lock:
+            self.state.events.append(q)
+        h._start_stream()
+        try:
+            until = float(query["until"]) if "until" in query else None
+            while until is None or time.time() < until:
+                try:
+                    event = q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                h._chunk(event)
+            h._end_stream()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.state.lock:
+                self.state.events.remove(q)
+
+    # --- containers ---
+
+    def list_containers(self, h: FakeDockerHandler, query, body):
+        show_all = query.get("all") in ("1", "true", "True")
+        with self.state.lock:
+            items = [
+                self.state.container_summary(c)
+                for c in self.state.containers.values()
+                if show_all or c["Running"]
+            ]
+        h._json(200, items)
+
+    def _container_or_404(self, h: FakeDockerHandler, ref: str) -> Optional[Dict[str, Any]]:
+        c = self.state.find_container(ref)
+        if c is None:
+            h._json(404, {"message": f"No such container: {ref}"})
+        return c
+
+    def inspect_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if c:
+            h._json(200, self.state.container_inspect(c))
+
+    def container_stats(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if c:
+            h._json(200, self.state.container_stats(c))
+
+    def start_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if not c:
+            return
+        if c["Running"]:
+            return h._empty(304)
+        c["Running"] = True
+        c["StartedAt"] = time.time()
+        self.state.container_event(c, "start")
+        h._empty()
+
+    def stop_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if not c:
+            return
+        if not c["Running"]:
+            return h._empty(304)
+        c["Running"] = False
+        c["FinishedAt"] = time.time()
+        self.state.container_event(c, "kill", signal="15")
+        self.state.container_event(c, "die", exitCode="0")
+        self.state.container_event(c, "stop")
+        h._empty()
+
+    def restart_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if not c:
+            return
+        c["Running"] = True
+        c["StartedAt"] = time.time()
+        self.state.container_event(c, "die", exitCode="0")
+        self.state.container_event(c, "start")
+        self.state.container_event(c, "restart")
+        h._empty()
+
+    def update_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if not c:
+            return
+        payload = json.loads(body or b"{}")
+        # The daemon refuses to switch a container between the two CPU limit forms
+        if payload.get("CpuQuota") and c["HostConfig"].get("NanoCpus"):
+            return h._json(409, {"message": "Conflicting options: CPU Quota cannot be updated as NanoCPUs has already been set"})
+        if payload.get("NanoCpus") and c["HostConfig"].get("CpuQuota"):
+            return h._json(409, {"message": "Conflicting options: Nano CPUs cannot be updated as CPU Quota has already been set"})
+        for key in ("CpuQuota", "NanoCpus", "Memory", "MemorySwap"):
+            if key in payload:
+                c["HostConfig"][key] = payload[key]
+        self.state.container_event(c, "update")
+        h._json(200, {"Warnings": []})
+
+    def create_container(self, h: FakeDockerHandler, query, body):
+        payload = json.loads(body or b"{}")
+        image = self.state.find_image(payload.get("Image", ""))
+        if image is None:
+            return h._json(404, {"message": f"No such image: {payload.get('Image')}"})
+        name = query.get("name") or f"fake_{int(time.time() * 1000) % 100000}"
+        with self.state.lock:
+            c = self.state._add_container(
+                name=name,
+                image_id=image["Id"],
+                running=False,
+                labels=payload.get("Labels") or {},
+                host_config={
+                    "CpuQuota": (payload.get("HostConfig") or {}).get("CpuQuota") or 0,
+                    "Memory": (payload.get("HostConfig") or {}).get("Memory") or 0,
+                },
+            )
+        self.state.container_event(c, "create")
+        h._json(201, {"Id": c["Id"], "Warnings": []})
+
+    def remove_container(self, h: FakeDockerHandler, query, body, ref: str):
+        c = self._container_or_404(h, ref)
+        if not c:
+            return
+        if c["Running"] and query.get("force") not in ("1", "true", "True"):
+            return h._json(409, {"message": "You cannot remove a running container. Stop the container before attempting removal or force remove"})
+        with self.state.lock:
+            self.state.containers.pop(c["Id"], None)
+        self.state.container_event(c, "destroy")
+        h._empty()
+
+    # --- images ---
+
+    def list_images(self, h: FakeDockerHandler, query, body):
+        with self.state.lock:
+            items = [self.state.image_summary(img) for img in self.state.images.values()]
+        h._json(200, items)
+
+    def inspect_image(self, h: FakeDockerHandler, query, body, ref: str):
+        img = self.state.find_image(ref)
+        if img is None:
+            return h._json(404, {"message": f"No such image: {ref}"})
+        h._json(200, self.state.image_inspect(img))
+
+    def remove_image(self, h: FakeDockerHandler, query, body, ref: str):
+        img = self.state.find_image(ref)
+        if img is None:
+            return h._json(404, {"message": f"No such image: {ref}"})
+        with self.state.lock:
+            in_use = any(c["ImageID"] == img["Id"] for c in self.state.containers.values())
+            if in_use and query.get("force") not in ("1", "true", "True"):
+                return h._json(409, {"message": f"conflict: unable to delete {ref} (image is being used)"})
+            self.state.images.pop(img["Id"], None)
+        self.state.emit("image", "delete", img["Id"], {"name": ref})
+        h._json(200, [{"Untagged": tag} for tag in img["RepoTags"]] + [{"Deleted": img["Id"]}])
+
+    def prune_images(self, h: FakeDockerHandler, query, body):
+        with self.state.lock:
+            used = {c["ImageID"] for c in self.state.containers.values()}
+            dangling = [img for img in self.state.images.values() if not img["RepoTags"] and img["Id"] not in used]
+            for img in dangling:
+                self.state.images.pop(img["Id"], None)
+        h._json(200, {
+            "ImagesDeleted": [{"Deleted": img["Id"]} for img in dangling] or None,
+            "SpaceReclaimed": sum(img["Size"] - img["SharedSize"] for img in dangling),
+        })
+
+    def pull_image(self, h: FakeDockerHandler, query, body):
+        repo = query.get("fromImage", "")
+        tag = query.get("tag") or "latest"
+        if "@" in repo or repo.endswith(":"):
+            return h._json(400, {"message": "invalid reference format"})
+        h._start_stream()
+        h._chunk({"status": f"Pulling from library/{repo}", "id": tag})
+        layers = [hashlib.sha256(f"{repo}:{tag}:{i}".encode()).hexdigest()[:12] for i in range(self.pull_layers)]
+        total = 10 * 1024 * 1024
+        for layer in layers:
+            h._chunk({"status": "Pulling fs layer", "progressDetail": {}, "id": layer})
+        for step in range(1, 5):
+            for layer in layers:
+                h._chunk({
+                    "status": "Downloading",
+                    "progressDetail": {"current": total * step // 4, "total": total},
+                    "progress": f"[{'=' * step * 10}>] {step * 25}%",
+                    "id": layer,
+                })
+            time.sleep(self.pull_step_delay)
+        for layer in layers:
+            h._chunk({"status": "Download complete", "progressDetail": {}, "id": layer})
+            h._chunk({"status": "Pull complete", "progressDetail": {}, "id": layer})
+        with self.state.lock:
+            image = self.state.find_image(f"{repo}:{tag}") or self.state._add_image(repo, tag)
+        h._chunk({"status": f"Digest: {image['Id']}"})
+        h._chunk({"status": f"Status: Downloaded newer image for {repo}:{tag}"})
+        h._end_stream()
+        self.state.emit("image", "pull", f"{repo}:{tag}", {"name": f"{repo}:{tag}"})
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+    def __init__(self, socket_path: str, app: FakeDockerApp, latency_ms: float = 0.0,
+                 stats_latency_ms: Optional[float] = None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.app = app
+        self.latency = latency_ms / 1000.0
+        self.stats_latency = (stats_latency_ms / 1000.0) if stats_latency_ms is not None else self.latency
+        self.calls: Dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        super().__init__(socket_path, FakeDockerHandler)
+
+    def latency_for(self, path: str) -> float:
+        if path.endswith("/stats"):
+            return self.stats_latency
+        if path in ("/events", "/version", "/_ping"):
+            return 0.0
+        return self.latency
+
+    def record_call(self, method: str, path: str):
+        key = f"{method} {re.sub(r'/[0-9a-f]{12,}', '/{id}', path)}"
+        with self._calls_lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+
+class FakeDockerDaemon:
+    """Runs a FakeDockerServer in a background thread."""
+
+    def __init__(self, socket_path: str, containers: int = 10, images: int = 5,
+                 latency_ms: float = 0.0, stats_latency_ms: Optional[float] = None, seed: int = 42):
+        self.socket_path = socket_path
+        self.state = FakeDockerState(containers=containers, images=images, seed=seed)
+        self.server = FakeDockerServer(socket_path, FakeDockerApp(self.state), latency_ms, stats_latency_ms)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def start(self) -> "FakeDockerDaemon":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-docker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "FakeDockerDaemon":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Docker Engine API on a Unix socket")
+    parser.add_argument("--socket", default="/tmp/fake-docker.sock")
+    parser.add_argument("--containers", type=int, default=10)
+    parser.add_argument("--images", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per API call")
+    parser.add_argument("--stats-latency-ms", type=float, default=None, help="Latency for /containers/{id}/stats (defaults to --latency-ms)")
+    args = parser.parse_args()
+
+    daemon = FakeDockerDaemon(args.socket, args.containers, args.images, args.latency_ms, args.stats_latency_ms)
+    print(f"Fake Docker daemon listening on {daemon.url} ({args.containers} containers, {args.images} images)")
+    try:
+        daemon.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Import-time benchmark for `app.main`.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters (no
+Docker daemon or database is touched at import time), reports the median total
+and the slowest modules by cumulative time, and optionally fails if the total
+regressed against a previous run.
+
+Usage:
+    python -m benchmarks.import_time --runs 5 --output import.json
+    python -m benchmarks.import_time --baseline import.json --threshold 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.run import git_commit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per module from -X importtime output."""
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        name = module.strip()
+        cumulative[name] = max(cumulative.get(name, 0), int(cumulative_us.strip()))
+    return cumulative
+
+
+def measure_once(module: str) -> Dict[str, int]:
+    workdir = tempfile.mkdtemp(prefix="framedock-import-")
+    env = {
+        **os.environ,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir}/import.db",
+        "DOCKER_HOST": f"unix://{workdir}/no-daemon.sock",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure how long importing the app takes")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to report")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Previous JSON result to compare the total against")
+    parser.add_argument("--threshold", type=float, default=15.0, help="Allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    modules = set().union(*runs)
+    median_us = {name: statistics.median(run.get(name, 0) for run in runs) for name in modules}
+    total_ms = median_us.get(args.module, 0) / 1000
+    slowest = sorted(
+        (name for name in modules if name != args.module),
+        key=lambda name: median_us[name],
+        reverse=True,
+    )[:args.top]
+
+    print(f"import {args.module}: {total_ms:.1f} ms (median of {args.runs})")
+    for name in slowest:
+        print(f"  {median_us[name] / 1000:>8.1f} ms  {name}")
+
+    report = {
+        "meta": {"commit": git_commit(), "python": sys.version.split()[0], "runs": args.runs},
+        "module": args.module,
+        "total_ms": round(total_ms, 2),
+        "slowest": {name: round(median_us[name] / 1000, 2) for name in slowest},
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        change = (total_ms - baseline["total_ms"]) / baseline["total_ms"] * 100 if baseline["total_ms"] else 0.0
+        print(f"baseline {baseline['meta'].get('commit')}: {baseline['total_ms']:.1f} ms ({change:+.1f}%)")
+        if change > args.threshold:
+            print(f"Import time regressed by more than {args.threshold}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
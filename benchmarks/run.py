@@ -0,0 +1,222 @@
+"""
+Load benchmark for the API hot paths against a simulated Docker daemon.
+
+Starts a fake Docker Engine API on a Unix socket, runs the real FastAPI app
+under uvicorn pointed at it (with a throwaway SQLite database), then drives
+concurrent httpx load against each endpoint and reports latency percentiles
+and throughput. Results are written as JSON so runs can be compared between
+commits with `python -m benchmarks.compare old.json new.json`.
+
+Usage:
+    python -m benchmarks.run --containers 100 --images 30 --latency-ms 2 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_docker import FakeDockerDaemon
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> (method, path)
+ENDPOINTS: Dict[str, tuple] = {
+    "health": ("GET", "/api/v1/health"),
+    "list_containers": ("GET", "/api/v1/docker/containers"),
+    "container_stats_all": ("GET", "/api/v1/docker/containers/stats/all"),
+    "list_images": ("GET", "/api/v1/docker/images"),
+    "system_stats": ("GET", "/api/v1/system/stats"),
+    "list_schedules": ("GET", "/api/v1/schedules/"),  # Auth dependency + one DB query
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/v1/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API server did not become ready")
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/v1/auth/login", json={"username": "admin", "password": "admin123"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def bench_endpoint(client: httpx.AsyncClient, method: str, path: str,
+                         concurrency: int, duration: float, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await client.request(method, path)
+
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_load(base_url: str, names: List[str], concurrency: int, duration: float, warmup: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        client.headers["Authorization"] = f"Bearer {await login(client)}"
+        results = {}
+        for name in names:
+            method, path = ENDPOINTS[name]
+            results[name] = await bench_endpoint(client, method, path, concurrency, duration, warmup)
+            r = results[name]
+            print(
+                f"{name:<22} {r['throughput_rps']:>9.1f} req/s  p50 {r['p50_ms']:>8.2f} ms  "
+                f"p95 {r['p95_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms  errors {r['errors']}",
+                flush=True,
+            )
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark Frame Dock API hot paths against a fake Docker daemon")
+    parser.add_argument("--containers", type=int, default=50)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated daemon latency per API call")
+    parser.add_argument("--stats-latency-ms", type=float, default=None, help="Simulated latency of a container stats call")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per endpoint")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()]
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="framedock-bench-")
+    daemon = FakeDockerDaemon(
+        os.path.join(workdir, "docker.sock"),
+        containers=args.containers,
+        images=args.images,
+        latency_ms=args.latency_ms,
+        stats_latency_ms=args.stats_latency_ms,
+    ).start()
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "DOCKER_HOST": daemon.url,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir}/bench.db",
+        "SECRET_KEY": "benchmark",
+    }
+    env.pop("HOSTNAME", None)  # Don't let the app mistake a fake container for itself
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        results = asyncio.run(run_load(base_url, names, args.concurrency, args.duration, args.warmup))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        daemon.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "containers": args.containers,
+            "images": args.images,
+            "latency_ms": args.latency_ms,
+            "stats_latency_ms": args.stats_latency_ms,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers,
+            "daemon_calls": daemon.server.calls,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
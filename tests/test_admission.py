@@ -0,0 +1,66 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.api_v1.endpoints import docker as endpoints
+from app.core.admission import admission
+from app.core.config import settings
+from app.services import rollout_service
+
+
+class FakeContainer:
+    def __init__(self):
+        self.restarts = 0
+
+    def restart(self, timeout=None):
+        self.restarts += 1
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    """Every start waits for the host to calm down while another one is in flight."""
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission, "_overload", lambda: "cpu_percent 99.0 >= 90")
+    yield
+    with admission._cond:
+        admission._active.clear()
+        admission._queue.clear()
+
+
+@pytest.fixture
+def container(monkeypatch):
+    container = FakeContainer()
+    client = SimpleNamespace(containers=SimpleNamespace(get=lambda container_id: container))
+    monkeypatch.setattr(endpoints.docker_service, "client", client)
+    monkeypatch.setattr(
+        endpoints.docker_service, "container_state",
+        lambda container_id: {"status": "running", "running": True, "health": None, "exit_code": 0, "ip_address": None},
+    )
+    monkeypatch.setattr(rollout_service, "time", SimpleNamespace(monotonic=time.monotonic, sleep=lambda seconds: None))
+    return container
+
+
+def restart(**params):
+    call = endpoints.restart_container(container_id="abc123", current_user="admin", **params)
+    return asyncio.run(asyncio.wait_for(call, timeout=5))
+
+
+def test_wait_healthy_restart_reuses_the_requests_admission_slot(overloaded, container, monkeypatch):
+    monkeypatch.setattr(settings, "ROLLOUT_SYNC_MAX_SECONDS", 3600)
+    result = restart(wait_healthy=True)
+
+    assert result["success"] is True
+    assert container.restarts == 1
+    assert admission.metrics()["admitted"] >= 1 and not admission.metrics()["queued"]
+
+
+def test_restart_routed_to_a_job_is_not_admitted(overloaded, container, monkeypatch):
+    monkeypatch.setattr(settings, "ROLLOUT_SYNC_MAX_SECONDS", 0)
+    monkeypatch.setattr(endpoints, "job_accepted", lambda job: job)
+    monkeypatch.setattr(endpoints.job_service, "submit", lambda kind, **params: kind)
+    admitted = admission.metrics()["admitted"]
+
+    assert restart(wait_healthy=True) == endpoints.docker_jobs.ROLLING_RESTART
+    assert admission.metrics()["admitted"] == admitted
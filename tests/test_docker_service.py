@@ -0,0 +1,129 @@
+import time
+from types import SimpleNamespace
+
+import docker
+import pytest
+from docker.errors import DockerException
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from app.services.docker_service import (
+    CircuitBreaker, DockerService, DockerUnavailableError, update_nano_cpus, working_set,
+)
+
+
+class FakeContainer:
+    id = short_id = "abc123"
+
+    def __init__(self, fail_with=None):
+        self.fail_with = fail_with
+        self.stopped = False
+
+    def stop(self, timeout=None):
+        if self.fail_with:
+            raise self.fail_with
+        self.stopped = True
+
+
+def half_open_service(container: FakeContainer) -> DockerService:
+    service = DockerService()
+    service.client = SimpleNamespace(containers=SimpleNamespace(get=lambda container_id: container))
+    service.breaker.opened_at = time.monotonic() - service.breaker.reset_timeout - 1
+    service.breaker.consecutive_failures = service.breaker.failure_threshold
+    assert service.breaker.state == CircuitBreaker.HALF_OPEN
+    return service
+
+
+def test_half_open_probe_through_mutating_call_closes_circuit():
+    container = FakeContainer()
+    service = half_open_service(container)
+
+    assert service.stop_container(container.id) is True
+    assert container.stopped
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    assert service.breaker._probe_started is None
+
+
+def test_failed_half_open_probe_reopens_circuit():
+    service = half_open_service(FakeContainer(fail_with=RequestsConnectionError("refused")))
+
+    with pytest.raises(DockerUnavailableError):
+        service.stop_container(FakeContainer.id)
+    assert service.breaker.state == CircuitBreaker.OPEN
+    assert service.breaker._probe_started is None
+
+
+def test_half_open_lets_only_one_probe_through():
+    service = half_open_service(FakeContainer())
+    assert service.breaker.allow()
+
+    with pytest.raises(DockerUnavailableError):
+        service.stop_container(FakeContainer.id)
+
+
+@pytest.mark.parametrize("stat, expected", [
+    ({"anon": 300, "file": 700, "inactive_file": 600}, 400),  # cgroup v2
+    ({"total_rss": 300, "total_cache": 700, "total_inactive_file": 600, "inactive_file": 10}, 400),  # cgroup v1
+    ({}, 1000),
+])
+def test_working_set_leaves_out_inactive_page_cache(stat, expected):
+    assert working_set(1000, stat) == expected
+
+
+class PrivateUpdateApi:
+    """docker-py's APIClient as of 7.x: update_container has no nano_cpus."""
+
+    def __init__(self):
+        self.posted = None
+
+    def update_container(self, container, cpu_quota=None, mem_limit=None, memswap_limit=None):
+        raise AssertionError("update_container can't set NanoCpus")
+
+    def _url(self, path, *args):
+        return path.format(*args)
+
+    def _post_json(self, url, data):
+        self.posted = (url, data)
+        return "response"
+
+    def _result(self, response, json=False):
+        return {"Warnings": None}
+
+
+def test_nano_cpus_update_posts_the_body_itself():
+    api = PrivateUpdateApi()
+    update_nano_cpus(api, "abc123", 1_500_000_000, "256m")
+    assert api.posted == (
+        "/containers/abc123/update",
+        {"NanoCpus": 1_500_000_000, "Memory": 256 * 1024 * 1024, "MemorySwap": 256 * 1024 * 1024},
+    )
+
+
+def test_nano_cpus_update_uses_docker_py_when_it_supports_it():
+    calls = []
+
+    class Api:
+        def update_container(self, container, nano_cpus=None, mem_limit=None, memswap_limit=None):
+            calls.append((container, nano_cpus, mem_limit, memswap_limit))
+
+    update_nano_cpus(Api(), "abc123", 500_000_000)
+    assert calls == [("abc123", 500_000_000, None, None)]
+
+
+def test_nano_cpus_update_refused_without_the_private_helpers():
+    class Api:
+        def update_container(self, container, cpu_quota=None):
+            pass
+
+    with pytest.raises(DockerException):
+        update_nano_cpus(Api(), "abc123", 500_000_000)
+
+
+def test_installed_docker_py_can_update_nano_cpus():
+    # Fails when a docker-py upgrade drops the private helpers without adding a nano_cpus parameter
+    api = docker.APIClient(base_url="unix:///nonexistent.sock", version="1.44")
+    posted = []
+    api._post_json = lambda url, data: posted.append((url, data))
+    api._result = lambda response, json=False: {}
+    update_nano_cpus(api, "abc123", 500_000_000)
+    assert posted and posted[0][0].endswith("/containers/abc123/update")
+    assert posted[0][1] == {"NanoCpus": 500_000_000}
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from app.schemas.docker import ImagePrunePolicy
+from app.services import image_gc_service as gc
+
+DAY = 86400
+
+
+@pytest.fixture(autouse=True)
+def no_schedules_or_self(monkeypatch):
+    monkeypatch.setattr(gc, "_scheduled_container_refs", lambda: set())
+    monkeypatch.setattr(gc.docker_service, "_self_detected", True)
+    monkeypatch.setattr(gc.docker_service, "_current_image", None)
+
+
+def image(image_id: str, tag: str, age_days: float):
+    return {"Id": image_id, "RepoTags": [tag], "Created": int(time.time() - age_days * DAY), "Size": 100, "SharedSize": 0}
+
+
+DF = {
+    "Images": [
+        image("new", "app:3", 1),
+        image("recent", "app:2", 2),
+        image("old", "app:1", 60),
+        image("dangling", "<none>:<none>", 1),
+    ],
+    "Containers": [],
+    "LayersSize": 400,
+}
+
+
+def candidates(**policy):
+    plan = gc.image_gc_service.plan(ImagePrunePolicy(**policy), DF)
+    return {c["id"]: c["reasons"] for c in plan["candidates"]}
+
+
+def test_retention_rules_must_all_select_a_tagged_image():
+    # "recent" is beyond the newest tag but younger than 30 days, so it stays
+    assert candidates(keep_recent_tags=1, unused_days=30, include_dangling=False) == {
+        "old": ["beyond 1 newest tags", "unused for over 30 days"],
+    }
+
+
+def test_single_retention_rule_applies_on_its_own():
+    assert set(candidates(keep_recent_tags=1, include_dangling=False)) == {"recent", "old"}
+    assert set(candidates(unused_days=30, include_dangling=False)) == {"old"}
+
+
+def test_dangling_images_follow_include_dangling():
+    assert candidates(keep_recent_tags=1, unused_days=30) == {
+        "old": ["beyond 1 newest tags", "unused for over 30 days"],
+        "dangling": ["dangling"],
+    }
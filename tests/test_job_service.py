@@ -0,0 +1,49 @@
+from collections import deque
+
+from app.services.job_service import JobService
+
+
+class FlakyExecutor:
+    """Refuses the first `failures` submissions, records the rest."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.submitted = []
+
+    def submit(self, fn, job_id, kind, params):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        self.submitted.append(job_id)
+
+
+def service_with_queue(executor: FlakyExecutor) -> JobService:
+    service = JobService()
+    service.register("image.prune", lambda ctx: None, concurrency=1)
+    service._executor = executor
+    service._running["image.prune"] = 1
+    service._pending["image.prune"] = deque(["queued-1", "queued-2"])
+    service._load_params = lambda job_id: {}
+    service.failed = []
+    service._update = lambda job_id, **fields: service.failed.append(job_id) or True
+    return service
+
+
+def test_slot_passes_over_a_queued_job_that_cannot_start():
+    executor = FlakyExecutor(failures=1)
+    service = service_with_queue(executor)
+
+    service._release("image.prune")
+
+    assert service.failed == ["queued-1"]
+    assert executor.submitted == ["queued-2"]
+    assert service._running["image.prune"] == 1
+
+
+def test_slot_is_given_back_when_no_queued_job_can_start():
+    service = service_with_queue(FlakyExecutor(failures=2))
+
+    service._release("image.prune")
+
+    assert service.failed == ["queued-1", "queued-2"]
+    assert service._running["image.prune"] == 0
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.core.config import settings
+from app.models.schedule import ActionType
+from app.services.schedule_timeline import ScheduleTimeline
+
+
+def job(schedule_id: int, **interval):
+    return SimpleNamespace(
+        job_id=str(schedule_id),
+        schedule_id=schedule_id,
+        schedule_name=f"schedule {schedule_id}",
+        action=ActionType.RESTART,
+        container_ids=["abc123"],
+        trigger=IntervalTrigger(**interval),
+        spread_seconds=0,
+    )
+
+
+def test_schedules_capped_at_max_fires_are_reported(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULE_PREVIEW_MAX_FIRES", 10)
+    timeline = ScheduleTimeline()
+    timeline.add([job(1, seconds=1), job(2, minutes=10)])
+
+    now = timeline._now()
+    upcoming = timeline.upcoming(None, now + timedelta(hours=1), limit=1000)
+
+    assert upcoming["truncated"] is True
+    assert upcoming["truncated_schedule_ids"] == [1]
+    assert len([run for run in upcoming["runs"] if run["schedule_id"] == 1]) == 10
+
+
+def test_complete_preview_is_not_truncated():
+    timeline = ScheduleTimeline()
+    timeline.add([job(2, minutes=10)])
+
+    now = timeline._now()
+    upcoming = timeline.upcoming(None, now + timedelta(hours=1), limit=1000)
+
+    assert upcoming["truncated"] is False
+    assert upcoming["truncated_schedule_ids"] == []
+    assert upcoming["total"] == 6
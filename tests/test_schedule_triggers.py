@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.schedule_triggers import build_trigger, crontab_day_of_week
+from app.models.schedule import ScheduleType
+
+# A Monday
+START = datetime(2024, 1, 1, 0, 0)
+
+
+def fire_times(expression: str, count: int, schedule_type: ScheduleType = ScheduleType.CRON):
+    """The first `count` fire times of an expression from START."""
+    trigger = build_trigger(schedule_type, expression, timezone="UTC")
+    now = START.replace(tzinfo=timezone.utc)
+    previous, times = None, []
+    for _ in range(count):
+        fire_time = trigger.get_next_fire_time(previous, now)
+        times.append(fire_time)
+        previous, now = fire_time, fire_time + timedelta(seconds=1)
+    return times
+
+
+def fire_weekdays(expression: str, count: int, schedule_type: ScheduleType = ScheduleType.CRON):
+    """Weekday names of the first `count` fire times of an expression from START."""
+    return [fire_time.strftime("%a").lower() for fire_time in fire_times(expression, count, schedule_type)]
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("0 3 * * 0", ["sun"] * 3),
+    ("0 3 * * 7", ["sun"] * 3),
+    ("0 3 * * 6", ["sat"] * 3),
+    ("0 3 * * 1-5", ["mon", "tue", "wed", "thu", "fri", "mon", "tue"]),
+    ("0 3 * * 0,6", ["sat", "sun", "sat"]),
+    ("0 3 * * 5-7", ["fri", "sat", "sun", "fri"]),
+    ("0 3 * * */2", ["tue", "thu", "sat", "sun"]),
+    ("0 3 * * mon-fri", ["mon", "tue", "wed", "thu", "fri", "mon"]),
+])
+def test_cron_weekdays_follow_crontab_numbering(expression, expected):
+    assert fire_weekdays(expression, len(expected)) == expected
+
+
+def test_weekly_schedule_uses_day_names():
+    assert fire_weekdays("sun 03:00", 2, ScheduleType.WEEKLY) == ["sun", "sun"]
+
+
+def test_day_of_month_or_day_of_week_when_both_are_restricted():
+    # Crontab fires on the 1st and on every Monday, not only on Mondays that are the 1st
+    days = [fire_time.date().isoformat() for fire_time in fire_times("0 0 1 * mon", 6)]
+    assert days == ["2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29", "2024-02-01"]
+
+
+@pytest.mark.parametrize("expression, expected", [
+    # A "*" field (stepped or not) leaves the other day field in charge
+    ("0 0 1 * *", ["2024-01-01", "2024-02-01"]),
+    ("0 0 * * 4", ["2024-01-04", "2024-01-11"]),
+    ("0 0 */10 * 1", ["2024-01-01", "2024-03-11"]),
+    ("0 0 15 * */3", ["2024-05-15", "2024-06-15"]),
+])
+def test_day_fields_combine_with_a_star_field(expression, expected):
+    assert [fire_time.date().isoformat() for fire_time in fire_times(expression, 2)] == expected
+
+
+@pytest.mark.parametrize("field", ["8", "-1", "5-1", "sat-sun", "*/0", "funday"])
+def test_invalid_weekdays_are_rejected(field):
+    with pytest.raises(ValueError):
+        crontab_day_of_week(field)
+    with pytest.raises(ValueError):
+        build_trigger(ScheduleType.CRON, f"0 3 * * {field}")
@@ -0,0 +1,50 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services import stats_history_service as module
+from app.services.stats_history_service import StatsHistoryService
+
+MIB = 1024 * 1024
+
+
+def sample_rows(count: int, working_set: int):
+    return [SimpleNamespace(cpu_percent=10.0, memory_usage=working_set * 2, working_set=working_set) for _ in range(count)]
+
+
+def sampled(container_id: str, mem_limit_bytes=None, **limits):
+    return {
+        "id": container_id,
+        "name": f"app-{container_id}",
+        "limits": {"cpu_quota": None, "cpu_period": 100000, "nano_cpus": None, "mem_limit_bytes": mem_limit_bytes, **limits},
+        "oom_killed": False,
+    }
+
+
+def test_recommend_all_takes_limits_from_the_last_sample(monkeypatch):
+    service = StatsHistoryService()
+    monkeypatch.setattr(settings, "RECOMMENDATION_MIN_SAMPLES", 3)
+    monkeypatch.setattr(service, "_samples", lambda window_hours: {
+        "running": sample_rows(3, 100 * MIB),
+        "stopped": sample_rows(3, 100 * MIB),
+        "removed": sample_rows(3, 100 * MIB),
+    })
+    monkeypatch.setattr(service, "last_sample", lambda: (datetime.utcnow(), [sampled("running", mem_limit_bytes=1024 * MIB)]))
+    inspected = []
+
+    def get_container(container_id):
+        inspected.append(container_id)
+        if container_id == "removed":
+            return None
+        return SimpleNamespace(short_id=container_id, name="stopped", attrs={"HostConfig": {"NanoCpus": 500_000_000}, "State": {}})
+
+    monkeypatch.setattr(module.docker_service, "get_container", get_container)
+
+    recommendations = {r["container_id"]: r for r in service.recommend_all()}
+
+    assert inspected == ["stopped", "removed"]
+    assert set(recommendations) == {"running", "stopped"}
+    assert recommendations["running"]["current"]["mem_limit_bytes"] == 1024 * MIB
+    assert "memory_over_provisioned" in recommendations["running"]["flags"]
+    assert recommendations["stopped"]["current"]["cpu_quota"] == 50000
+    assert recommendations["stopped"]["recommended"]["nano_cpus"] is not None
@@ -8,6 +8,7 @@ import {
     CreateScheduleRequest,
     SystemStats,
     ContainerStats,
+    MemoryStatsSummary,
 } from './types';
 
 const API_BASE_URL = '/api/v1';
@@ -170,6 +171,13 @@ class ApiService {
         return response.data;
     }
 
+    async getContainerMemoryStats(top?: number): Promise<MemoryStatsSummary> {
+        const response = await this.client.get('/docker/containers/stats/memory', {
+            params: { top },
+        });
+        return response.data;
+    }
+
     async updateContainerResources(
         id: string,
         resources: { cpu_quota?: number; mem_limit?: string }
@@ -194,22 +202,8 @@ class ApiService {
         const schedule = schedules.find((s) => s.id === id);
         if (!schedule) throw new Error('Schedule not found');
 
-        // Update with toggled active state - only send CreateScheduleRequest fields
-        const updateData: CreateScheduleRequest = {
-            container_ids: schedule.container_ids,
-            schedule_name: schedule.schedule_name,
-            schedule_type: schedule.schedule_type,
-            action: schedule.action,
-            time_expression: schedule.time_expression,
-            is_active: !schedule.is_active,
-        };
-
-        // Include wake_time_expression if it exists
-        if (schedule.wake_time_expression) {
-            updateData.wake_time_expression = schedule.wake_time_expression;
-        }
-
-        await this.client.put(`/schedules/${id}`, updateData);
+        // The update only changes the fields sent, so the rest of the schedule is kept
+        await this.client.put(`/schedules/${id}`, { is_active: !schedule.is_active });
     }
 
     async updateSchedule(id: number, data: CreateScheduleRequest): Promise<Schedule> {
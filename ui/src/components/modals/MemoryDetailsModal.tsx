@@ -2,7 +2,10 @@ import { createPortal } from 'react-dom';
 import { useState, useEffect } from 'react';
 import { X, Loader2, Database, Box } from 'lucide-react';
 import { api } from '../../api';
-import { ContainerStats } from '../../types';
+import { ContainerMemoryStats } from '../../types';
+
+// Only the heaviest containers are listed; the backend picks them without sorting everything
+const TOP_CONTAINERS = 20;
 
 interface MemoryDetailsModalProps {
     isOpen: boolean;
@@ -10,14 +13,16 @@ interface MemoryDetailsModalProps {
 }
 
 const MemoryDetailsModal: React.FC<MemoryDetailsModalProps> = ({ isOpen, onClose }) => {
-    const [stats, setStats] = useState<ContainerStats[]>([]);
+    const [stats, setStats] = useState<ContainerMemoryStats[]>([]);
+    const [total, setTotal] = useState(0);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
 
     const fetchStats = async () => {
         try {
-            const data = await api.getContainerStatsAll();
-            setStats(data);
+            const data = await api.getContainerMemoryStats(TOP_CONTAINERS);
+            setStats(data.containers);
+            setTotal(data.count);
             setError(null);
         } catch (err: any) {
             console.error(err);
@@ -53,6 +58,9 @@ const MemoryDetailsModal: React.FC<MemoryDetailsModalProps> = ({ isOpen, onClose
                     <h2 className="text-xl font-bold text-white flex items-center gap-2">
                         <Database className="text-purple-400" size={24} />
                         Container Memory Usage
+                        {total > stats.length && (
+                            <span className="text-sm font-normal text-slate-500">top {stats.length} of {total}</span>
+                        )}
                     </h2>
                     <button onClick={onClose} className="p-2 text-slate-400 hover:text-white hover:bg-slate-800 rounded-lg transition-colors">
                         <X size={20} />
@@ -86,14 +94,18 @@ const MemoryDetailsModal: React.FC<MemoryDetailsModalProps> = ({ isOpen, onClose
                                                 <span className="text-slate-500 text-xs font-mono bg-slate-800 px-1.5 py-0.5 rounded">{container.id.substring(0, 12)}</span>
                                             </div>
 
-                                            <div className="relative h-2 bg-slate-800 rounded-full overflow-hidden mb-2">
-                                                <div
-                                                    className={`absolute top-0 left-0 h-full rounded-full transition-all duration-500 ${container.memory_percent > 90 ? 'bg-red-500' :
-                                                        container.memory_percent > 75 ? 'bg-amber-500' :
-                                                            'bg-purple-500'
-                                                        }`}
-                                                    style={{ width: `${Math.min(container.memory_percent, 100)}%` }}
-                                                />
+                                            <div className="relative h-2 bg-slate-800 rounded-full overflow-hidden mb-2 flex">
+                                                {[
+                                                    { bytes: container.anon, color: container.memory_percent > 90 ? 'bg-red-500' : container.memory_percent > 75 ? 'bg-amber-500' : 'bg-purple-500' },
+                                                    { bytes: container.file, color: 'bg-sky-500/70' },
+                                                    { bytes: container.kernel, color: 'bg-slate-500' },
+                                                ].map((segment, i) => (
+                                                    <div
+                                                        key={i}
+                                                        className={`h-full transition-all duration-500 ${segment.color}`}
+                                                        style={{ width: `${Math.min(segment.bytes / container.memory_limit * 100, 100)}%` }}
+                                                    />
+                                                ))}
                                             </div>
 
                                             <div className="flex justify-between text-xs">
@@ -107,6 +119,12 @@ const MemoryDetailsModal: React.FC<MemoryDetailsModalProps> = ({ isOpen, onClose
                                                     {container.memory_percent.toFixed(2)}%
                                                 </span>
                                             </div>
+
+                                            <div className="flex gap-4 mt-1 text-[11px] text-slate-500 font-mono">
+                                                <span title="Process memory (heap, stacks)">anon {formatBytes(container.anon)}</span>
+                                                <span title="Page cache, mostly reclaimable">file {formatBytes(container.file)}</span>
+                                                <span title="Kernel memory charged to the container">kernel {formatBytes(container.kernel)}</span>
+                                            </div>
                                         </div>
                                     </div>
                                 </div>
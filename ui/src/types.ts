@@ -114,6 +114,46 @@ export interface NetworkInterface {
     dropout: number;
 }
 
+export interface DiskIORate {
+    name: string;
+    read_bytes_per_sec: number;
+    write_bytes_per_sec: number;
+    read_iops: number;
+    write_iops: number;
+    busy_percent: number | null;
+}
+
+export interface PressureValues {
+    avg10: number;
+    avg60: number;
+    avg300: number;
+    total: number;
+}
+
+export interface PressureStall {
+    some: PressureValues;
+    full: PressureValues | null;
+}
+
+export interface PressureInfo {
+    cpu: PressureStall | null;
+    memory: PressureStall | null;
+    io: PressureStall | null;
+}
+
+export interface ContainerPressure extends PressureInfo {
+    id: string;
+    name: string;
+}
+
+export interface HostPressureStats {
+    sampled_at: string | null;
+    load_average: { load1: number; load5: number; load15: number } | null;
+    disk_io: DiskIORate[];
+    pressure: PressureInfo | null;
+    container_pressure: ContainerPressure[];
+}
+
 export interface SystemStats {
     cpu: CpuInfo;
     memory: MemoryInfo;
@@ -121,6 +161,7 @@ export interface SystemStats {
     network: NetworkInterface[];
     uptime: number;
     boot_time: number;
+    io: HostPressureStats;
 }
 
 export interface ContainerStats {
@@ -137,3 +178,23 @@ export interface ContainerStats {
     pids: number;
 }
 
+export interface ContainerMemoryStats {
+    id: string;
+    name: string;
+    memory_usage: number;
+    memory_limit: number;
+    memory_percent: number;
+    anon: number;
+    file: number;
+    kernel: number;
+    working_set: number;
+    source: 'cgroup' | 'api';
+}
+
+export interface MemoryStatsSummary {
+    count: number;
+    total_usage: number;
+    host_memory: number;
+    containers: ContainerMemoryStats[];
+}
+